@@ -0,0 +1,74 @@
+"""Compare iteration over filtered event log with generic filter
+checks, as it was done before, and with compiled predicates. Also
+measure access by index to a filtered log, which is served by its
+materialized view.
+
+Run from repository root: `PYTHONPATH=. python benchmarks/bench_event_filter.py [count]`
+"""
+import itertools
+import sys
+import timeit
+from collections import deque
+from unittest.mock import Mock
+
+from pyzkaccess.event import Between, Event, EventLog
+
+COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+FILTERS = (
+    ('door', {'door': [1]}),
+    ('door, event_type', {'door': [1, 2], 'event_type': [0, 27]}),
+    ('reader (door, 23 types)', {
+        'door': [1],
+        'event_type': (0, 1, 2, 3, 4, 10, 11, 14, 15, 16, 17, 18, 19, 20, 21, 22, 23, 26, 27,
+                       29, 30, 31, 32, 33)
+    }),
+    ('door, card, entry_exit', {'door': [3], 'card': ['7125800', '7125801'], 'entry_exit': [0]}),
+)
+
+
+def legacy_filter(only_filters, data):
+    """Filtering as it was done before compiled predicates"""
+    for event in data:
+        if all(getattr(event, field) in fltr for field, fltr in only_filters.items()):
+            yield event
+
+
+def bench(name, func, repeat=3):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print('  {:<24} {:>8.1f} ms'.format(name, best * 1000))
+    return best
+
+
+def main():
+    lines = [
+        '2000-02-02 15:{:02}:{:02},{},{},{},{},{},0'.format(
+            i // 60 % 60, i % 60, i % 500, 7125793 + i % 5000, i % 4 + 1,
+            (0, 27, 200, 8)[i % 7 % 4], i % 3
+        )
+        for i in range(COUNT)
+    ]
+    log = EventLog(Mock(), 4096, _data=deque(Event.parse_batch(lines)))
+    print('{} events'.format(len(log)))
+
+    for name, filters in FILTERS:
+        view = log.only(**filters)
+        print(name)
+        before = bench('generic', lambda: sum(1 for _ in legacy_filter(view.only_filters, log.data)))
+        after = bench('compiled', lambda: sum(1 for _ in filter(view._predicate, log.data)))
+        print('  speedup: {:.1f}x'.format(before / after))
+        bench('view (first access)', lambda: len(log.only(**filters)), repeat=1)
+        if not len(view):
+            continue
+        middle = len(view) // 2
+        before = bench('index by scan', lambda: next(itertools.islice(
+            filter(view._predicate, log.data), middle, None)))
+        after = bench('index by view', lambda: view[middle])
+        print('  speedup: {:.0f}x'.format(before / after))
+
+    view = log.only(pin=lambda x: x.startswith('12'), door=Between(2, 4))
+    print('pin prefix, door range')
+    bench('compiled', lambda: sum(1 for _ in filter(view._predicate, log.data)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+"""Measure writing events to `EventJournal` and time range queries
+over it, which read only blocks of records within the range.
+
+Run from repository root: `PYTHONPATH=. python benchmarks/bench_event_journal.py [count]`
+"""
+import os
+import sys
+import tempfile
+import timeit
+from datetime import datetime
+
+from pyzkaccess.event import Event
+from pyzkaccess.journal import EventJournal
+
+COUNT = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+BATCH = 30  # Max count of events returned by a device at once
+
+
+def bench(name, func, repeat=3):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print('  {:<24} {:>8.1f} ms'.format(name, best * 1000))
+    return best
+
+
+def main():
+    lines = [
+        '2000-02-{:02} {:02}:{:02}:{:02},{},{},{},{},{},0'.format(
+            i // 86400 + 1, i // 3600 % 24, i // 60 % 60, i % 60, i % 500, 7125793 + i % 5000,
+            i % 4 + 1, (0, 27, 200, 8)[i % 7 % 4], i % 3
+        )
+        for i in range(COUNT)
+    ]
+    events = Event.parse_batch(lines)
+    batches = [events[i:i + BATCH] for i in range(0, COUNT, BATCH)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'events.journal')
+        with EventJournal(path) as journal:
+            print('{} events'.format(COUNT))
+            elapsed = bench('append', lambda: [journal.append(x) for x in batches], repeat=1)
+            print('  {:.0f} events/s, {:.1f} bytes/event'.format(
+                COUNT / elapsed, (os.path.getsize(path) + os.path.getsize(path + '.strings')) / COUNT
+            ))
+
+        with EventJournal(path) as journal:
+            hour = datetime(2000, 2, 2, 10), datetime(2000, 2, 2, 11)
+            bench('first query', lambda: list(journal.select(from_time=hour[0], to_time=hour[1])),
+                  repeat=1)
+            bench('an hour', lambda: list(journal.select(from_time=hour[0], to_time=hour[1])))
+            bench('an hour of door 1', lambda: list(journal.select(
+                {'door': {1}}, from_time=hour[0], to_time=hour[1]
+            )))
+            bench('the last event', lambda: journal[-1])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""Compare memory usage and filtering speed of deque, indexed deque
+and columnar event log storage.
+
+Run from repository root: `PYTHONPATH=. python benchmarks/bench_event_log.py`
+"""
+import timeit
+import tracemalloc
+from datetime import datetime
+from unittest.mock import Mock
+
+from pyzkaccess.event import Event, EventLog
+
+COUNT = 200000
+LINES = [
+    '2000-02-{:02} {:02}:{:02}:{:02},{},{},{},{},{},{}'.format(
+        i // 86400 % 28 + 1, i // 3600 % 24, i // 60 % 60, i % 60,
+        i % 500, 7125793 + i % 5000, i % 4 + 1, (0, 27, 200, 8)[i % 4], i % 3, (0, 1, 4, 200)[i % 4]
+    )
+    for i in range(COUNT)
+]
+
+
+def make_log(columnar=False, index_fields=()):
+    tracemalloc.start()
+    log = EventLog(Mock(), 4096, columnar=columnar, index_fields=index_fields)
+    log.data.extend(Event.parse_batch(LINES))
+    log._actual_index()  # Build indexes
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return log, size
+
+
+def bench(name, func, repeat=5):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print('  {:<28} {:>8.1f} ms'.format(name, best * 1000))
+
+
+def main():
+    moment1, moment2 = datetime(2000, 2, 3), datetime(2000, 2, 3, 12)
+    configs = (
+        ('deque', {}),
+        ('deque with hash indexes', {'index_fields': ('door', 'event_type', 'card')}),
+        ('columnar', {'columnar': True}),
+    )
+    for name, kwargs in configs:
+        log, size = make_log(**kwargs)
+        print('{}: {} events, {:.1f} MB, {:.0f} bytes per event'.format(
+            name, len(log), size / 2 ** 20, size / len(log)
+        ))
+        bench('only(door, event_type)', lambda: list(log.only(door=1, event_type=0)))
+        door_events = log.only(door=3)
+        bench('iterate door view', lambda: list(door_events))
+        bench('only(card)', lambda: list(log.only(card='7125800')))
+        bench('len(only(door))', lambda: len(log.only(door=2)))
+        bench('between_time()', lambda: list(log.between_time(moment1, moment2)))
+        bench('after_time(), recent', lambda: list(log.after_time(datetime(2000, 2, 3, 7))))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,53 @@
+"""Compare realtime event parsing speed before and after fast path,
+and with lazy events when only a couple of fields are read.
+
+Run from repository root: `PYTHONPATH=. python benchmarks/bench_event_parse.py`
+"""
+import timeit
+from datetime import datetime
+
+from pyzkaccess.enum import EVENT_TYPES, PassageDirection, VerifyMode
+from pyzkaccess.event import Event, LazyEvent
+
+LINES = [
+    '2000-02-02 15:{:02}:{:02},0,{},{},{},{},{}'.format(
+        i // 60 % 60, i % 60, 7125793 + i, i % 4 + 1, (0, 27, 200, 8)[i % 4], i % 3, (0, 1, 4, 200)[i % 4]
+    )
+    for i in range(1000)
+]
+
+
+def legacy_parse(line):
+    """Parsing as it was done before fast path"""
+    parsed = Event.parse(line)
+    return (
+        datetime.strptime(parsed[0], '%Y-%m-%d %H:%M:%S'),
+        parsed[1],
+        parsed[2],
+        int(parsed[3]),
+        EVENT_TYPES[int(parsed[4])],
+        PassageDirection(int(parsed[5])),
+        VerifyMode(int(parsed[6])),
+    )
+
+
+def bench(name, func, repeat=20):
+    best = min(timeit.repeat(func, number=1, repeat=repeat))
+    print('{:<24} {:>12,.0f} events/s'.format(name, len(LINES) / best))
+    return best
+
+
+def main():
+    before = bench('legacy strptime', lambda: [legacy_parse(x) for x in LINES])
+    bench('Event()', lambda: [Event(x) for x in LINES])
+    after = bench('Event.parse_batch()', lambda: Event.parse_batch(LINES))
+    print('speedup: {:.1f}x'.format(before / after))
+
+    # Routing by door and event type only
+    bench('Event routing', lambda: [(x.door, x.event_type) for x in Event.parse_batch(LINES)])
+    bench('LazyEvent routing',
+          lambda: [(x.door, x.event_type) for x in LazyEvent.parse_batch(LINES)])
+
+
+if __name__ == '__main__':
+    main()
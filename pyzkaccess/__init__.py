@@ -4,6 +4,7 @@ from .device import *
 from .door import *
 from .enum import *
 from .event import *
+from .journal import *
 from .exceptions import *
 from .param import *
 from .pyzkaccess import *
@@ -11,3 +12,8 @@ from .reader import *
 from .relay import *
 from .sdk import *
 from .data import *
+from .emulator import *
+from .aio import *
+from .pool import *
+from .poller import *
+from .checkpoint import *
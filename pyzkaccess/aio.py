@@ -0,0 +1,322 @@
+__all__ = [
+    'AsyncEventLog',
+    'AsyncParameters',
+    'AsyncProxy',
+    'AsyncZKAccess'
+]
+import asyncio
+import functools
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Optional, Sequence, Union
+
+from .aux_input import AuxInput, AuxInputList
+from .device import ZK400, ZKDevice, ZKModel
+from .door import Door, DoorList
+from .event import AdaptiveInterval, DedupWindow, Event, EventLog, RetentionPolicy
+from .journal import EventJournal
+from .param import BaseParameters
+from .pyzkaccess import ZKAccess
+from .reader import Reader, ReaderList
+from .relay import Relay, RelayList
+from .sdk import ZKSDKInterface
+
+
+class AsyncProxy:
+    """Wrapper around a synchronous object which makes its blocking
+    methods awaitable. Blocking methods are run in a given executor,
+    the rest of attributes are returned as is or wrapped by an
+    appropriate proxy if they are objects such as doors or relays.
+
+    Indexing and iteration over wrapped object are also supported.
+    """
+    #: Names of methods which make SDK calls
+    blocking_methods = frozenset()  # type: frozenset
+
+    def __init__(self, obj: Any, executor: Executor):
+        """
+        :param obj: wrapped synchronous object
+        :param executor: executor to run blocking calls in
+        """
+        self._obj = obj
+        self._executor = executor
+
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(func, *args, **kwargs)
+        )
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(self._obj, name)
+        if name in self.blocking_methods:
+            @functools.wraps(value)
+            async def method(*args, **kwargs):
+                res = await self._run(value, *args, **kwargs)
+                return _wrap(res, self._executor)
+            return method
+
+        if callable(value) and not isinstance(value, type):
+            # Results of non-blocking methods may be objects to wrap,
+            #  e.g. `EventLog.only()` returns a filtered log
+            @functools.wraps(value)
+            def sync_method(*args, **kwargs):
+                return _wrap(value(*args, **kwargs), self._executor)
+            return sync_method
+
+        return _wrap(value, self._executor)
+
+    def __getitem__(self, item):
+        return _wrap(self._obj[item], self._executor)
+
+    def __iter__(self):
+        return (_wrap(x, self._executor) for x in self._obj)
+
+    def __len__(self):
+        return len(self._obj)
+
+    def __eq__(self, other):
+        if isinstance(other, AsyncProxy):
+            return self._obj == other._obj
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __str__(self):
+        return str(self._obj)
+
+    def __repr__(self):
+        return 'Async{!r}'.format(self._obj)
+
+
+class _AsyncRelays(AsyncProxy):
+    blocking_methods = frozenset(('switch_on', ))
+
+
+class AsyncEventLog(AsyncProxy):
+    """Awaitable wrapper around `EventLog`. Methods which work with
+    already pulled events, such as `only` or `after_time`, are
+    synchronous
+    """
+    blocking_methods = frozenset(('refresh', 'poll'))
+
+    async def stream(self,
+                     polling_interval: Union[float, AdaptiveInterval] = 1) -> AsyncIterator[Event]:
+        """
+        Asynchronous generator which endlessly polls a device and
+        yields new events matched by log filters as they arrive. Ex:
+        `async for event in zk.doors[0].events.stream(): ...`
+        :param polling_interval: interval between requests in seconds
+         if there was no events or `AdaptiveInterval` object.
+         Default: every 1 second
+        :return: asynchronous iterator over new events
+        """
+        while True:
+            events = await self._run(self._obj.refresh)
+            interval = polling_interval
+            if isinstance(polling_interval, AdaptiveInterval):
+                interval = polling_interval.update(len(events))
+            if not events:
+                await asyncio.sleep(interval)
+                continue
+
+            for event in events:
+                yield event
+
+
+class AsyncParameters(AsyncProxy):
+    """Awaitable wrapper around device or door parameters. Since every
+    parameter read or write makes an SDK call, parameters are
+    accessed by `read` and `write` methods instead of attributes
+    """
+    async def read(self, *names: str) -> dict:
+        """
+        Read given parameters by one executor call. Ex:
+        `await zk.parameters.read('serial_number', 'ip_address')`
+        :param names: parameter names, the same as attribute names
+         of wrapped parameters object
+        :return: dict with parameter names and values
+        """
+        return await self._run(lambda: {name: getattr(self._obj, name) for name in names})
+
+    async def write(self, **values) -> None:
+        """
+        Write given parameters by one executor call. Ex:
+        `await zk.parameters.write(netmask='255.255.255.0')`
+        :param values: parameter names and values to be set
+        :return:
+        """
+        def func():
+            for name, value in values.items():
+                setattr(self._obj, name, value)
+
+        await self._run(func)
+
+    def __getattr__(self, name: str) -> Any:
+        if isinstance(getattr(type(self._obj), name, None), property):
+            raise AttributeError(
+                "Parameter '{}' makes a request to a device, use "
+                "'await read(\"{}\")' instead".format(name, name)
+            )
+        return super().__getattr__(name)
+
+
+_WRAPPERS = (
+    (EventLog, AsyncEventLog),
+    ((Relay, RelayList), _AsyncRelays),
+    (BaseParameters, AsyncParameters),
+    ((Door, DoorList, Reader, ReaderList, AuxInput, AuxInputList), AsyncProxy),
+)
+
+
+def _wrap(value: Any, executor: Executor) -> Any:
+    """Wrap value by an appropriate proxy if it is needed"""
+    for types, proxy_class in _WRAPPERS:
+        if isinstance(value, types):
+            return proxy_class(value, executor)
+    return value
+
+
+class AsyncZKAccess(AsyncProxy):
+    """Asyncio interface to a device. Mirrors `ZKAccess`, but SDK
+    calls are awaitable. They run in a per-device thread pool,
+    so one event loop may drive many devices.
+
+    Ex:
+    ```
+    async with AsyncZKAccess(connstr=connstr) as zk:
+        await zk.doors[0].relays.switch_on(5)
+        params = await zk.parameters.read('serial_number')
+        async for event in zk.events.stream():
+            print(event)
+    ```
+    """
+    blocking_methods = frozenset((
+        'connect', 'disconnect', 'restart', 'get_data', 'set_data', 'get_all_users',
+        'get_user_by_pin', 'delete_user_by_pin', 'update_user_by_pin', 'add_users',
+        'delete_rows', 'delete_users'
+    ))
+
+    def __init__(
+        self,
+        connstr: Optional[str] = None,
+        device: Optional[ZKDevice] = None,
+        device_model: type(ZKModel) = ZK400,
+        dllpath: str = "plcommpro.dll",
+        log_capacity: Optional[int] = None,
+        sdk: Optional[ZKSDKInterface] = None,
+        event_class: type(Event) = Event,
+        columnar_log: bool = False,
+        log_index_fields: Sequence[str] = (),
+        log_retention: Optional[RetentionPolicy] = None,
+        log_journal: Optional[EventJournal] = None,
+        log_dedup: Optional[DedupWindow] = None,
+        executor: Optional[Executor] = None,
+        max_workers: int = 2,
+    ):
+        """
+        A connection is not made in constructor. Use `connect()` or
+        `async with` statement.
+        :param connstr: Connection string, see `ZKAccess`
+        :param device: ZKDevice object to connect with
+        :param device_model: Device model. Default is C3-400
+        :param dllpath: Full path to plcommpro.dll
+        :param log_capacity: Mixumum capacity of events log. By default
+         size is not limited
+        :param sdk: SDK implementation object. By default `ZKSDK` with
+         `dllpath` is used
+        :param event_class: class of events objects in log, `Event` or
+         `LazyEvent`. Default is `Event`
+        :param columnar_log: keep events log in compact
+         `ColumnarEventStorage` instead of deque of `Event` objects
+        :param log_index_fields: fields of events to keep hash indexes
+         for, which speed up filtering of events log, e.g. by doors.
+         Any of 'door', 'event_type', 'pin', 'card'
+        :param log_retention: `RetentionPolicy` which limits events log
+         by events age, memory size or count
+        :param log_journal: `EventJournal` to write events log to
+         disk and to answer time queries of events log
+        :param log_dedup: `DedupWindow` which skips events repeated by
+         a device, e.g. after reconnect
+        :param executor: executor to run blocking calls in. By default
+         a new thread pool is created for this device
+        :param max_workers: threads count in the default thread pool.
+         More than one thread lets a control command be sent while
+         a polling call is in progress
+        """
+        if device and not connstr:
+            connstr = ZKAccess._device_connstr(device)
+
+        zk = ZKAccess(device_model=device_model, dllpath=dllpath,
+                      log_capacity=log_capacity, sdk=sdk, event_class=event_class,
+                      columnar_log=columnar_log, log_index_fields=log_index_fields,
+                      log_retention=log_retention, log_journal=log_journal,
+                      log_dedup=log_dedup)
+        zk._device = device
+        zk.connstr = connstr
+        self._own_executor = executor is None
+        super().__init__(zk, executor or ThreadPoolExecutor(max_workers=max_workers))
+
+    def __getattr__(self, name: str) -> Any:
+        if name in ('device', 'iter_data'):
+            raise AttributeError(
+                "'{}' makes requests to a device synchronously, use awaitable "
+                "analog instead".format(name)
+            )
+        return super().__getattr__(name)
+
+    @property
+    def zk(self) -> ZKAccess:
+        """Wrapped synchronous `ZKAccess` object"""
+        return self._obj
+
+    async def connect(self, connstr: Optional[str] = None) -> None:
+        """
+        Connect to a device
+        :param connstr: device connection string. By default a string
+         passed to constructor is used
+        :return:
+        """
+        connstr = connstr or self._obj.connstr
+        if not connstr:
+            raise ValueError('Connection string is not set')
+        await self._run(self._obj.connect, connstr)
+
+    async def get_device(self) -> ZKDevice:
+        """Return current device object we connected with"""
+        return await self._run(lambda: self._obj.device)
+
+    async def close(self) -> None:
+        """Disconnect from a device and shutdown own executor"""
+        if self._obj.sdk.is_connected:
+            await self._run(self._obj.disconnect)
+        if self._own_executor:
+            self._executor.shutdown(wait=False)
+
+    @classmethod
+    async def search_devices(cls,
+                             broadcast_address: str = "255.255.255.255",
+                             dllpath: str = "plcommpro.dll",
+                             sdk: Optional[ZKSDKInterface] = None) -> Sequence[ZKDevice]:
+        """
+        Scan an Ethernet network, see `ZKAccess.search_devices`
+        :param broadcast_address: your local segment broadcast address
+        :param dllpath: path to a PULL SDK DLL. Default: 'plcommpro.dll'
+        :param sdk: SDK implementation object
+        :return: iterable of found ZKDevice
+        """
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(
+            None, ZKAccess.search_devices, broadcast_address, dllpath, sdk
+        )
+
+    async def __aenter__(self):
+        if self._obj.connstr:
+            await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    def __repr__(self):
+        return 'AsyncZKAccess(connstr={!r})'.format(self._obj.connstr)
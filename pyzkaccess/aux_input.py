@@ -7,7 +7,7 @@ from typing import Iterable
 
 from .common import UserTuple
 from .event import EventLog
-from .sdk import ZKSDK
+from .sdk import ZKSDKInterface
 
 
 class AuxInputInterface(metaclass=ABCMeta):
@@ -25,7 +25,7 @@ class AuxInputInterface(metaclass=ABCMeta):
 
 class AuxInput(AuxInputInterface):
     """Concrete auxiliary input"""
-    def __init__(self, sdk: ZKSDK, event_log: EventLog, number: int):
+    def __init__(self, sdk: ZKSDKInterface, event_log: EventLog, number: int):
         self.number = number
         self._sdk = sdk
         self._event_log = event_log
@@ -52,7 +52,7 @@ class AuxInputList(AuxInputInterface, UserTuple):
     """Collection of aux input objects which is used to perform group
     operations over multiple aux inputs
     """
-    def __init__(self, sdk: ZKSDK, event_log: EventLog, aux_inputs: Iterable[AuxInput] = ()):
+    def __init__(self, sdk: ZKSDKInterface, event_log: EventLog, aux_inputs: Iterable[AuxInput] = ()):
         super().__init__(aux_inputs)
         self._sdk = sdk
         self._event_log = event_log
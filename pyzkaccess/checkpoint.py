@@ -0,0 +1,214 @@
+__all__ = [
+    'Checkpoint',
+    'CheckpointedConsumer',
+    'SequencedEvent'
+]
+import os
+import threading
+from collections import namedtuple
+from typing import Callable, List, Optional, Union
+
+from .event import AdaptiveInterval, DedupWindow, EventLog
+
+
+SequencedEvent = namedtuple('SequencedEvent', ('seq', 'event'))
+SequencedEvent.__doc__ = """Event with its sequence number in journal"""
+SequencedEvent.seq.__doc__ = 'Position of event in journal, grows monotonically'
+SequencedEvent.event.__doc__ = '`Event` object'
+
+
+class Checkpoint:
+    """Offset of a consumer which is kept in a file. The file is
+    replaced atomically on every commit, so after a crash it contains
+    either previous or new offset
+    """
+    def __init__(self, path: str):
+        """
+        :param path: path to checkpoint file, it is created on the
+         first commit
+        """
+        self.path = path
+        self.offset = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                self.offset = int(f.read().strip() or 0)
+
+    def commit(self, offset: int) -> None:
+        """Write new offset to disk"""
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        # Rename is durable only after directory is flushed
+        _fsync_dir(os.path.dirname(self.path) or '.')
+        self.offset = offset
+
+    def __repr__(self):
+        return 'Checkpoint({!r}, offset={})'.format(self.path, self.offset)
+
+
+def _fsync_dir(path: str) -> None:
+    if os.name == 'nt':
+        return  # Directories can't be opened on Windows, NTFS journals renames
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class CheckpointedConsumer:
+    """Pipeline stage which delivers events of a log to a sink and
+    resumes from the last acknowledged event after restart.
+
+    Log must have `EventJournal`, since events are read from it.
+    Position of an event in journal is its sequence number. A sink is
+    a callable which accepts a list of `SequencedEvent` and returns
+    sequence number of the first event it has not processed or None
+    if all events were processed. This offset is committed to a
+    `Checkpoint` file after journal is flushed to disk up to it. An
+    exception raised by a sink leaves offset unchanged.
+
+    Events equal to one of `dedup_window` recently delivered events
+    are skipped, e.g. events returned by a device again after
+    reconnect.
+
+    Events delivered after the last commit are delivered again after
+    a crash. So delivery is exactly-once if a sink skips sequence
+    numbers it has already stored, and at-least-once otherwise.
+
+    Ex:
+    ```
+    with EventJournal('events.journal') as journal:
+        zk = ZKAccess(connstr, log_journal=journal)
+        consumer = CheckpointedConsumer(zk.events, 'events.offset')
+        consumer.run(send_to_backend)
+    ```
+    """
+    def __init__(self, log: EventLog, checkpoint_path: str, dedup_window: int = 1024):
+        """
+        :param log: events log with journal, it may be filtered by
+         `only()`
+        :param checkpoint_path: path to file which keeps offset
+        :param dedup_window: count of recently delivered events which
+         are remembered to skip duplicates
+        """
+        if log.journal is None:
+            raise ValueError('Event log must have a journal')
+
+        self.log = log
+        self.journal = log.journal
+        self.checkpoint = Checkpoint(checkpoint_path)
+        if self.checkpoint.offset > len(self.journal):
+            # Journal was not flushed before a crash, records after
+            #  its end will be written again
+            self.checkpoint.commit(len(self.journal))
+        self._predicate = log._predicate if log.only_filters else None
+        self._recent = DedupWindow(dedup_window)
+        start = self.checkpoint.offset - dedup_window
+        for _, event in self.journal.read(start, self.checkpoint.offset - max(start, 0)):
+            self._recent.add(event)
+
+    @property
+    def offset(self) -> int:
+        """Sequence number of the first not delivered event"""
+        return self.checkpoint.offset
+
+    @property
+    def pending(self) -> int:
+        """Count of journal records after committed offset"""
+        return len(self.journal) - self.offset
+
+    def deliver(self, sink: Callable[[List[SequencedEvent]], Optional[int]],
+                batch_size: int = 1000) -> int:
+        """
+        Pass the next batch of events after committed offset to sink
+        and commit offset acknowledged by it
+        :param sink: callable which accepts list of events and returns
+         offset of the first not processed event or None
+        :param batch_size: maximum count of journal records to read
+        :return: count of journal records which offset was moved by
+        """
+        offset = self.offset
+        records = self.journal.read(offset, batch_size)
+        if not records:
+            return 0
+
+        end = records[-1][0] + 1
+        batch = []  # type: List[SequencedEvent]
+        seen = set()
+        for seq, event in records:
+            if event in self._recent or event in seen:
+                continue
+            seen.add(event)
+            if self._predicate is None or self._predicate(event):
+                batch.append(SequencedEvent(seq, event))
+
+        acked = sink(batch) if batch else None
+        if acked is None:
+            acked = end
+        if not offset <= acked <= end:
+            raise ValueError('Acknowledged offset {} is out of batch range [{}, {}]'.format(
+                acked, offset, end
+            ))
+
+        for seq, event in records:
+            if seq >= acked:
+                break
+            self._recent.add(event)
+        self._commit(acked)
+        return acked - offset
+
+    def poll(self, sink: Callable[[List[SequencedEvent]], Optional[int]],
+             batch_size: int = 1000) -> int:
+        """
+        Pull new events from a device to log and journal and deliver
+        all pending events to sink
+        :param sink: see `deliver()`
+        :param batch_size: see `deliver()`
+        :return: count of journal records which offset was moved by
+        """
+        self.log.refresh()
+        total = 0
+        while self.pending:
+            count = self.deliver(sink, batch_size)
+            if not count:  # Sink has not acknowledged anything
+                break
+            total += count
+        return total
+
+    def run(self,
+            sink: Callable[[List[SequencedEvent]], Optional[int]],
+            polling_interval: Union[float, AdaptiveInterval] = 1,
+            stop: Optional[threading.Event] = None,
+            batch_size: int = 1000) -> None:
+        """
+        Poll a device and deliver events to sink until `stop` is set.
+        Exceptions of a device or a sink are propagated
+        :param sink: see `deliver()`
+        :param polling_interval: interval between requests in seconds
+         if there was no events or `AdaptiveInterval` object
+        :param stop: event which stops polling. Runs endlessly if None
+        :param batch_size: see `deliver()`
+        """
+        stop = stop or threading.Event()
+        while not stop.is_set():
+            count = self.poll(sink, batch_size)
+            if isinstance(polling_interval, AdaptiveInterval):
+                timeout = polling_interval.update(count)
+            else:
+                timeout = 0 if count else polling_interval
+            stop.wait(timeout)
+
+    def _commit(self, offset: int) -> None:
+        # Committed events must survive a crash, otherwise new events
+        #  would get their sequence numbers and be skipped
+        if self.journal.synced < offset:
+            self.journal.sync()
+        if offset != self.checkpoint.offset:
+            self.checkpoint.commit(offset)
+
+    def __repr__(self):
+        return 'CheckpointedConsumer(offset={}, pending={})'.format(self.offset, self.pending)
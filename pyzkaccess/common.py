@@ -1,6 +1,7 @@
 __all__ = ["UserTuple", "DocValue", "DocDict"]
 from copy import copy, deepcopy
-from typing import Sequence, Union, Iterable
+from datetime import datetime
+from typing import Dict, Sequence, Union, Iterable
 
 from wrapt import ObjectProxy
 from wrapt.wrappers import _ObjectProxyMetaType  # noqa
@@ -25,6 +26,64 @@ class DeviceDataFilter:
         return ",".join([f"{k}={v}" for k, v in self.data.items()])
 
 
+def datetime_to_zkctime(value: datetime) -> int:
+    """
+    Convert datetime to a device time representation.
+
+    Amazing DIY ctime calculating from ZKTeco guys. Simply put this
+    is a count of seconds starting from 2000-01-01T00:00:00 without
+    considering leap years/seconds or different length of months
+    (always 31 day). See PULL SDK docs
+    :param value: datetime object, year must be 2000 or greater
+    :return: count of seconds in device representation
+    """
+    if value.year < 2000:
+        raise ValueError('Minimum year is 2000')
+
+    return sum((
+        sum((
+            (value.year - 2000) * 12 * 31,
+            (value.month - 1) * 31,
+            (value.day - 1)
+        )) * 24 * 60 * 60,
+        value.hour * 60 * 60,
+        value.minute * 60,
+        value.second
+    ))
+
+
+def zkctime_to_datetime(value: int) -> datetime:
+    """
+    Convert a device time representation to datetime. See
+    `datetime_to_zkctime`
+    :param value: count of seconds in device representation
+    :return: datetime object
+    """
+    return datetime(
+        year=value // 32140800 + 2000,
+        month=(value // 2678400) % 12 + 1,
+        day=(value // 86400) % 31 + 1,
+        hour=(value // 3600) % 24,
+        minute=(value // 60) % 60,
+        second=value % 60
+    )
+
+
+def parse_connstr(connstr: str) -> Dict[str, str]:
+    """
+    Parse connection string such as
+    'protocol=TCP,ipaddress=192.168.1.201,port=4370,timeout=4000,passwd='
+    :param connstr: connection string
+    :return: dict with connection string keys and values
+    """
+    res = {}
+    for piece in connstr.split(','):
+        if piece:
+            key, _, val = piece.partition('=')
+            res[key.strip().lower()] = val.strip()
+    return res
+
+
 class UserTuple:
     """Immutable version of `collections.UserList` from the stdlib"""
 
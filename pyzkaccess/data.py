@@ -1,4 +1,6 @@
 from enum import Enum
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -48,10 +50,11 @@ class TableName(str, Enum):
 
 # TODO: Discuss whether we should go with pydantic or not. since the rest of the pyzaccess library doesn't use pydantic.
 class User(BaseModel):
-    CardNo: int
-    Pin: int
-    Password: str
-    Group: int
-    StartTime: str
-    EndTime: str
-    SuperAuthorize: bool
+    # Fields are optional since a part of fields may be requested
+    CardNo: Optional[int] = None
+    Pin: Optional[int] = None
+    Password: Optional[str] = None
+    Group: Optional[int] = None
+    StartTime: Optional[str] = None
+    EndTime: Optional[str] = None
+    SuperAuthorize: Optional[bool] = None
@@ -11,7 +11,7 @@ from .event import EventLog
 from .param import DoorParameters
 from .reader import Reader, ReaderList
 from .relay import RelayList
-from .sdk import ZKSDK
+from .sdk import ZKSDKInterface
 
 
 class DoorInterface(metaclass=ABCMeta):
@@ -36,7 +36,7 @@ class DoorInterface(metaclass=ABCMeta):
 class Door(DoorInterface):
     """Concrete door"""
     def __init__(self,
-                 sdk: ZKSDK,
+                 sdk: ZKSDKInterface,
                  event_log: EventLog,
                  number: int,
                  relays: RelayList,
@@ -96,7 +96,7 @@ class DoorList(DoorInterface, UserTuple):
     """Collection of door objects which is used to perform group
     operations over multiple doors
     """
-    def __init__(self, sdk: ZKSDK, event_log: EventLog, doors: Iterable[Door]):
+    def __init__(self, sdk: ZKSDKInterface, event_log: EventLog, doors: Iterable[Door]):
         super().__init__(doors)
         self._sdk = sdk
         self._event_log = event_log
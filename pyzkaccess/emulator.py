@@ -0,0 +1,561 @@
+"""Emulation of a C3 device which keeps its state in memory. It is
+intended to test the code which works with devices without having
+a real hardware.
+"""
+__all__ = [
+    'EmulatedDevice',
+    'EmulatedZKSDK'
+]
+import random
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .common import DeviceDataFilter, datetime_to_zkctime, parse_connstr, zkctime_to_datetime
+from .data import TableName
+from .device import ZK400, ZKModel
+from .enum import ControlOperation, PassageDirection, VerifyMode
+from .exceptions import ZKSDKError
+from .sdk import (
+    CallPriority,
+    PriorityLock,
+    ZKSDKInterface,
+    _format_fields,
+    _format_filters,
+    _format_rows,
+    _parse_table,
+    synchronized
+)
+
+
+def _timezone_fields():
+    days = ('Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Hol1', 'Hol2', 'Hol3')
+    return ('TimezoneId', ) + tuple('{}Time{}'.format(d, i) for d in days for i in (1, 2, 3))
+
+
+class EmulatedDevice:
+    """In-memory state of emulated device: parameters, data tables
+    and realtime events queue. All methods take and return data in
+    the same text format as PULL SDK functions do. Errors are raised
+    as `ZKSDKError` with SDK error codes.
+
+    Methods are thread-safe.
+    """
+    #: Field names of data tables. See SDK docs
+    table_fields = {
+        TableName.user: ('CardNo', 'Pin', 'Password', 'Group', 'StartTime', 'EndTime',
+                         'SuperAuthorize'),
+        TableName.userauthorize: ('Pin', 'AuthorizeTimezoneId', 'AuthorizeDoorId'),
+        TableName.holiday: ('Holiday', 'HolidayType', 'Loop'),
+        TableName.timezone: _timezone_fields(),
+        TableName.transaction: ('Cardno', 'Pin', 'Verified', 'DoorID', 'EventType', 'InOutState',
+                                'Time_second'),
+        TableName.firstcard: ('Pin', 'DoorID', 'TimezoneID'),
+        TableName.multimcard: ('Index', 'DoorId', 'Group1', 'Group2', 'Group3', 'Group4',
+                               'Group5'),
+        TableName.inoutfun: ('Index', 'EventType', 'InAddr', 'OutType', 'OutAddr', 'OutTime',
+                             'Reserved'),
+    }
+
+    #: Fields which identify a row in a table. Writing a row with the
+    #: same key values replaces an existing row. Rows in tables without
+    #: key are always appended
+    table_keys = {
+        TableName.user: ('Pin', ),
+        TableName.userauthorize: ('Pin', 'AuthorizeDoorId'),
+        TableName.holiday: ('Holiday', ),
+        TableName.timezone: ('TimezoneId', ),
+        TableName.transaction: (),
+        TableName.firstcard: ('Pin', 'DoorID'),
+        TableName.multimcard: ('Index', ),
+        TableName.inoutfun: ('Index', ),
+    }
+
+    def __init__(self,
+                 device_model: type(ZKModel) = ZK400,
+                 serial_number: str = 'DGD9190019050335134',
+                 ip: str = '192.168.1.201',
+                 mac: str = '00:17:61:C8:EC:17',
+                 version: str = 'AC Ver 4.3.4 Apr 28 2017',
+                 event_queue_size: Optional[int] = None):
+        """
+        :param device_model: Emulated device model. Default is C3-400
+        :param serial_number: Device serial number
+        :param ip: Device ip address
+        :param mac: Device MAC address, used in search results
+        :param version: Firmware version, used in search results
+        :param event_queue_size: Maximum count of unread realtime
+         events, the oldest ones are dropped on overflow. By default
+         size is not limited
+        """
+        self.device_model = device_model
+        self.mac = mac
+        self.version = version
+        self.parameters = self._default_parameters(device_model, serial_number, ip)
+        self.tables = {table: [] for table in self.table_fields}  # type: Dict[str, List[dict]]
+        self.events = deque(maxlen=event_queue_size)
+        self._time_offset = timedelta()
+        self._lock = threading.RLock()
+
+    @property
+    def password(self) -> str:
+        """Communication password"""
+        return self.parameters['ComPwd']
+
+    @property
+    def search_line(self) -> str:
+        """Device string returned by device search"""
+        return 'MAC={},IP={},SN={},Device={},Ver={}'.format(
+            self.mac, self.parameters['IPAddress'], self.parameters['~SerialNumber'],
+            self.device_model.name, self.version
+        )
+
+    def now(self) -> datetime:
+        """Current time on device"""
+        return (datetime.now() + self._time_offset).replace(microsecond=0)
+
+    def get_parameters(self, names: Sequence[str]) -> str:
+        """
+        Return values of given parameters. Unknown parameters are
+        skipped
+        :param names: parameter names
+        :return: string in "name1=value1,name2=value2" format
+        """
+        with self._lock:
+            res = []
+            for name in names:
+                if name == 'DateTime':
+                    res.append('DateTime={}'.format(datetime_to_zkctime(self.now())))
+                elif name in self.parameters:
+                    res.append('{}={}'.format(name, self.parameters[name]))
+            return ','.join(res)
+
+    def set_parameters(self, query: str) -> None:
+        """
+        Set parameter values
+        :param query: string in "name1=value1,name2=value2" format
+        :return:
+        """
+        with self._lock:
+            for pair in query.split(','):
+                name, sep, value = pair.partition('=')
+                if not sep:
+                    raise ZKSDKError('Bad parameter string {}'.format(pair), -11)
+                if name == 'DateTime':
+                    self._time_offset = zkctime_to_datetime(int(value)) - datetime.now()
+                else:
+                    self.parameters[name] = value
+
+    def control(self, operation: int, p1: int, p2: int, p3: int, p4: int) -> None:
+        """
+        Perform a control operation. See ControlDevice SDK function
+        """
+        if operation not in set(x.value for x in ControlOperation):
+            raise ZKSDKError('Unknown control operation {}'.format(operation), -13)
+
+    def add_event(self, event_line: str) -> None:
+        """
+        Put an event to the realtime events queue. Also append
+        appropriate record to transaction table
+        :param event_line: event string in format returned by
+         GetRTLog SDK function
+        :return:
+        """
+        time_str, pin, card, door, event_type, entry_exit, verify_mode = event_line.split(',')
+        timestamp = datetime_to_zkctime(datetime.strptime(time_str, '%Y-%m-%d %H:%M:%S'))
+        with self._lock:
+            self.events.append(event_line)
+            self.tables[TableName.transaction].append({
+                'Cardno': card, 'Pin': pin, 'Verified': verify_mode, 'DoorID': door,
+                'EventType': event_type, 'InOutState': entry_exit, 'Time_second': str(timestamp)
+            })
+
+    def pop_events(self) -> List[str]:
+        """
+        Return and remove all unread realtime events. As a real device,
+        returns a single door status event (with type 255) if there are
+        no events
+        :return: event strings
+        """
+        with self._lock:
+            res = list(self.events)
+            self.events.clear()
+
+        if not res:
+            res = ['{},0,0,0,255,0,0'.format(self.now())]
+        return res
+
+    def get_data(self, table: str, fields: str = '*', data_filter: str = '') -> str:
+        """
+        Return table rows
+        :param table: table name
+        :param fields: field names separated by TAB or '*' for all
+        :param data_filter: conditions in "field1=value1,field2=value2"
+         format
+        :return: text in GetDeviceData SDK function format
+        """
+        all_fields = self._get_fields(table)
+        fields = all_fields if fields in ('*', '') else tuple(fields.split('\t'))
+        self._check_fields(table, fields)
+        conditions = self._parse_conditions(table, data_filter)
+        with self._lock:
+            lines = [','.join(fields)]
+            lines.extend(
+                ','.join(row.get(f, '') for f in fields)
+                for row in self.tables[table] if self._match(row, conditions)
+            )
+        return '\r\n'.join(lines) + '\r\n'
+
+    def set_data(self, table: str, data: str) -> None:
+        """
+        Insert or replace table rows
+        :param table: table name
+        :param data: rows in SetDeviceData SDK function format
+        :return:
+        """
+        keys = self.table_keys.get(table, ())
+        rows = []
+        for line in data.split('\r\n'):
+            if line:
+                row = dict(pair.split('=', 1) for pair in line.split('\t'))
+                self._check_fields(table, row.keys())
+                rows.append(row)
+
+        with self._lock:
+            existing = self.tables[table]
+            positions = {tuple(r.get(k, '') for k in keys): i for i, r in enumerate(existing)}
+            for row in rows:
+                key = tuple(row.get(k, '') for k in keys)
+                if keys and key in positions:
+                    existing[positions[key]].update(row)
+                else:
+                    positions[key] = len(existing)
+                    existing.append(row)
+
+    def delete_data(self, table: str, data_filter: str) -> None:
+        """
+        Delete table rows
+        :param table: table name
+        :param data_filter: filters separated by CRLF, every filter
+         matches rows to be deleted
+        :return:
+        """
+        filters = [self._parse_conditions(table, line) for line in data_filter.split('\r\n')]
+        with self._lock:
+            self.tables[table] = [
+                row for row in self.tables[table]
+                if not any(self._match(row, conditions) for conditions in filters)
+            ]
+
+    def _get_fields(self, table: str) -> Tuple[str, ...]:
+        if table not in self.table_fields:
+            raise ZKSDKError('Unknown table {}'.format(table), -100)
+        return self.table_fields[table]
+
+    def _check_fields(self, table: str, fields: Iterable[str]):
+        unknown = set(fields) - set(self._get_fields(table))
+        if unknown:
+            raise ZKSDKError('Unknown fields {} in table {}'.format(unknown, table), -101)
+
+    def _parse_conditions(self, table: str, data_filter: str) -> Mapping[str, str]:
+        conditions = {}
+        for piece in data_filter.replace('\t', ',').split(','):
+            if piece:
+                field, _, value = piece.partition('=')
+                conditions[field] = value
+        self._check_fields(table, conditions.keys())
+        return conditions
+
+    @staticmethod
+    def _match(row: Mapping[str, str], conditions: Mapping[str, str]) -> bool:
+        return all(row.get(f) == v for f, v in conditions.items())
+
+    @staticmethod
+    def _default_parameters(device_model: type(ZKModel), serial_number: str, ip: str) -> dict:
+        params = {
+            '~SerialNumber': serial_number,
+            'LockCount': str(len(device_model.doors_def)),
+            'ReaderCount': str(len(device_model.readers_def)),
+            'AuxInCount': str(len(device_model.aux_inputs_def)),
+            'AuxOutCount': str(device_model.relays // 2),
+            'ComPwd': '',
+            'IPAddress': ip,
+            'NetMask': '255.255.255.0',
+            'GATEIPAddress': '192.168.1.1',
+            'RS232BaudRate': '38400',
+            'WatchDog': '0',
+            'Door4ToDoor2': '0',
+            'BackupTime': '1',
+            'InBIOTowWay': '0',
+            '~ZKFPVersion': '10',
+            '~DSTF': '0',
+            'DaylightSavingTimeOn': '0',
+            'DLSTMode': '0',
+            'AntiPassback': '0',
+            'InterLock': '0',
+            'DaylightSavingTime': '3-7-2-0',
+            'StandardTime': '10-7-3-0',
+        }
+        for i, value in enumerate(('3', '2', '7', '2', '0', '10', '5', '7', '3', '0'), start=1):
+            params['WeekOfMonth{}'.format(i)] = value
+        for door in device_model.doors_def:
+            params.update({
+                'Door{}ForcePassWord'.format(door): '',
+                'Door{}SupperPassWord'.format(door): '',
+                'Door{}CloseAndLock'.format(door): '0',
+                'Door{}SensorType'.format(door): '0',
+                'Door{}Drivertime'.format(door): '5',
+                'Door{}Detectortime'.format(door): '15',
+                'Door{}VerifyType'.format(door): '4',
+                'Door{}MultiCardOpenDoor'.format(door): '0',
+                'Door{}FirstCardOpenDoor'.format(door): '0',
+                'Door{}ValidTZ'.format(door): '1',
+                'Door{}KeepOpenTimeZone'.format(door): '0',
+                'Door{}Intertime'.format(door): '0',
+                'Door{}CancelKeepOpenDay'.format(door): '0',
+            })
+        return params
+
+
+class EmulatedZKSDK(ZKSDKInterface):
+    """SDK implementation which works with `EmulatedDevice` directly in
+    memory, without network. Can be used instead of `ZKSDK` in order
+    to test the code, or to load test it using many emulated devices.
+
+    Calls may be slowed down by a configured latency. Realtime events
+    may be generated with a given average rate, they are produced
+    lazily on `get_rt_log` call, so no background threads are
+    involved.
+    """
+    #: Event types which are generated
+    generated_event_types = (0, 1, 8, 20, 22, 23, 27, 200, 201, 202)
+
+    def __init__(self,
+                 device: Optional[EmulatedDevice] = None,
+                 latency: Union[float, Tuple[float, float]] = 0,
+                 event_rate: float = 0,
+                 seed: Optional[int] = None):
+        """
+        :param device: Emulated device state. A new `EmulatedDevice`
+         is created if omitted
+        :param latency: Delay in seconds of every call. Either a number
+         or a (min, max) tuple for uniformly distributed random delay
+        :param event_rate: Average count of realtime events generated
+         per second. Default is 0, i.e. events are not generated
+        :param seed: Random generator seed
+        """
+        self.lock = PriorityLock()
+        self.device = device or EmulatedDevice()
+        self.latency = latency
+        self.event_rate = event_rate
+        self.handle = None
+        self._random = random.Random(seed)
+        self._last_generated = None  # type: Optional[float]
+
+    @synchronized(CallPriority.default)
+    def connect(self, connstr: str) -> None:
+        """
+        Connect to a device.
+
+        SDK: Connect()
+        :param connstr: connection string, only `passwd` is checked
+        :raises ZKSDKError:
+        :return:
+        """
+        self._delay()
+        if parse_connstr(connstr).get('passwd', '') != self.device.password:
+            raise ZKSDKError('Unable to connect a device using connstr {}'.format(connstr), -14)
+
+        self.handle = id(self)
+        self._last_generated = time.monotonic()
+
+    @synchronized(CallPriority.default)
+    def disconnect(self) -> None:
+        """
+        Disconnect from a device
+
+        SDK: Disconnect()
+        :return:
+        """
+        self.handle = None
+
+    @synchronized(CallPriority.control)
+    def control_device(self, operation, p1, p2, p3, p4, options_str='') -> int:
+        """
+        Perform an action on a device such as relay switching or reboot.
+
+        SDK: ControlDevice()
+        :raises ZKSDKError:
+        :return: 0
+        """
+        self._request('ControlDevice failed for operation {}'.format(operation))
+        self._call('ControlDevice failed for operation {}'.format(operation),
+                   self.device.control, operation, p1, p2, p3, p4)
+        return 0
+
+    @synchronized(CallPriority.poll)
+    def get_rt_log(self, buffer_size: int) -> Sequence[str]:
+        """
+        Retrieve unread realtime events from a device
+
+        SDK: GetRTLog()
+        :param buffer_size: ignored
+        :raises ZKSDKError:
+        :return: event string lines
+        """
+        self._request('GetRTLog failed')
+        self._generate_events()
+        return self.device.pop_events()
+
+    @synchronized(CallPriority.default)
+    def search_device(self, broadcast_address: str, buffer_size: int) -> Sequence[str]:
+        """
+        Return the emulated device in search results
+
+        SDK: SearchDevice()
+        :param broadcast_address: ignored
+        :param buffer_size: ignored
+        :return: device string lines
+        """
+        self._delay()
+        return [self.device.search_line]
+
+    @synchronized(CallPriority.default)
+    def get_device_param(self, parameters: Sequence[str], buffer_size: int) -> Mapping[str, str]:
+        """
+        Fetch given device parameters
+
+        SDK: GetDeviceParam()
+        :param parameters: sequence with parameter names to be requested
+        :param buffer_size: ignored
+        :raises ZKSDKError:
+        :return: dict with requested parameters value
+        """
+        self._request('GetDeviceParam failed')
+        res = self.device.get_parameters(parameters)
+        results = dict(pair.split('=', 1) for pair in res.split(',') if pair)
+        if results.keys() != set(parameters):
+            raise ValueError(
+                'Parameters returned by a device are differ than parameters was requested'
+            )
+        return results
+
+    @synchronized(CallPriority.default)
+    def set_device_param(self, parameters: Mapping[str, Any]) -> None:
+        """
+        Set given device parameters
+
+        SDK: SetDeviceParam()
+        :param parameters: dict with parameter names and values
+        :raises ZKSDKError:
+        :return:
+        """
+        if not parameters:
+            return
+
+        self._request('SetDeviceParam failed')
+        query = ','.join('{}={}'.format(k, v) for k, v in sorted(parameters.items()))
+        self._call('SetDeviceParam failed', self.device.set_parameters, query)
+
+    @synchronized(CallPriority.default)
+    def get_device_data(self,
+                        tablename: TableName,
+                        buffer_size: Optional[int] = None,
+                        data_filter: DeviceDataFilter = DeviceDataFilter(),
+                        fields: Optional[Sequence[str]] = None,
+                        options: str = '') -> List[Dict[str, Any]]:
+        """
+        Fetch given device data
+
+        SDK: GetDeviceData()
+        :param tablename: the name of the table to get data for
+        :param buffer_size: ignored
+        :param data_filter: conditions which rows must meet
+        :param fields: field names to be fetched. By default all
+         fields are fetched
+        :param options: ignored
+        :raises ZKSDKError:
+        :return: list of dicts with requested table data
+        """
+        self._request('GetDeviceData failed')
+        raw = self._call('GetDeviceData failed', self.device.get_data,
+                         tablename, _format_fields(fields), str(data_filter))
+        return _parse_table(raw)
+
+    @synchronized(CallPriority.default)
+    def set_device_data(self, tablename: TableName, data: List[Dict[str, Any]]) -> None:
+        """
+        Set given device data
+
+        SDK: SetDeviceData()
+        :param tablename: the name of the table to set data to
+        :param data: rows to be written
+        :raises ZKSDKError:
+        :return: None
+        """
+        self._request('SetDeviceData failed')
+        self._call('SetDeviceData failed', self.device.set_data, tablename, _format_rows(data))
+
+    @synchronized(CallPriority.default)
+    def delete_device_data(self, tablename: TableName, data_filter: List[DeviceDataFilter]) -> None:
+        """
+        Delete given device data
+
+        SDK: DeleteDeviceData()
+        :param tablename: the name of the table to delete data from
+        :param data_filter: list of filters
+        :raises ZKSDKError:
+        :return: None
+        """
+        self._request('DeleteDeviceData failed')
+        self._call('DeleteDeviceData failed', self.device.delete_data,
+                   tablename, _format_filters(data_filter))
+
+    def _request(self, err_msg: str):
+        self._delay()
+        if not self.handle:
+            raise ZKSDKError(err_msg, -8)
+
+    @staticmethod
+    def _call(err_msg: str, func, *args):
+        try:
+            return func(*args)
+        except ZKSDKError as e:
+            raise ZKSDKError(err_msg, e.err) from e
+
+    def _delay(self):
+        latency = self.latency
+        if isinstance(latency, tuple):
+            latency = self._random.uniform(*latency)
+        if latency > 0:
+            time.sleep(latency)
+
+    def _generate_events(self):
+        now = time.monotonic()
+        elapsed, self._last_generated = now - self._last_generated, now
+        if self.event_rate <= 0:
+            return
+
+        # Number of events in a period is Poisson-distributed, so
+        #  count the exponentially distributed intervals between them
+        doors = self.device.device_model.doors_def
+        users = self.device.tables[TableName.user]
+        device_time = self.device.now()
+        elapsed -= self._random.expovariate(self.event_rate)
+        while elapsed >= 0:
+            user = self._random.choice(users) if users else {}
+            self.device.add_event('{},{},{},{},{},{},{}'.format(
+                device_time,
+                user.get('Pin', 0),
+                user.get('CardNo', self._random.randint(1, 9999999)),
+                self._random.choice(doors),
+                self._random.choice(self.generated_event_types),
+                self._random.choice((PassageDirection.entry.value, PassageDirection.exit.value)),
+                self._random.choice((VerifyMode.only_card.value, VerifyMode.card_or_finger.value))
+            ))
+            elapsed -= self._random.expovariate(self.event_rate)
+
+    def __del__(self):
+        self.disconnect()
@@ -1,17 +1,62 @@
 __all__ = [
+    'AdaptiveInterval',
+    'Between',
+    'ColumnarEventStorage',
+    'DedupWindow',
     'Event',
-    'EventLog'
+    'EventLog',
+    'LazyEvent',
+    'RetentionPolicy'
 ]
+import heapq
 import itertools
+import math
+import operator
+import sys
 import time
-from collections import deque
-from copy import deepcopy
-from datetime import datetime
-from typing import Optional, List, Iterable, Union, Sequence
+from array import array
+from bisect import bisect_left
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Optional,
+    List,
+    Iterable,
+    Iterator,
+    Union,
+    Sequence
+)
 
 from .common import DocValue
 from .enum import VerifyMode, PassageDirection, EVENT_TYPES
-from .sdk import ZKSDK
+from .sdk import ZKSDKInterface
+
+if TYPE_CHECKING:
+    from .journal import EventJournal
+
+
+_PASSAGE_DIRECTIONS = {x.value: x for x in PassageDirection}
+_VERIFY_MODES = {x.value: x for x in VerifyMode}
+
+
+def _parse_time(value: str) -> datetime:
+    """Parse event time in fixed 'YYYY-MM-DD HH:MM:SS' format by
+    slicing, which is several times faster than `strptime`. Other
+    strings are passed to `strptime`
+    """
+    if len(value) == 19 and value[4] == value[7] == '-' and value[10] == ' ' \
+            and value[13] == value[16] == ':':
+        try:
+            return datetime(int(value[0:4]), int(value[5:7]), int(value[8:10]),
+                            int(value[11:13]), int(value[14:16]), int(value[17:19]))
+        except ValueError:
+            pass
+
+    return datetime.strptime(value, '%Y-%m-%d %H:%M:%S')
 
 
 class Event:
@@ -19,8 +64,17 @@ class Event:
     One realtime event occured on the device
     Since the device returns event as string we need to parse it to the
     structured view. This class does this.
+
+    Use `parse_batch` to parse many event strings at once, e.g.
+    a `get_rt_log` result.
+
+    Events are hashable. Hash is backed by `fingerprint`, which is
+    calculated from field values once on parsing. So events can be
+    put to sets, and unequal events are compared fast. Events should
+    not be changed after creating.
     """
-    __slots__ = (
+    #: Event field names
+    fields = (
         'time',
         'pin',
         'card',
@@ -29,20 +83,64 @@ class Event:
         'entry_exit',
         'verify_mode'
     )
+    __slots__ = fields + ('_fingerprint', )
 
     def __init__(self, s):
         """
         :param s: Event string to be parsed.
         """
-        parsed = self.parse(s)
+        self._fill(self.parse(s))
 
-        self.time = datetime.strptime(parsed[0], '%Y-%m-%d %H:%M:%S')  # type: datetime
+    def _fill(self, parsed: Sequence[str]):
+        self.time = _parse_time(parsed[0])  # type: datetime
         self.pin = parsed[1]   # type: str
         self.card = parsed[2]  # type: str
         self.door = int(parsed[3])  # type: int
-        self.event_type = EVENT_TYPES[int(parsed[4])]  # type: DocValue
-        self.entry_exit = PassageDirection(int(parsed[5]))  # type: PassageDirection
-        self.verify_mode = VerifyMode(int(parsed[6]))  # type: VerifyMode
+        # DocDict values are created once, so event types are shared
+        event_type = int(parsed[4])
+        self.event_type = EVENT_TYPES[event_type]  # type: DocValue
+
+        entry_exit = int(parsed[5])
+        value = _PASSAGE_DIRECTIONS.get(entry_exit)
+        self.entry_exit = value or PassageDirection(entry_exit)  # type: PassageDirection
+
+        verify_mode = int(parsed[6])
+        value = _VERIFY_MODES.get(verify_mode)
+        self.verify_mode = value or VerifyMode(verify_mode)  # type: VerifyMode
+
+        self._fingerprint = hash((self.time, self.pin, self.card, self.door,
+                                  event_type, entry_exit, verify_mode))
+
+    @classmethod
+    def parse_batch(cls, event_lines: Iterable[str]) -> List['Event']:
+        """
+        Parse many event strings at once
+        :param event_lines: event strings, e.g. `get_rt_log` result
+        :return: list of events in the same order
+        """
+        res = []
+        parse, new = cls.parse, cls.__new__
+        for line in event_lines:
+            event = new(cls)
+            event._fill(parse(line))
+            res.append(event)
+
+        return res
+
+    @property
+    def fingerprint(self) -> int:
+        """64-bit hash of event field values. It is equal for equal
+        events and is stable within a process. Events made not by
+        parsing, e.g. `LazyEvent`, calculate it on first access
+        """
+        try:
+            return self._fingerprint
+        except AttributeError:
+            self._fingerprint = hash((
+                self.time, self.pin, self.card, self.door,
+                int(self.event_type), self.entry_exit.value, self.verify_mode.value
+            ))
+            return self._fingerprint
 
     @property
     def description(self) -> str:
@@ -69,21 +167,1046 @@ class Event:
 
     def __eq__(self, other):
         if isinstance(other, Event):
-            return all(getattr(self, attr) == getattr(other, attr) for attr in self.__slots__)
+            # Fingerprints may collide, so fields are checked anyway
+            return self.fingerprint == other.fingerprint \
+                and _get_event_fields(self) == _get_event_fields(other)
         return False
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __hash__(self):
+        return self.fingerprint
+
     def __str__(self):
         return 'Event(' \
-               + ', '.join('{}={}'.format(k, getattr(self, k)) for k in self.__slots__) \
+               + ', '.join('{}={}'.format(k, getattr(self, k)) for k in Event.fields) \
                + ')'
 
     def __repr__(self):
         return self.__str__()
 
 
+_get_event_fields = operator.attrgetter(*Event.fields)
+
+_LAZY_DECODERS = {
+    'time': lambda parts: _parse_time(parts[0]),
+    'pin': lambda parts: parts[1],
+    'card': lambda parts: parts[2],
+    'door': lambda parts: int(parts[3]),
+    'event_type': lambda parts: EVENT_TYPES[int(parts[4])],
+    'entry_exit': lambda parts: (_PASSAGE_DIRECTIONS.get(int(parts[5]))
+                                 or PassageDirection(int(parts[5]))),
+    'verify_mode': lambda parts: _VERIFY_MODES.get(int(parts[6])) or VerifyMode(int(parts[6])),
+}
+
+
+class LazyEvent(Event):
+    """Event which keeps raw event string parts and decodes every
+    field on first access. Decoded value is cached. Useful when only
+    a few fields are used, e.g. for routing events by door and type.
+
+    Event string is split and checked for fields count in
+    constructor, but a wrong field value raises `ValueError` only
+    on access. Compared to `Event` objects by field values.
+    """
+    __slots__ = ('_parts', )
+
+    def _fill(self, parsed: Sequence[str]):
+        self._parts = parsed
+
+    def __getattr__(self, item):
+        # Is called only if a slot is not set yet
+        decode = _LAZY_DECODERS.get(item)
+        if decode is None:
+            raise AttributeError(
+                "'{}' object has no attribute '{}'".format(self.__class__.__name__, item)
+            )
+        value = decode(self._parts)
+        setattr(self, item, value)
+        return value
+
+
+class AdaptiveInterval:
+    """Polling interval which adapts to observed events rate. Once a
+    request returned events, the interval drops to `min_interval`, so
+    a busy device is polled often. Every request without events
+    multiplies the interval by `backoff` up to `max_interval`, so an
+    idle device is polled rarely.
+
+    Keep one object per device, since it holds device polling state.
+    Ex: `zk.events.poll(polling_interval=AdaptiveInterval(0.05, 5))`
+    """
+    def __init__(self,
+                 min_interval: float = 0.05,
+                 max_interval: float = 2,
+                 backoff: float = 2):
+        """
+        :param min_interval: interval in seconds after a request which
+         returned events
+        :param max_interval: maximum interval in seconds for an idle
+         device
+        :param backoff: multiplier which is applied to the interval
+         after every request without events
+        """
+        if not 0 <= min_interval <= max_interval:
+            raise ValueError('Intervals must satisfy 0 <= min_interval <= max_interval')
+        if backoff < 1:
+            raise ValueError('backoff must be greater than or equal to 1')
+
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.current = min_interval
+
+    def update(self, count: int) -> float:
+        """
+        Calculate the next interval after a request
+        :param count: count of events returned by the request
+        :return: interval in seconds to wait before the next request
+        """
+        if count:
+            self.current = self.min_interval
+        else:
+            # Start from a small nonzero value if min_interval is 0
+            self.current = min(max(self.current, 0.001) * self.backoff, self.max_interval)
+        return self.current
+
+    def reset(self) -> None:
+        """Set interval to `min_interval`"""
+        self.current = self.min_interval
+
+    def copy(self) -> 'AdaptiveInterval':
+        """Return new object with the same settings and initial state"""
+        return self.__class__(self.min_interval, self.max_interval, self.backoff)
+
+    def __repr__(self):
+        return '{}(min_interval={}, max_interval={}, backoff={})'.format(
+            self.__class__.__name__, self.min_interval, self.max_interval, self.backoff
+        )
+
+
+class RetentionPolicy:
+    """Limits of event log by events age, estimated memory size and
+    count. When any limit is exceeded, the oldest events are evicted
+    by one batch after every request to a device in `refresh()`.
+
+    Age is counted back from the newest event time, not the current
+    time, since device clock may differ from the local one. Events are
+    evicted from log beginning, so an old event which came out of time
+    order stays until all events before it are evicted.
+
+    Policy has no state, so one object can be used by many logs.
+    Ex: `ZKAccess(connstr, log_retention=RetentionPolicy(max_age=timedelta(hours=24)))`
+    """
+    def __init__(self,
+                 max_age: Optional[Union[timedelta, float]] = None,
+                 max_bytes: Optional[int] = None,
+                 max_count: Optional[int] = None):
+        """
+        :param max_age: maximum age of events as timedelta or seconds
+        :param max_bytes: maximum estimated memory size of log and its
+         indexes in bytes, see `EventLog.nbytes`
+        :param max_count: maximum count of events
+        """
+        if max_age is not None and not isinstance(max_age, timedelta):
+            max_age = timedelta(seconds=max_age)
+        if max_age is not None and max_age < timedelta(0):
+            raise ValueError('max_age must be non-negative')
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError('max_bytes must be non-negative')
+        if max_count is not None and max_count < 0:
+            raise ValueError('max_count must be non-negative')
+
+        self.max_age = max_age  # type: Optional[timedelta]
+        self.max_bytes = max_bytes
+        self.max_count = max_count
+
+    def excess(self,
+               events: Iterable[Event],
+               length: int,
+               nbytes: int,
+               newest_time: Optional[datetime]) -> int:
+        """
+        Calculate count of the oldest events which must be evicted
+        from log
+        :param events: log events from the oldest to the newest
+        :param length: log length
+        :param nbytes: estimated memory size of log
+        :param newest_time: time of the newest event in log
+        :return: count of events to evict
+        """
+        count = 0
+        if self.max_count is not None:
+            count = length - self.max_count
+        if self.max_bytes is not None and nbytes > self.max_bytes and length:
+            count = max(count, math.ceil((nbytes - self.max_bytes) * length / nbytes))
+        if self.max_age is not None and newest_time is not None:
+            cutoff = newest_time - self.max_age
+            old = itertools.takewhile(lambda x: x.time < cutoff, events)
+            count = max(count, sum(1 for _ in old))
+
+        return min(max(count, 0), length)
+
+    def __repr__(self):
+        return '{}(max_age={!r}, max_bytes={}, max_count={})'.format(
+            self.__class__.__name__, self.max_age, self.max_bytes, self.max_count
+        )
+
+
+class DedupWindow:
+    """Filter of repeated events, e.g. events returned by a device
+    again after reconnect. It remembers the last `size` distinct
+    events and drops events equal to them. Events are looked up by
+    hash, so filtering takes O(1) per event.
+
+    Keep one object per log, since it holds filtering state.
+    Ex: `ZKAccess(connstr, log_dedup=DedupWindow(1024))`
+    """
+    def __init__(self, size: int = 1024):
+        """
+        :param size: count of the latest distinct events to remember
+        """
+        if size < 1:
+            raise ValueError('size must be positive')
+
+        self.size = size
+        self._events = deque()  # type: deque
+        self._seen = set()
+
+    def add(self, event: Event) -> bool:
+        """
+        Remember an event
+        :param event: event object
+        :return: True if event is new, False if it is a duplicate
+        """
+        if event in self._seen:
+            return False
+
+        self._events.append(event)
+        self._seen.add(event)
+        if len(self._events) > self.size:
+            self._seen.discard(self._events.popleft())
+        return True
+
+    def filter(self, events: Iterable[Event]) -> List[Event]:
+        """
+        Remember events and return new ones
+        :param events: events in order of appearance
+        :return: events which are not duplicates
+        """
+        return [x for x in events if self.add(x)]
+
+    def clear(self) -> None:
+        """Forget all events"""
+        self._events.clear()
+        self._seen.clear()
+
+    def __contains__(self, event: Event) -> bool:
+        return event in self._seen
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+    def __repr__(self):
+        return '{}(size={})'.format(self.__class__.__name__, self.size)
+
+
+_EPOCH = datetime(1970, 1, 1)
+_SECONDS = tuple(timedelta(0, x) for x in range(60))
+
+
+def _ceil_seconds(value: datetime) -> int:
+    """Return seconds since epoch rounded up, so that comparison
+    with integer event times works the same as with datetime
+    """
+    delta = value - _EPOCH
+    return delta.days * 86400 + delta.seconds + (1 if delta.microseconds else 0)
+
+
+class Between:
+    """Filter value which matches values in half-open range
+    `[start, stop)`. Any bound may be omitted. Ex:
+    `log.only(time=Between(datetime(2020, 1, 1), datetime(2020, 1, 2)))`
+    """
+    __slots__ = ('start', 'stop')
+
+    def __init__(self, start: Any = None, stop: Any = None):
+        """
+        :param start: the least matched value (included) or None
+        :param stop: the upper bound (excluded) or None
+        """
+        self.start = start
+        self.stop = stop
+
+    def __contains__(self, item) -> bool:
+        return (self.start is None or item >= self.start) \
+            and (self.stop is None or item < self.stop)
+
+    def __eq__(self, other):
+        if isinstance(other, Between):
+            return (self.start, self.stop) == (other.start, other.stop)
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash((Between, self.start, self.stop))
+
+    def __repr__(self):
+        return 'Between({!r}, {!r})'.format(self.start, self.stop)
+
+
+def _is_plain_value(value: Any) -> bool:
+    """Return True if filter value is compared by equality, i.e. it is
+    not a `Between` or a predicate function
+    """
+    if isinstance(value, Between):
+        return False
+    # DocValue proxy is callable, but it is a plain value
+    return not callable(value) or isinstance(value, (DocValue, type))
+
+
+def _compile_values(values: Iterable) -> Callable[[Any], bool]:
+    """
+    Make a function which checks if a field value is matched by any
+    of filter values. Filter value may be a plain value, `Between`
+    object or a function which accepts field value and returns bool
+    :param values: filter values
+    :return: function which accepts field value
+    """
+    plain, others = [], []
+    for value in values:
+        (plain if _is_plain_value(value) else others).append(value)
+
+    if not others:
+        if len(plain) == 1:
+            value = plain[0]
+            return lambda x: x == value
+        return frozenset(plain).__contains__
+
+    if not plain and len(others) == 1:
+        value = others[0]
+        return value.__contains__ if isinstance(value, Between) else value
+
+    plain = frozenset(plain)
+    ranges = tuple(x for x in others if isinstance(x, Between))
+    funcs = tuple(x for x in others if not isinstance(x, Between))
+
+    def check(x):
+        return x in plain or any(x in r for r in ranges) or any(f(x) for f in funcs)
+
+    return check
+
+
+def _compile_filters(filters: dict) -> Optional[Callable[[Event], bool]]:
+    """
+    Make a function which checks if an event is matched by all given
+    filters, see `EventLog.only`
+    :param filters: filters dict
+    :return: function which accepts an event or None if filters are
+     empty
+    """
+    checks = [(operator.attrgetter(field), _compile_values(values))
+              for field, values in filters.items()]
+    if not checks:
+        return None
+
+    return _chain_checks(checks)
+
+
+def _chain_checks(checks: list) -> Callable[[Event], bool]:
+    # Up to 3 checks are inlined to a single function, the rest are
+    #  chained. This avoids a generator per event
+    if len(checks) == 1:
+        (getter, check), = checks
+        return lambda event: check(getter(event))
+    if len(checks) == 2:
+        (getter1, check1), (getter2, check2) = checks
+        return lambda event: check1(getter1(event)) and check2(getter2(event))
+
+    (getter1, check1), (getter2, check2), (getter3, check3) = checks[:3]
+    if len(checks) == 3:
+        return lambda event: check1(getter1(event)) and check2(getter2(event)) \
+            and check3(getter3(event))
+
+    rest = _chain_checks(checks[3:])
+    return lambda event: check1(getter1(event)) and check2(getter2(event)) \
+        and check3(getter3(event)) and rest(event)
+
+
+def _string_nbytes(value: str) -> int:
+    """Estimate memory taken by a string in table of unique strings
+    including list slot, dict entry and reference count
+    """
+    return sys.getsizeof(value) + 44
+
+
+class ColumnarEventStorage:
+    """Compact storage of events which can be used by `EventLog`
+    instead of deque. Every event field is kept in its own typed
+    array: time as seconds since epoch, door, event type, entry/exit
+    and verify mode as small integers, pin and card as indexes in
+    table of unique strings. An event takes about 20 bytes instead of
+    several hundreds for `Event` object. Strings which are not
+    referred by events anymore are dropped from table along with
+    removed events.
+
+    Filtering by field values and time runs column by column over
+    arrays, `Event` objects are made only for matched entries. Byte
+    columns such as door or event type are filtered without Python
+    loop. Making events takes most of filtering time, so reading many
+    events is several times slower than from deque, whose events
+    are already made.
+
+    Supports deque methods used by `EventLog`. Entries are always
+    returned as `Event` objects.
+    """
+    # Field name, array typecode
+    columns = (
+        ('time', 'q'),
+        ('pin', 'I'),
+        ('card', 'I'),
+        ('door', 'B'),
+        ('event_type', 'B'),
+        ('entry_exit', 'B'),
+        ('verify_mode', 'B'),
+    )
+
+    def __init__(self, iterable: Iterable[Event] = (), maxlen: Optional[int] = None):
+        """
+        :param iterable: initial events
+        :param maxlen: maximum count of events, the oldest events are
+         discarded when it is exceeded. Not limited by default
+        """
+        self._maxlen = maxlen
+        self._columns = {name: array(typecode) for name, typecode in self.columns}
+        self._strings = []  # type: List[str]
+        self._string_indexes = {}  # type: dict
+        self._string_refs = array('I')  # Count of pins and cards referring a string
+        self._strings_nbytes = 0  # Size of referred strings
+        self._start = 0  # Index of the first entry in arrays
+        self._version = 0  # Is changed on every removal
+        #: Count of events appended since creation or clearing
+        self.appended = 0
+        self.extend(iterable)
+
+    @property
+    def maxlen(self) -> Optional[int]:
+        """Maximum count of events or None if not limited"""
+        return self._maxlen
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory size taken by events and their unique pin
+        and card strings in bytes
+        """
+        return sum(x.itemsize for x in self._columns.values()) * len(self) + self._strings_nbytes
+
+    def append(self, event: Event) -> None:
+        """Add an event to the end"""
+        cols = self._columns
+        cols['time'].append(_ceil_seconds(event.time))
+        cols['pin'].append(self._intern(event.pin))
+        cols['card'].append(self._intern(event.card))
+        cols['door'].append(event.door)
+        cols['event_type'].append(int(event.event_type))
+        cols['entry_exit'].append(event.entry_exit.value)
+        cols['verify_mode'].append(event.verify_mode.value)
+        self.appended += 1
+
+        if self._maxlen is not None and len(self) > self._maxlen:
+            self._release(self._start, self._start + 1)
+            self._start += 1
+            self._version += 1
+            self._compact()
+
+    def extend(self, events: Iterable[Event]) -> None:
+        """Add events to the end"""
+        for event in events:
+            self.append(event)
+
+    def discard(self, count: int) -> None:
+        """Remove given count of the oldest events"""
+        count = min(count, len(self))
+        if count > 0:
+            self._release(self._start, self._start + count)
+            self._start += count
+            self._version += 1
+            self._compact()
+
+    def clear(self) -> None:
+        """Remove all events"""
+        for col in self._columns.values():
+            del col[:]
+        self._strings.clear()
+        self._string_indexes.clear()
+        del self._string_refs[:]
+        self._strings_nbytes = 0
+        self._start = 0
+        self._version += 1
+        self.appended = 0
+
+    def select(self,
+               filters: Optional[dict] = None,
+               from_time: Optional[datetime] = None,
+               to_time: Optional[datetime] = None,
+               reverse: bool = False,
+               start: int = 0,
+               stop: Optional[int] = None) -> Iterator[Event]:
+        """
+        Return events which field values are contained in filters
+        and time is in given range
+        :param filters: dict with `Event` field names as keys and sets
+         of values as values, see `EventLog.only`
+        :param from_time: the earliest time (included)
+        :param to_time: the latest time (excluded)
+        :param reverse: return events from newest to oldest
+        :param start: look only at events starting from this position
+        :param stop: look only at events before this position
+        :return: iterator over matched events
+        """
+        indexes = self._select_indexes(filters, from_time, to_time, start, stop)
+        if reverse:
+            indexes = reversed(indexes)
+        return self._iter_events(indexes)
+
+    def count(self,
+              filters: Optional[dict] = None,
+              from_time: Optional[datetime] = None,
+              to_time: Optional[datetime] = None,
+              start: int = 0,
+              stop: Optional[int] = None) -> int:
+        """
+        Return count of events which would be returned by `select`
+        with the same parameters. `Event` objects are not made
+        :return: count of matched events
+        """
+        return len(self._select_indexes(filters, from_time, to_time, start, stop))
+
+    def _select_indexes(self,
+                        filters: Optional[dict],
+                        from_time: Optional[datetime],
+                        to_time: Optional[datetime],
+                        start: int = 0,
+                        stop: Optional[int] = None) -> Sequence[int]:
+        cols = self._columns
+        start, stop, _ = slice(start, stop).indices(len(self))
+        start, stop = self._start + start, self._start + stop
+        indexes = range(start, stop)  # type: Sequence[int]
+
+        # Byte columns are filtered by plain values without Python
+        #  loop: every column is translated to a mask of 0 and 1 bytes,
+        #  masks are intersected as big integers
+        mask = None
+        filters = dict(filters or {})
+        for field, values in list(filters.items()):
+            if field not in cols:
+                raise AttributeError("'Event' object has no attribute '{}'".format(field))
+            col = cols[field]
+            if col.typecode == 'B' and all(_is_plain_value(x) for x in values):
+                values = self._column_values(field, values)
+                table = bytes(x in values for x in range(256))
+                col_mask = int.from_bytes(col[start:stop].tobytes().translate(table), 'little')
+                mask = col_mask if mask is None else mask & col_mask
+                del filters[field]
+        if mask is not None:
+            indexes = list(itertools.compress(indexes, mask.to_bytes(stop - start, 'little')))
+
+        if from_time is not None or to_time is not None:
+            ts = cols['time']
+            low = -2 ** 63 if from_time is None else _ceil_seconds(from_time)
+            high = 2 ** 63 if to_time is None else _ceil_seconds(to_time)
+            indexes = [i for i in indexes if low <= ts[i] < high]
+
+        for field, values in filters.items():
+            col = cols[field]
+            if all(_is_plain_value(x) for x in values):
+                values = self._column_values(field, values)
+                indexes = [i for i in indexes if col[i] in values]
+            else:
+                check = self._column_check(field, values)
+                indexes = [i for i in indexes if check(col[i])]
+
+        return indexes
+
+    def _column_values(self, field: str, values: Iterable) -> set:
+        """Convert filter values to values stored in a column"""
+        if field == 'time':
+            return {_ceil_seconds(x) for x in values
+                    if isinstance(x, datetime) and x.microsecond == 0}
+        if field in ('pin', 'card'):
+            return {self._string_indexes[x] for x in values if x in self._string_indexes}
+        if field == 'entry_exit':
+            return {x.value for x in values if isinstance(x, PassageDirection)}
+        if field == 'verify_mode':
+            return {x.value for x in values if isinstance(x, VerifyMode)}
+        return {int(x) for x in values if isinstance(x, int)}
+
+    def _column_check(self, field: str, values: Iterable) -> Callable[[int], bool]:
+        """Make a function which checks a value stored in a column by
+        filter values containing ranges or functions
+        """
+        values = list(values)
+        if field == 'time' and all(_is_plain_value(x) or isinstance(x, Between) for x in values):
+            # Compare time ranges with stored integers directly
+            converted = list(self._column_values(field, [x for x in values if _is_plain_value(x)]))
+            converted.extend(
+                Between(None if x.start is None else _ceil_seconds(x.start),
+                        None if x.stop is None else _ceil_seconds(x.stop))
+                for x in values if isinstance(x, Between)
+            )
+            return _compile_values(converted)
+
+        check = _compile_values(values)
+        decode = {
+            'time': lambda raw: _EPOCH + timedelta(0, raw),
+            'pin': self._strings.__getitem__,
+            'card': self._strings.__getitem__,
+            'event_type': EVENT_TYPES.__getitem__,
+            'entry_exit': _PASSAGE_DIRECTIONS.__getitem__,
+            'verify_mode': _VERIFY_MODES.__getitem__,
+        }.get(field, int)
+        if field == 'time':
+            return lambda raw: check(decode(raw))
+
+        # Other columns have few distinct values, so check each once
+        cache = {}
+
+        def cached_check(raw):
+            res = cache.get(raw)
+            if res is None:
+                res = cache[raw] = bool(check(decode(raw)))
+            return res
+
+        return cached_check
+
+    def _iter_events(self, indexes: Iterable[int]) -> Iterator[Event]:
+        # The same as `_make_event` with lookups moved out of loop,
+        #  since making events takes most of filtering time
+        version = self._version
+        strings = self._strings
+        times, pins, cards, doors, event_types, entry_exits, verify_modes = (
+            self._columns[name] for name, _ in self.columns
+        )
+        new, epoch, seconds = Event.__new__, _EPOCH, _SECONDS
+        minutes = {}  # type: Dict[int, datetime]
+        for i in indexes:
+            if self._version != version:
+                raise RuntimeError('Storage mutated during iteration')
+            event = new(Event)
+            # Decoding time is the slowest part, so events of the same
+            #  minute share minute start
+            minute, second = divmod(times[i], 60)
+            start = minutes.get(minute)
+            if start is None:
+                if len(minutes) >= 1024:
+                    minutes.clear()
+                start = minutes[minute] = epoch + timedelta(0, minute * 60)
+            event.time = start + seconds[second]
+            event.pin = strings[pins[i]]
+            event.card = strings[cards[i]]
+            event.door = doors[i]
+            event.event_type = EVENT_TYPES[event_types[i]]
+            event.entry_exit = _PASSAGE_DIRECTIONS[entry_exits[i]]
+            event.verify_mode = _VERIFY_MODES[verify_modes[i]]
+            yield event
+
+    def _make_event(self, i: int) -> Event:
+        cols, strings = self._columns, self._strings
+        event = Event.__new__(Event)
+        event.time = _EPOCH + timedelta(0, cols['time'][i])
+        event.pin = strings[cols['pin'][i]]
+        event.card = strings[cols['card'][i]]
+        event.door = cols['door'][i]
+        event.event_type = EVENT_TYPES[cols['event_type'][i]]
+        event.entry_exit = _PASSAGE_DIRECTIONS[cols['entry_exit'][i]]
+        event.verify_mode = _VERIFY_MODES[cols['verify_mode'][i]]
+        return event
+
+    def _intern(self, value: str) -> int:
+        index = self._string_indexes.get(value)
+        if index is None:
+            index = self._string_indexes[value] = len(self._strings)
+            self._strings.append(value)
+            self._string_refs.append(0)
+        if not self._string_refs[index]:
+            self._strings_nbytes += _string_nbytes(value)
+        self._string_refs[index] += 1
+        return index
+
+    def _release(self, start: int, stop: int) -> None:
+        """Decrease reference counts of strings of removed entries"""
+        refs, strings = self._string_refs, self._strings
+        for col in (self._columns['pin'], self._columns['card']):
+            for i in col[start:stop]:
+                refs[i] -= 1
+                if not refs[i]:
+                    self._strings_nbytes -= _string_nbytes(strings[i])
+
+    def _compact(self):
+        # Remove discarded entries from arrays beginning when they
+        #  take a half of arrays, so removal is amortized O(1)
+        if self._start >= 1024 and self._start * 2 >= len(self._columns['time']):
+            for col in self._columns.values():
+                del col[:self._start]
+            self._start = 0
+            self._compact_strings()
+
+    def _compact_strings(self):
+        """Drop strings which are not referred by entries and remap
+        pin and card columns to new string indexes
+        """
+        refs = self._string_refs
+        used = [i for i, x in enumerate(refs) if x]
+        if len(used) == len(refs):
+            return
+
+        remap = {old: new for new, old in enumerate(used)}
+        for name in ('pin', 'card'):
+            col = self._columns[name]
+            self._columns[name] = array(col.typecode, map(remap.__getitem__, col))
+        self._strings[:] = [self._strings[i] for i in used]
+        self._string_indexes.clear()
+        self._string_indexes.update((x, i) for i, x in enumerate(self._strings))
+        self._string_refs = array('I', (refs[i] for i in used))
+
+    def __len__(self) -> int:
+        return len(self._columns['time']) - self._start
+
+    def __iter__(self) -> Iterator[Event]:
+        return self.select()
+
+    def __reversed__(self) -> Iterator[Event]:
+        return self.select(reverse=True)
+
+    def __getitem__(self, item: int) -> Event:
+        length = len(self)
+        if item < 0:
+            item += length
+        if not 0 <= item < length:
+            raise IndexError('Index is out of range')
+        return self._make_event(self._start + item)
+
+    def __str__(self):
+        return 'ColumnarEventStorage[{}]'.format(len(self))
+
+    def __repr__(self):
+        return self.__str__()
+
+
+def _event_nbytes(event: Event) -> int:
+    """Estimate memory size taken by event object and its reference in
+    deque. Enum members and small ints are shared and not counted
+    """
+    parts = getattr(event, '_parts', None)
+    if parts is not None:
+        values = list(parts) + [parts]  # type: list
+    else:
+        values = [event.time, event.pin, event.card]
+    fingerprint = getattr(event, '_fingerprint', None)
+    if fingerprint is not None:
+        values.append(fingerprint)
+    return sys.getsizeof(event) + sum(map(sys.getsizeof, values)) + 8
+
+
+class _LogView:
+    """Materialized view of event log, i.e. sequence numbers of events
+    matched by filters of a log made by `only()`. Deque log events are
+    kept as well, columnar storage makes them by position. View is
+    updated as events are appended and discarded, so its length and
+    access by position take O(1)
+    """
+    __slots__ = ('predicate', 'seqs', 'events', 'head')
+
+    def __init__(self, predicate: Callable[[Event], bool], keep_events: bool):
+        self.predicate = predicate
+        self.seqs = array('q')
+        self.events = [] if keep_events else None  # type: Optional[List[Event]]
+        self.head = 0  # Index of the first actual item
+
+    def append(self, seq: int, event: Event) -> None:
+        self.seqs.append(seq)
+        if self.events is not None:
+            self.events.append(event)
+
+    def prune(self, first_seq: int) -> None:
+        """Forget events discarded from log beginning"""
+        seqs = self.seqs
+        self.head = bisect_left(seqs, first_seq, self.head)
+        if self.head >= 1024 and self.head * 2 >= len(seqs):
+            del seqs[:self.head]
+            if self.events is not None:
+                del self.events[:self.head]
+            self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.seqs) - self.head
+
+
+def _view_key(filters: dict) -> frozenset:
+    """Make hashable key of filters dict"""
+    return frozenset((field, frozenset(values)) for field, values in filters.items())
+
+
+class _LogIndex:
+    """Indexes of event log which are shared by a log and its views
+    made by `only()`.
+
+    Time index makes time range queries O(log n + k) instead of full
+    scan. Events come from a device almost ordered by time. Events
+    which time is not less than time of previous ones are kept in
+    sorted lists and are looked up by bisect. The rest, e.g. events
+    appeared after device clock change, are kept aside and are
+    checked one by one.
+
+    Hash indexes on given fields keep events lists by field values,
+    so filtering by these fields takes time proportional to result.
+
+    Filtered logs are materialized to views on first access and are
+    maintained on every append, so they are not scanned again.
+
+    Events are identified by sequence numbers, i.e. count of events
+    appended to log before them. Their positions in log are
+    calculated from the count of events removed from its beginning.
+    """
+    #: Fields which hash index can be built for
+    hashable_fields = ('door', 'event_type', 'pin', 'card')
+    #: Max count of materialized views, the least recently used
+    #: views are dropped
+    max_views = 64
+
+    def __init__(self, fields: Iterable[str] = ()):
+        """
+        :param fields: fields to build hash indexes for
+        """
+        fields = tuple(fields)
+        wrong_fields = set(fields) - set(self.hashable_fields)
+        if wrong_fields:
+            raise ValueError('Unable to index fields: {}'.format(', '.join(sorted(wrong_fields))))
+
+        self.fields = fields
+        self.clear()
+
+    def clear(self):
+        #: Count of events added to index
+        self.appended = 0
+        #: The last added event
+        self.last = None  # type: Optional[Event]
+        self._times = array('q')  # Seconds since epoch
+        self._seqs = array('q')
+        self._head = 0  # Index of the first actual item in arrays
+        self._unordered = deque()  # (seq, time) of events out of order
+        # {field: {value: (seqs deque, events deque)}}
+        self._postings = {field: {} for field in self.fields}
+        self._pruned = 0  # Value of `appended` on the last postings pruning
+        self._views = OrderedDict()  # type: OrderedDict[frozenset, _LogView]
+
+    def add(self, events: Iterable[Event], length: int) -> None:
+        """
+        Add events appended to log
+        :param events: appended events
+        :param length: log length after appending
+        :return:
+        """
+        times, seqs, unordered = self._times, self._seqs, self._unordered
+        postings = self._postings.items()
+        views = list(self._views.values())
+        for event in events:
+            seq = self.appended
+            event_time = _ceil_seconds(event.time)
+            if self._head < len(times) and event_time < times[-1]:
+                unordered.append((seq, event_time))
+            else:
+                times.append(event_time)
+                seqs.append(seq)
+
+            for field, values in postings:
+                value = getattr(event, field)
+                posting = values.get(value)
+                if posting is None:
+                    posting = values[value] = (deque(), deque())
+                posting[0].append(seq)
+                posting[1].append(event)
+
+            for view in views:
+                if view.predicate(event):
+                    view.append(seq, event)
+
+            self.appended += 1
+            self.last = event
+
+        self.discard(length)
+
+    def discard(self, length: int) -> None:
+        """
+        Forget events discarded from log beginning
+        :param length: current log length
+        :return:
+        """
+        times, seqs, unordered = self._times, self._seqs, self._unordered
+        first_seq = self.appended - length
+        while unordered and unordered[0][0] < first_seq:
+            unordered.popleft()
+        self._head = bisect_left(seqs, first_seq, self._head)
+        if self._head >= 1024 and self._head * 2 >= len(seqs):
+            del times[:self._head], seqs[:self._head]
+            self._head = 0
+        for view in self._views.values():
+            view.prune(first_seq)
+
+        # Walking through all postings is amortized by the count of
+        #  events added since previous pruning
+        if self._postings and self.appended - self._pruned >= max(length, 1024):
+            for values in self._postings.values():
+                for value in list(values.keys()):
+                    if not self._prune(values[value], first_seq):
+                        del values[value]
+            self._pruned = self.appended
+
+    def nbytes(self, length: int) -> int:
+        """
+        Estimate memory size taken by index in bytes
+        :param length: current log length
+        :return: size in bytes
+        """
+        size = (len(self._seqs) - self._head) * 16 + len(self._unordered) * 64
+        # Posting entry is a deque item with int and event references
+        size += length * len(self._postings) * 44
+        for view in self._views.values():
+            size += len(view) * (8 if view.events is None else 16)
+        return size
+
+    def is_actual(self, data: Union[deque, 'ColumnarEventStorage']) -> bool:
+        """Check if index matches log data, it may be changed
+        bypassing `EventLog`
+        """
+        if isinstance(data, ColumnarEventStorage):
+            return data.appended == self.appended
+        length = len(data)
+        return length <= self.appended and (length == 0 or data[-1] is self.last)
+
+    def find_time(self,
+                  from_time: Optional[datetime],
+                  to_time: Optional[datetime],
+                  length: int) -> Optional[slice]:
+        """
+        Find span of log positions which contains all events with
+        time in given range. Events inside span should be checked
+        anyway, since events out of order may get into it
+        :param from_time: the earliest time (included)
+        :param to_time: the latest time (excluded)
+        :param length: current log length
+        :return: slice of log positions or None if there is no
+         matched events
+        """
+        times, seqs = self._times, self._seqs
+        first_seq = self.appended - length
+        # Event times have no fraction of second, so rounding bounds
+        #  up keeps comparison results
+        low = None if from_time is None else _ceil_seconds(from_time)
+        high = None if to_time is None else _ceil_seconds(to_time)
+        head = bisect_left(seqs, first_seq, self._head)
+        lo = head if low is None else bisect_left(times, low, head)
+        hi = len(times) if high is None else bisect_left(times, high, lo)
+
+        matched = [seq for seq, t in self._unordered
+                   if seq >= first_seq
+                   and (low is None or t >= low) and (high is None or t < high)]
+        if lo < hi:
+            matched.extend((seqs[lo], seqs[hi - 1]))
+        if not matched:
+            return None
+
+        return slice(min(matched) - first_seq, max(matched) - first_seq + 1)
+
+    def view(self,
+             key: frozenset,
+             filters: dict,
+             predicate: Callable[[Event], bool],
+             data: Union[deque, 'ColumnarEventStorage']) -> _LogView:
+        """
+        Return materialized view of log matched by filters. It is made
+        on the first request and then is maintained by `add()`. Index
+        must be actual for given log data
+        :param key: filters key made by `_view_key`
+        :param filters: filters dict, see `EventLog.only`
+        :param predicate: compiled filters
+        :param data: log data
+        :return: view object
+        """
+        views = self._views
+        view = views.get(key)
+        if view is not None:
+            views.move_to_end(key)
+            return view
+
+        length = len(data)
+        first_seq = self.appended - length
+        if isinstance(data, ColumnarEventStorage):
+            view = _LogView(predicate, keep_events=False)
+            offset = first_seq - data._start
+            view.seqs.extend(i + offset for i in data._select_indexes(filters, None, None))
+        else:
+            view = _LogView(predicate, keep_events=True)
+            matched = self.select(filters, length, predicate)
+            if matched is None:
+                flags = list(map(predicate, data))
+                view.seqs.extend(itertools.compress(itertools.count(first_seq), flags))
+                view.events.extend(itertools.compress(data, flags))
+            else:
+                for seq, event in matched:
+                    view.append(seq, event)
+
+        views[key] = view
+        if len(views) > self.max_views:
+            views.popitem(last=False)
+        return view
+
+    def select(self,
+               filters: dict,
+               length: int,
+               predicate: Callable[[Event], bool]) -> Optional[List[tuple]]:
+        """
+        Find events matched by filters using hash indexes. Events
+        are looked up by the indexed field with the least count of
+        candidates, then candidates are checked by predicate
+        :param filters: filters dict, see `EventLog.only`
+        :param length: current log length
+        :param predicate: compiled filters
+        :return: (seq, event) pairs of matched events in log order or
+         None if no filter field is indexed
+        """
+        first_seq = self.appended - length
+        best_postings, best_size = None, None
+        for field, values in filters.items():
+            # Ranges and functions can't be looked up by hash
+            if field not in self._postings or not all(_is_plain_value(x) for x in values):
+                continue
+            postings = [self._postings[field].get(value) for value in values]
+            postings = [x for x in postings if x is not None and self._prune(x, first_seq)]
+            size = sum(len(x[0]) for x in postings)
+            if best_size is None or size < best_size:
+                best_postings, best_size = postings, size
+
+        if best_postings is None:
+            return None
+
+        candidates = heapq.merge(*(zip(seqs, events) for seqs, events in best_postings),
+                                 key=lambda x: x[0])
+        return [x for x in candidates if predicate(x[1])]
+
+    @staticmethod
+    def _prune(posting: tuple, first_seq: int) -> int:
+        """Remove discarded events from posting, return its length"""
+        seqs, events = posting
+        while seqs and seqs[0] < first_seq:
+            seqs.popleft()
+            events.popleft()
+        return len(seqs)
+
+
 class EventLog:
     """Log of realtime events
 
@@ -96,35 +1219,117 @@ class EventLog:
     But you can use `poll()` method which awaits new events from
     a device and return them if any.
 
-    Log is implemented at top of deque structure, so accessing by
-    index and filtering could be slow.
+    Log is implemented at top of deque structure. For large logs pass
+    `columnar=True` to keep events in `ColumnarEventStorage`, which
+    takes about 10 times less memory. Reading events from it is
+    slower, since `Event` objects are made on every access.
+
+    Logs made by `only()` keep positions of matched events, which are
+    updated on `refresh()`. So their length and access by index,
+    including negative one, take O(1). Positions are kept for
+    `_LogIndex.max_views` recently used filters.
+
+    Events are parsed to `event_class` objects, use `LazyEvent` to
+    decode only fields which are accessed.
+
+    Pass `index_fields` to keep hash indexes on these fields, then
+    filtering by them takes time proportional to result size instead
+    of log size. Indexes are kept only for deque storage.
+
+    Besides `maxlen`, log size can be limited by events age and
+    memory size with `RetentionPolicy` passed as `retention`.
+
+    Pass `DedupWindow` as `dedup` to skip events which a device
+    returned again, e.g. after reconnect.
+
+    If `EventJournal` is passed as `journal`, pulled events are also
+    written to it. Then time queries (`after_time()` etc.) are
+    answered from journal, so they return events evicted from memory
+    and events written by previous runs as well.
     """
     def __init__(self,
-                 sdk: ZKSDK,
+                 sdk: ZKSDKInterface,
                  buffer_size: int,
                  maxlen: Optional[int] = None,
                  only_filters: Optional[dict] = None,
-                 _data: Optional[deque] = None):
+                 _data: Optional[Union[deque, ColumnarEventStorage]] = None,
+                 event_class: type(Event) = Event,
+                 columnar: bool = False,
+                 index_fields: Iterable[str] = (),
+                 retention: Optional[RetentionPolicy] = None,
+                 journal: Optional['EventJournal'] = None,
+                 dedup: Optional[DedupWindow] = None,
+                 _index: Optional[_LogIndex] = None):
         self.buffer_size = buffer_size
-        self.data = _data if _data is not None else deque(maxlen=maxlen)
-        self.only_filters = only_filters or {}
+        if _data is not None:
+            self.data = _data
+        elif columnar:
+            self.data = ColumnarEventStorage(maxlen=maxlen)
+        else:
+            self.data = deque(maxlen=maxlen)
+        self.only_filters = only_filters or {}  # type: dict
+        self.event_class = event_class
+        self.retention = retention
+        self.journal = journal
+        self.dedup = dedup
         self._sdk = sdk
+        # Is shared between a log and its views made by `only()`.
+        #  Columnar storage filters by fields itself
+        if _index is None:
+            _index = _LogIndex(() if isinstance(self.data, ColumnarEventStorage) else index_fields)
+        self._index = _index
 
-    def refresh(self) -> int:
+    @property
+    def nbytes(self) -> int:
+        """Estimated memory size of log data and its indexes in bytes.
+        Size of deque events is estimated by the last event
+        """
+        data, length = self.data, len(self.data)
+        if isinstance(data, ColumnarEventStorage):
+            size = data.nbytes
+        else:
+            size = length * _event_nbytes(data[-1]) if length else 0
+        return size + self._index.nbytes(length)
+
+    @property
+    def only_filters(self) -> dict:
+        """Filters of this log, see `only()`. Filters are compiled to
+        a predicate when they are set
+        """
+        return self._only_filters
+
+    @only_filters.setter
+    def only_filters(self, value: dict):
+        self._only_filters = value
+        self._predicate = _compile_filters(value)
+        self._view_key = _view_key(value)
+
+    def refresh(self) -> List[Event]:
         """Make a request to a device for new records and append to the
         end if any.
-        :return: count of records which was added
+        :return: appended records which match log filters
         """
-        # ZKAccess always returns single event with code 255
-        # on every log query if no other events occured. So, skip it
-        new_events = [e for e in self._pull_events() if e.event_type != 255]
-        count = 0
-        while new_events:
-            self.data.extend(new_events)
-            count += sum(1 for _ in self._filtered_events(new_events))
+        res = []  # type: List[Event]
+        index_actual = self._index.is_actual(self.data)
+        while True:
+            # ZKAccess always returns single event with code 255
+            # on every log query if no other events occured. So, skip it
             new_events = [e for e in self._pull_events() if e.event_type != 255]
+            if not new_events:
+                return res
+            if self.dedup is not None:
+                new_events = self.dedup.filter(new_events)
+                if not new_events:
+                    continue
 
-        return count
+            if self.journal is not None:
+                self.journal.append(new_events)
+            self.data.extend(new_events)
+            if index_actual:
+                self._index.add(new_events, len(self.data))
+            if self.retention is not None:
+                self._evict(max(e.time for e in new_events), index_actual)
+            res.extend(filter(self._predicate, new_events) if self.only_filters else new_events)
 
     def after_time(self, after_time: datetime) -> Iterable[Event]:
         """
@@ -132,7 +1337,7 @@ class EventLog:
         :param after_time: datetime object to filter (included)
         :return:
         """
-        return filter(lambda x: x.time >= after_time, self._filtered_events(self.data))
+        return self._time_range(after_time, None)
 
     def before_time(self, before_time: datetime) -> Iterable[Event]:
         """
@@ -140,7 +1345,7 @@ class EventLog:
         :param before_time: datetime object to filter (excluded)
         :return:
         """
-        return filter(lambda x: x.time < before_time, self._filtered_events(self.data))
+        return self._time_range(None, before_time)
 
     def between_time(self, from_time: datetime, to_time: datetime) -> Iterable[Event]:
         """
@@ -149,27 +1354,32 @@ class EventLog:
         :param to_time: datetime object to filter (excluded)
         :return:
         """
-        return filter(lambda x: from_time <= x.time < to_time, self._filtered_events(self.data))
+        return self._time_range(from_time, to_time)
 
-    def poll(self, timeout: float = 60, polling_interval: float = 1) -> List[Event]:
+    def poll(self,
+             timeout: float = 60,
+             polling_interval: Union[float, AdaptiveInterval] = 1) -> List[Event]:
         """
         Wait for new events by making periodically requests to a device.
         If events was appeared then return them. If no event was
         appeared until timeout was expired then return empty iterable.
         :param timeout: timeout in seconds. Default: 60 seconds
-        :param polling_interval: interval to make a requests in seconds.
+        :param polling_interval: interval to make a requests in seconds
+         or `AdaptiveInterval` object. Pass the same `AdaptiveInterval`
+         object to subsequent calls to keep its state.
          Default: every 1 second
         :return: iterable with new events if any or empty iterable if
          timeout has expired
         """
         deadline = datetime.now().timestamp() + timeout
         while datetime.now().timestamp() < deadline:
-            count = self.refresh()  # Can run up to several seconds depending on network
-            if count:
-                reversed_events = self._filtered_events(reversed(self.data))
-                res = list(itertools.islice(reversed_events, None, count))[::-1]
-                return res
-            time.sleep(polling_interval)
+            events = self.refresh()  # Can run up to several seconds depending on network
+            interval = polling_interval
+            if isinstance(polling_interval, AdaptiveInterval):
+                interval = polling_interval.update(len(events))
+            if events:
+                return events
+            time.sleep(interval)
 
         return []
 
@@ -203,12 +1413,18 @@ class EventLog:
                              self.buffer_size,
                              self.data.maxlen,
                              only_filters,
-                             _data=self.data)
+                             _data=self.data,
+                             event_class=self.event_class,
+                             retention=self.retention,
+                             journal=self.journal,
+                             dedup=self.dedup,
+                             _index=self._index)
         return obj
 
     def clear(self) -> None:
         """Clear log"""
         self.data.clear()
+        self._index.clear()
 
     @staticmethod
     def _merge_filters(initial: dict, fltr: dict) -> dict:
@@ -221,7 +1437,8 @@ class EventLog:
         :return: merged filter dict
         """
         seq_types = (tuple, list, set, frozenset)
-        res = deepcopy(initial)
+        # Filter values are immutable, so only sets are copied
+        res = {key: set(value) for key, value in initial.items()}
         for key, value in fltr.items():
             if not isinstance(value, seq_types):
                 value = {value}
@@ -244,44 +1461,141 @@ class EventLog:
             yield from data
             return
 
-        for event in data:
-            if not self.only_filters:
-                yield event
+        if data is self.data:
+            yield from self._events_at(range(len(self)))
+            return
+
+        yield from filter(self._predicate, data)
+
+    def _view(self) -> _LogView:
+        """Return materialized view of this log"""
+        index = self._actual_index()
+        return index.view(self._view_key, self.only_filters, self._predicate, self.data)
+
+    def _events_at(self, positions: range) -> Iterator[Event]:
+        """
+        Return events at given positions of this log
+        :param positions: positions in filtered log, must be in range
+        :return: iterator over events
+        """
+        data = self.data
+        if not self.only_filters:
+            if positions.step > 0 and not isinstance(data, ColumnarEventStorage):
+                return itertools.islice(data, positions.start, positions.stop, positions.step)
+            return (data[i] for i in positions)
+
+        view = self._view()
+        head = view.head
+        if view.events is not None:
+            events = view.events
+            return iter([events[head + i] for i in positions])
+
+        # Positions of columnar storage events are calculated from
+        #  their sequence numbers
+        seqs = view.seqs
+        offset = data._start - (data.appended - len(data))
+        return data._iter_events([seqs[head + i] + offset for i in positions])
+
+    def _evict(self, newest_time: datetime, index_actual: bool) -> None:
+        """
+        Evict the oldest events until log satisfies retention policy
+        :param newest_time: time of the newest appended event
+        :param index_actual: whether index is actual for log data
+        :return:
+        """
+        data = self.data
+        # Size is estimated, e.g. strings shared by remaining events
+        #  are kept, so repeat until log fits
+        while True:
+            count = self.retention.excess(iter(data), len(data), self.nbytes, newest_time)
+            if not count:
+                return
+
+            if isinstance(data, ColumnarEventStorage):
+                data.discard(count)
             else:
-                all_match = all(getattr(event, field) in fltr
-                                for field, fltr in self.only_filters.items())
-                if all_match:
-                    yield event
+                for _ in range(count):
+                    data.popleft()
+            if index_actual:
+                self._index.discard(len(data))
+
+    def _actual_index(self) -> _LogIndex:
+        """Return log index, rebuild it before if log data was changed
+        bypassing it
+        """
+        if not self._index.is_actual(self.data):
+            self._index.clear()
+            self._index.add(self.data, len(self.data))
+        return self._index
+
+    def _time_range(self,
+                    from_time: Optional[datetime],
+                    to_time: Optional[datetime]) -> Iterable[Event]:
+        """
+        Return filtered events with time in given range using time
+        index. Index is rebuilt if log data was changed bypassing it.
+        If log has a journal, events are read from it
+        :param from_time: the earliest time (included) or None
+        :param to_time: the latest time (excluded) or None
+        :return: iterable with events in log order
+        """
+        if self.journal is not None:
+            return self.journal.select(self.only_filters, from_time, to_time)
+
+        index = self._actual_index()
+        length = len(self.data)
+        span = index.find_time(from_time, to_time, length)
+        if span is None:
+            return iter(())
+
+        if isinstance(self.data, ColumnarEventStorage):
+            return self.data.select(self.only_filters, from_time, to_time,
+                                    start=span.start, stop=span.stop)
+
+        # Deque is iterated from the nearest end of span
+        if span.start > length - span.stop:
+            tail = itertools.islice(reversed(self.data), length - span.stop, length - span.start)
+            events = reversed(list(tail))  # type: Iterable[Event]
+        else:
+            events = itertools.islice(self.data, span.start, span.stop)
+
+        return filter(
+            lambda x: (from_time is None or x.time >= from_time)
+            and (to_time is None or x.time < to_time),
+            self._filtered_events(events)
+        )
 
     def _pull_events(self) -> Iterable[Event]:
         events = self._sdk.get_rt_log(self.buffer_size)
-        return (Event(s) for s in events)
+        return self.event_class.parse_batch(events)
 
     def __getitem__(self, item: Union[int, slice]) -> Union[Iterable[Event], Event]:
-        seq = self._filtered_events(self.data)
-        if not isinstance(item, slice):
-            try:
-                return next(itertools.islice(seq, item, None))
-            except StopIteration:
-                raise IndexError('Index is out of range') from None
+        length = len(self)
+        if isinstance(item, slice):
+            return self._events_at(range(length)[item])
 
-        start, stop, step = item.start, item.stop, item.step
-        return itertools.islice(seq, start, stop, step)
+        if item < 0:
+            item += length
+        if not 0 <= item < length:
+            raise IndexError('Index is out of range')
+        return next(self._events_at(range(item, item + 1)))
 
     def __len__(self) -> int:
         if not self.only_filters:
             return len(self.data)
 
-        return sum(1 for _ in self._filtered_events(self.data))
+        return len(self._view())
 
     def __iter__(self):
         return iter(self._filtered_events(self.data))
 
     def __str__(self):
-        items_str = ', '.join(str(x) for x in self[:3])
-        if len(self) > 6:
-            items_str += ', ..., ' + ', '.join(str(x) for x in self[3:])
-        return 'EventLog[{}]({})'.format(len(self), items_str)
+        length = len(self)
+        if length > 6:
+            items = itertools.chain(self[:3], ['...'], self[-3:])  # type: Iterable
+        else:
+            items = self[:]
+        return 'EventLog[{}]({})'.format(length, ', '.join(str(x) for x in items))
 
     def __repr__(self):
         return self.__str__()
@@ -1,5 +1,6 @@
 __all__ = [
-    'ZKSDKError'
+    'ZKSDKError',
+    'ZKSDKBatchError'
 ]
 from .enum import PULL_SDK_ERRORS, WSA_ERROR_CODES
 
@@ -22,3 +23,23 @@ class ZKSDKError(Exception):
             descr = 'Unknown error {}'.format(self.err)
 
         return '{}: {}'.format(self.msg, descr)
+
+
+class ZKSDKBatchError(ZKSDKError):
+    """Error occured while writing one of batches in bulk operation.
+    Batches before the failed one have been written successfully, so
+    the operation can be resumed starting from the failed batch
+    """
+    def __init__(self, msg: str, err: int, batch: int, rows_done: int, *args):
+        """
+        :param msg: error message
+        :param err: SDK error code
+        :param batch: index of failed batch starting from 0
+        :param rows_done: count of rows written before failed batch
+        """
+        super().__init__(msg, err, *args)
+        self.batch = batch
+        self.rows_done = rows_done
+
+    def __str__(self):
+        return '{} (batch {}, {} rows done)'.format(super().__str__(), self.batch, self.rows_done)
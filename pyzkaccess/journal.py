@@ -0,0 +1,305 @@
+__all__ = [
+    'EventJournal'
+]
+import mmap
+import os
+import struct
+import time
+from array import array
+from datetime import datetime, timedelta
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from .enum import EVENT_TYPES
+from .event import (
+    _EPOCH,
+    _PASSAGE_DIRECTIONS,
+    _VERIFY_MODES,
+    Event,
+    _ceil_seconds,
+    _compile_filters
+)
+
+
+class EventJournal:
+    """Append-only journal of events on disk. It keeps events which
+    were pulled from a device across process restarts, since a device
+    does not return them again.
+
+    Journal consists of two files. Records file at `path` contains
+    a header and fixed-width binary records, one per event, which
+    are read through `mmap`. Pins and cards are written once to
+    string table file `path + '.strings'`, one per line, and records
+    refer to them by line number. String table is loaded to memory.
+
+    Records are written in the order events come from a device. Min
+    and max event time of every block of records is kept in memory,
+    so time range queries read only blocks which may contain matched
+    events. Block times are read from file on the first query.
+
+    Data is written to OS on every `append()` and is flushed to disk
+    by `fsync` at most once in `sync_interval` seconds. Incomplete
+    record or string left by a crash are truncated on opening. New
+    strings are flushed to disk before records referring them are
+    written, so a record never refers to a string lost on power
+    failure.
+
+    Position of a record in journal is a persistent sequence number
+    of an event, see `read()`.
+
+    Ex: `EventLog(sdk, 4096, journal=EventJournal('events.journal'))`
+    """
+    #: Journal file signature and format version
+    magic = b'PZKJ\x01\x00\x00\x00'
+    #: Record fields are time (seconds since epoch), pin and card
+    #: string numbers, door, event type, entry/exit, verify mode
+    record = struct.Struct('<qIIBBBB')
+    #: Count of records in block of time index
+    block_size = 1024
+
+    def __init__(self, path: str, sync_interval: Optional[float] = 1.0):
+        """
+        :param path: path to records file, it is created if not exists
+        :param sync_interval: minimal interval in seconds between
+         flushes to disk. 0 means flush on every append, None means
+         never flush explicitly and leave it to OS
+        """
+        self.path = path
+        self.strings_path = path + '.strings'
+        self.sync_interval = sync_interval
+
+        self._file = self._open_records()
+        self._strings = self._load_strings()  # type: List[str]
+        self._string_indexes = {x: i for i, x in enumerate(self._strings)}
+        self._strings_file = open(self.strings_path, 'ab')
+        self._count = (self._file.tell() - len(self.magic)) // self.record.size
+        #: Count of records flushed to disk
+        self.synced = self._count
+        self._last_sync = time.monotonic()
+        self._map = None  # type: Optional[mmap.mmap]
+        self._map_count = 0  # Count of records covered by mapping
+        self._block_min = array('q')
+        self._block_max = array('q')
+        self._indexed = 0  # Count of records covered by block times
+
+    def append(self, events: Iterable[Event]) -> None:
+        """Write events to the end of journal"""
+        pack = self.record.pack
+        intern = self._intern
+        strings_count = len(self._strings)
+        buf = bytearray()
+        for event in events:
+            buf += pack(
+                _ceil_seconds(event.time), intern(event.pin), intern(event.card), event.door,
+                int(event.event_type), event.entry_exit.value, event.verify_mode.value
+            )
+
+        if not buf:
+            return
+
+        # Strings must reach disk first, so a record never refers to
+        #  a lost string. Files are written back in no particular order
+        if len(self._strings) != strings_count:
+            self._strings_file.flush()
+            os.fsync(self._strings_file.fileno())
+        self._file.write(buf)
+        self._file.flush()
+        self._count += len(buf) // self.record.size
+
+        if self.sync_interval is not None \
+                and time.monotonic() - self._last_sync >= self.sync_interval:
+            self.sync()
+
+    def sync(self) -> None:
+        """Flush written data to disk"""
+        self._strings_file.flush()
+        os.fsync(self._strings_file.fileno())
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.monotonic()
+        self.synced = self._count
+
+    def select(self,
+               filters: Optional[dict] = None,
+               from_time: Optional[datetime] = None,
+               to_time: Optional[datetime] = None,
+               reverse: bool = False) -> Iterator[Event]:
+        """
+        Return events which field values are contained in filters
+        and time is in given range
+        :param filters: dict with `Event` field names as keys and sets
+         of values as values, see `EventLog.only`
+        :param from_time: the earliest time (included)
+        :param to_time: the latest time (excluded)
+        :param reverse: return events from newest to oldest
+        :return: iterator over matched events in journal order
+        """
+        predicate = _compile_filters(filters) if filters else None
+        low = -2 ** 63 if from_time is None else _ceil_seconds(from_time)
+        high = 2 ** 63 if to_time is None else _ceil_seconds(to_time)
+
+        self._update_blocks()
+        block_min, block_max = self._block_min, self._block_max
+        blocks = [i for i in range(len(block_min)) if block_max[i] >= low and block_min[i] < high]
+        if reverse:
+            blocks.reverse()
+
+        return self._iter_blocks(blocks, low, high, predicate, reverse)
+
+    def read(self, start: int, count: int) -> List[Tuple[int, Event]]:
+        """
+        Read records by their positions
+        :param start: position of the first record
+        :param count: maximum count of records to read
+        :return: list of (position, event) pairs
+        """
+        start = max(start, 0)
+        stop = min(start + count, self._count)
+        if start >= stop:
+            return []
+
+        size = self.record.size
+        offset = len(self.magic) + start * size
+        rows = self.record.iter_unpack(self._mapping()[offset:offset + (stop - start) * size])
+        return [(i, self._make_event(row)) for i, row in enumerate(rows, start)]
+
+    def close(self) -> None:
+        """Flush data to disk and close files"""
+        if self._file.closed:
+            return
+        self.sync()
+        self._file.close()
+        self._strings_file.close()
+        self._map = None
+
+    def _load_strings(self) -> List[str]:
+        if not os.path.exists(self.strings_path):
+            return []
+
+        with open(self.strings_path, 'rb') as f:
+            data = f.read()
+        # The last line without newline was not written completely
+        complete = data.rfind(b'\n') + 1
+        if complete < len(data):
+            os.truncate(self.strings_path, complete)
+        return data[:complete].decode().split('\n')[:-1]
+
+    def _open_records(self):
+        if not os.path.exists(self.path) or os.path.getsize(self.path) == 0:
+            f = open(self.path, 'wb')
+            f.write(self.magic)
+            f.flush()
+            return f
+
+        with open(self.path, 'rb') as f:
+            header = f.read(len(self.magic))
+        if header != self.magic:
+            raise ValueError('File {} is not an event journal'.format(self.path))
+
+        # Drop incomplete record
+        size = os.path.getsize(self.path)
+        tail = (size - len(self.magic)) % self.record.size
+        if tail:
+            os.truncate(self.path, size - tail)
+        return open(self.path, 'ab')
+
+    def _intern(self, value: str) -> int:
+        index = self._string_indexes.get(value)
+        if index is None:
+            index = self._string_indexes[value] = len(self._strings)
+            self._strings.append(value)
+            self._strings_file.write(value.encode() + b'\n')
+        return index
+
+    def _mapping(self) -> Optional[mmap.mmap]:
+        """Return mapping of records file which covers all records.
+        Iterators keep references to previous mappings, so they are
+        not closed explicitly
+        """
+        if self._map_count != self._count:
+            if self._count == 0:
+                return None
+            with open(self.path, 'rb') as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._map_count = self._count
+        return self._map
+
+    def _update_blocks(self) -> None:
+        """Read times of records appended since previous call to
+        block time index
+        """
+        if self._indexed == self._count:
+            return
+
+        mm = self._mapping()
+        size, block_size = self.record.size, self.block_size
+        times_format = struct.Struct('<q{}x'.format(size - 8))
+        while self._indexed < self._count:
+            block, offset = divmod(self._indexed, block_size)
+            stop = min(self._count, (block + 1) * block_size)
+            start = len(self.magic) + self._indexed * size
+            chunk = mm[start:start + (stop - self._indexed) * size]
+            times = [x[0] for x in times_format.iter_unpack(chunk)]
+            if offset == 0:
+                self._block_min.append(min(times))
+                self._block_max.append(max(times))
+            else:
+                self._block_min[block] = min(self._block_min[block], min(times))
+                self._block_max[block] = max(self._block_max[block], max(times))
+            self._indexed = stop
+
+    def _iter_blocks(self, blocks: List[int], low: int, high: int, predicate, reverse: bool):
+        mm = self._mapping()
+        count = self._count
+        size, block_size = self.record.size, self.block_size
+        for block in blocks:
+            start = block * block_size
+            stop = min(count, start + block_size)
+            offset = len(self.magic) + start * size
+            rows = self.record.iter_unpack(mm[offset:offset + (stop - start) * size])
+            if reverse:
+                rows = reversed(list(rows))
+            for row in rows:
+                if not low <= row[0] < high:
+                    continue
+                event = self._make_event(row)
+                if predicate is None or predicate(event):
+                    yield event
+
+    def _make_event(self, row: tuple) -> Event:
+        strings = self._strings
+        event = Event.__new__(Event)
+        event.time = _EPOCH + timedelta(0, row[0])
+        event.pin = strings[row[1]]
+        event.card = strings[row[2]]
+        event.door = row[3]
+        event.event_type = EVENT_TYPES[row[4]]
+        event.entry_exit = _PASSAGE_DIRECTIONS[row[5]]
+        event.verify_mode = _VERIFY_MODES[row[6]]
+        return event
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __iter__(self) -> Iterator[Event]:
+        return self.select()
+
+    def __getitem__(self, item: int) -> Event:
+        length = self._count
+        if item < 0:
+            item += length
+        if not 0 <= item < length:
+            raise IndexError('Index is out of range')
+        offset = len(self.magic) + item * self.record.size
+        return self._make_event(self.record.unpack_from(self._mapping(), offset))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __str__(self):
+        return 'EventJournal({!r})[{}]'.format(self.path, len(self))
+
+    def __repr__(self):
+        return self.__str__()
@@ -9,9 +9,10 @@ import re
 from datetime import datetime
 from enum import Enum
 
+from .common import datetime_to_zkctime, zkctime_to_datetime
 from .device import ZKModel
 from .enum import SensorType, VerifyMode
-from .sdk import ZKSDK
+from .sdk import ZKSDKInterface
 
 
 def _make_daylight_prop(query_name_spring, query_name_fall, minimum, maximum):
@@ -70,7 +71,7 @@ class DaylightSavingMomentMode2:
     in a separate request). See `DLSTMode`, `WeekOfMonth*` parameters
     in SDK docs
     """
-    def __init__(self, sdk: ZKSDK, is_daylight: bool, buffer_size: int):
+    def __init__(self, sdk: ZKSDKInterface, is_daylight: bool, buffer_size: int):
         self.is_daylight = is_daylight
         self.buffer_size = buffer_size
         self._sdk = sdk
@@ -149,7 +150,7 @@ class BaseParameters:
     #: text data from PULL SDK functions
     buffer_size = 4096
 
-    def __init__(self, sdk: ZKSDK, device_model: type(ZKModel)):
+    def __init__(self, sdk: ZKSDKInterface, device_model: type(ZKModel)):
         self.device_model = device_model
         self._sdk = sdk
 
@@ -305,47 +306,19 @@ class DeviceParameters(BaseParameters):
             setattr(t, attr, getattr(value, attr))
 
     def _set_datetime(self, value: datetime):
-        # Amazing DIY ctime calculating from ZKTeco guys.
-        # Simply put this is a count of seconds starting from
-        # 2000-01-01T00:00:00 without considering leap years/seconds
-        # or different length of months (always 31 day)
-        # See PULL SDK docs
-        if value.year < 2000:
-            raise ValueError('Minimum year is 2000')
-
-        value = sum((
-            sum((
-                (value.year - 2000) * 12 * 31,
-                (value.month - 1) * 31,
-                (value.day - 1)
-            )) * 24 * 60 * 60,
-            value.hour * 60 * 60,
-            value.minute * 60,
-            value.second
-        ))
-
+        value = datetime_to_zkctime(value)
         self._sdk.set_device_param(parameters={'DateTime': str(value)})
 
     def _get_datetime(self):
         res = self._sdk.get_device_param(parameters=('DateTime',), buffer_size=self.buffer_size)
-        res = int(res['DateTime'])
-
-        dt = datetime(
-            year=res // 32140800 + 2000,
-            month=(res // 2678400) % 12 + 1,
-            day=(res // 86400) % 31 + 1,
-            hour=(res // 3600) % 24,
-            minute=(res // 60) % 60,
-            second=res % 60
-        )
-        return dt
+        return zkctime_to_datetime(int(res['DateTime']))
 
     datetime = property(_get_datetime, _set_datetime, None, 'Current datetime (read-write)')
 
 
 class DoorParameters(BaseParameters):
     """Parameters related to a concrete door"""
-    def __init__(self, sdk: ZKSDK, device_model: type(ZKModel), door_number: int):
+    def __init__(self, sdk: ZKSDKInterface, device_model: type(ZKModel), door_number: int):
         super().__init__(sdk, device_model)
         self.door_number = door_number
 
@@ -0,0 +1,417 @@
+__all__ = [
+    'DeviceStats',
+    'EventPoller',
+    'OverflowPolicy',
+    'PolledEvent',
+    'Subscription'
+]
+import logging
+import tempfile
+import threading
+import time
+from collections import deque, namedtuple
+from enum import Enum
+from typing import Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple, Union
+
+from .event import AdaptiveInterval, Event
+from .pyzkaccess import ZKAccess
+
+logger = logging.getLogger(__name__)
+
+
+class OverflowPolicy(Enum):
+    """What to do with a new event if subscription queue is full"""
+    #: Drop the oldest event in queue
+    drop_oldest = 1
+    #: Wait until a consumer takes an event. Polling of the device
+    #: which produced the event is paused until then
+    block = 2
+    #: Write the event to a temporary file, it will be read from
+    #: there when the queue is drained
+    spill = 3
+
+
+PolledEvent = namedtuple('PolledEvent', ('source', 'event', 'received'))
+PolledEvent.__doc__ = """Event delivered to a subscriber"""
+PolledEvent.source.__doc__ = '`ZKAccess` object of a device which produced the event'
+PolledEvent.event.__doc__ = '`Event` object'
+PolledEvent.received.__doc__ = '`time.monotonic()` value when event was pulled from a device'
+
+DeviceStats = namedtuple('DeviceStats', ('polls', 'events', 'errors', 'last_error', 'last_poll'))
+DeviceStats.__doc__ = """Polling statistics of one device"""
+DeviceStats.polls.__doc__ = 'Count of made requests'
+DeviceStats.events.__doc__ = 'Count of pulled events'
+DeviceStats.errors.__doc__ = 'Count of failed requests'
+DeviceStats.last_error.__doc__ = 'The last exception raised by request or None'
+DeviceStats.last_poll.__doc__ = '`time.monotonic()` value of the last successful request'
+
+
+class Subscription:
+    """Bounded queue of events for one subscriber. Events are taken
+    by `get()` or by iteration. If a callback was given, events are
+    passed to it by a separate thread, so a slow callback never
+    stalls polling.
+    """
+    def __init__(self,
+                 sources: List[ZKAccess],
+                 maxsize: int = 1000,
+                 overflow: OverflowPolicy = OverflowPolicy.drop_oldest,
+                 callback: Optional[Callable[[PolledEvent], None]] = None,
+                 spill_dir: Optional[str] = None):
+        """
+        :param sources: devices which events are delivered, the same
+         list as in poller
+        :param maxsize: maximum count of events in memory queue
+        :param overflow: what to do with a new event if queue is full
+        :param callback: function which is called for every event in
+         a separate thread
+        :param spill_dir: directory for temporary file if
+         `overflow=OverflowPolicy.spill`. System default is used if
+         omitted
+        """
+        if maxsize < 1:
+            raise ValueError('maxsize must be positive number')
+
+        self.maxsize = maxsize
+        self.overflow = overflow
+        self.callback = callback
+        self.spill_dir = spill_dir
+
+        #: Count of events dropped because of queue overflow
+        self.dropped = 0
+        #: Count of events written to spill file
+        self.spilled = 0
+        #: Maximum time in seconds between pulling an event and its
+        #: delivery to the subscriber
+        self.max_lag = 0.0
+
+        self._sources = sources
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._spill_file = None
+        self._spill_count = 0
+        self._spill_read_pos = 0
+        self._spill_class = Event
+        self._thread = None  # type: Optional[threading.Thread]
+        if callback is not None:
+            self._thread = threading.Thread(target=self._dispatch, daemon=True)
+            self._thread.start()
+
+    @property
+    def closed(self) -> bool:
+        """True if subscription was closed"""
+        return self._closed
+
+    def qsize(self) -> int:
+        """Count of events waiting for delivery including spilled"""
+        with self._cond:
+            return len(self._queue) + self._spill_count
+
+    @property
+    def lag(self) -> float:
+        """Time in seconds the oldest undelivered event waits for
+        delivery. 0 if there are no such events
+        """
+        with self._cond:
+            if self._queue:
+                return time.monotonic() - self._queue[0].received
+            if self._spill_count:
+                return time.monotonic() - self._read_spilled(peek=True).received
+        return 0.0
+
+    def get(self, timeout: Optional[float] = None) -> Optional[PolledEvent]:
+        """
+        Take the next event, wait for it if needed
+        :param timeout: maximum time in seconds to wait. By default
+         wait until an event appears or subscription is closed
+        :return: event or None if timeout expired or subscription
+         was closed
+        """
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._queue or self._spill_count or self._closed,
+                                       timeout):
+                return None
+            if self._queue:
+                item = self._queue.popleft()
+            elif self._spill_count:
+                item = self._read_spilled()
+            else:
+                return None
+            self._cond.notify_all()
+
+        self.max_lag = max(self.max_lag, time.monotonic() - item.received)
+        return item
+
+    def close(self) -> None:
+        """Stop delivering events. Waiting consumers are woken up"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+            if self._spill_file is not None:
+                self._spill_file.close()
+                self._spill_file = None
+                self._spill_count = 0
+
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join()
+
+    def put(self, source_index: int, event_line: str, event: Event, received: float) -> None:
+        """
+        Put an event to the queue according to overflow policy. Is
+        called by poller
+        :param source_index: index of source device in sources list
+        :param event_line: raw event string, is used for spilling
+        :param event: parsed event
+        :param received: `time.monotonic()` value when event was
+         pulled from a device
+        :return:
+        """
+        item = PolledEvent(self._sources[source_index], event, received)
+        with self._cond:
+            if self._closed:
+                return
+
+            if self.overflow == OverflowPolicy.block:
+                self._cond.wait_for(lambda: len(self._queue) < self.maxsize or self._closed)
+                if self._closed:
+                    return
+            elif self.overflow == OverflowPolicy.spill:
+                # Keep events order: once spilled, new events go to file
+                #  until it is drained
+                if self._spill_count or len(self._queue) >= self.maxsize:
+                    self._write_spilled(source_index, event_line, type(event), received)
+                    self._cond.notify_all()
+                    return
+            elif len(self._queue) >= self.maxsize:
+                self._queue.popleft()
+                self.dropped += 1
+
+            self._queue.append(item)
+            self._cond.notify_all()
+
+    def _write_spilled(self,
+                       source_index: int,
+                       event_line: str,
+                       event_class: type(Event),
+                       received: float):
+        self._spill_class = event_class
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(mode='w+', dir=self.spill_dir)
+            self._spill_read_pos = 0
+        self._spill_file.seek(0, 2)
+        self._spill_file.write('{}\t{!r}\t{}\n'.format(source_index, received, event_line))
+        self._spill_count += 1
+        self.spilled += 1
+
+    def _read_spilled(self, peek: bool = False) -> PolledEvent:
+        self._spill_file.seek(self._spill_read_pos)
+        line = self._spill_file.readline()
+        source_index, received, event_line = line.rstrip('\n').split('\t')
+        event = self._spill_class(event_line)
+        item = PolledEvent(self._sources[int(source_index)], event, float(received))
+        if not peek:
+            self._spill_read_pos = self._spill_file.tell()
+            self._spill_count -= 1
+            if self._spill_count == 0:
+                self._spill_file.seek(0)
+                self._spill_file.truncate()
+                self._spill_read_pos = 0
+        return item
+
+    def _dispatch(self):
+        while not self._closed:
+            item = self.get(timeout=.1)
+            if item is None:
+                continue
+            try:
+                self.callback(item)
+            except Exception:  # noqa
+                logger.exception('Event subscriber callback failed')
+
+    def __iter__(self) -> Iterator[PolledEvent]:
+        while True:
+            item = self.get()
+            if item is None:
+                return
+            yield item
+
+
+class EventPoller:
+    """Service which continuously pulls realtime events from one or
+    many devices in background threads and publishes them to
+    subscribers.
+
+    With a fixed `polling_interval` a device is polled again
+    immediately while it returns events, otherwise after the interval.
+    With `AdaptiveInterval` the interval follows events rate of every
+    device separately. Events are not appended to `ZKAccess.events`
+    log.
+
+    Ex:
+    ```
+    with EventPoller([zk1, zk2]) as poller:
+        for item in poller.subscribe():
+            print(item.source.connstr, item.event)
+    ```
+    """
+    def __init__(self,
+                 devices: Union[ZKAccess, Iterable[ZKAccess]],
+                 polling_interval: Union[float, AdaptiveInterval, Mapping] = 1,
+                 event_class: type(Event) = Event):
+        """
+        :param devices: `ZKAccess` object or objects to poll
+        :param polling_interval: interval in seconds between requests
+         if a device returned no events, or `AdaptiveInterval` object
+         which is copied for every device, or dict with `ZKAccess`
+         objects as keys and such values to set intervals per device.
+         Default: 1 second
+        :param event_class: class of delivered events, `Event` or
+         `LazyEvent`. Default is `Event`
+        """
+        if isinstance(devices, ZKAccess):
+            devices = [devices]
+
+        self.devices = list(devices)
+        self.polling_interval = polling_interval
+        self.event_class = event_class
+        self._intervals = [self._device_interval(zk, polling_interval) for zk in self.devices]
+        self._subscriptions = []  # type: List[Subscription]
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._threads = []  # type: List[threading.Thread]
+        self._stats = [DeviceStats(0, 0, 0, None, None) for _ in self.devices]
+
+    @property
+    def running(self) -> bool:
+        """True if poller is running"""
+        return bool(self._threads)
+
+    @property
+    def stats(self) -> Dict[ZKAccess, DeviceStats]:
+        """Polling statistics by devices"""
+        return dict(zip(self.devices, self._stats))
+
+    def subscribe(self,
+                  callback: Optional[Callable[[PolledEvent], None]] = None,
+                  maxsize: int = 1000,
+                  overflow: OverflowPolicy = OverflowPolicy.drop_oldest,
+                  spill_dir: Optional[str] = None) -> Subscription:
+        """
+        Subscribe for events. See `Subscription` for parameters
+        :return: new subscription
+        """
+        subscription = Subscription(self.devices, maxsize, overflow, callback, spill_dir)
+        with self._lock:
+            self._subscriptions.append(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Stop delivering events to given subscription and close it
+        :param subscription: subscription returned by `subscribe()`
+        :return:
+        """
+        with self._lock:
+            if subscription in self._subscriptions:
+                self._subscriptions.remove(subscription)
+        subscription.close()
+
+    def start(self) -> None:
+        """Start polling threads, one thread per device"""
+        if self.running:
+            return
+
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._poll, args=(i, ), daemon=True)
+            for i in range(len(self.devices))
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def stop(self) -> None:
+        """Stop polling and close all subscriptions"""
+        self._stop.set()
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        # Unblock polling threads which wait for space in queues
+        for subscription in subscriptions:
+            subscription.close()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    @staticmethod
+    def _device_interval(zk: ZKAccess, polling_interval) -> Union[float, AdaptiveInterval]:
+        if isinstance(polling_interval, Mapping):
+            polling_interval = polling_interval.get(zk, 1)
+        if isinstance(polling_interval, AdaptiveInterval):
+            return polling_interval.copy()
+        return polling_interval
+
+    def _poll(self, index: int):
+        zk = self.devices[index]
+        interval = self._intervals[index]
+        while not self._stop.is_set():
+            try:
+                lines = zk.sdk.get_rt_log(zk.buffer_size)
+            except Exception as e:  # noqa
+                polls, events, errors, _, last_poll = self._stats[index]
+                self._stats[index] = DeviceStats(polls + 1, events, errors + 1, e, last_poll)
+                self._stop.wait(self._wait_time(interval, 0))
+                continue
+
+            received = time.monotonic()
+            parsed, error = self._parse(lines)
+            for line, event in parsed:
+                with self._lock:
+                    subscriptions = list(self._subscriptions)
+                for subscription in subscriptions:
+                    subscription.put(index, line, event, received)
+
+            count = len(parsed)
+            polls, events, errors, last_error, _ = self._stats[index]
+            if error is not None:
+                errors, last_error = errors + 1, error
+            self._stats[index] = DeviceStats(polls + 1, events + count, errors, last_error, received)
+            timeout = self._wait_time(interval, count)
+            if timeout:
+                self._stop.wait(timeout)
+
+    def _parse(self, lines: List[str]) -> Tuple[List[Tuple[str, Event]], Optional[Exception]]:
+        """Parse event lines to (line, event) pairs. Malformed lines
+        are skipped, so they don't stop polling. The last parsing
+        error is returned along with pairs
+        """
+        try:
+            events = self.event_class.parse_batch(lines)
+            # Device always returns single event with code 255
+            #  if no other events occured. So, skip it
+            return [(x, e) for x, e in zip(lines, events) if e.event_type != 255], None
+        except (ValueError, KeyError):
+            pass
+
+        res, error = [], None
+        for line in lines:
+            try:
+                event = self.event_class(line)
+                if event.event_type != 255:
+                    res.append((line, event))
+            except (ValueError, KeyError) as e:
+                logger.warning('Skipped malformed event %r: %r', line, e)
+                error = e
+        return res, error
+
+    @staticmethod
+    def _wait_time(interval: Union[float, AdaptiveInterval], count: int) -> float:
+        if isinstance(interval, AdaptiveInterval):
+            return interval.update(count)
+        return 0 if count else interval
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
@@ -0,0 +1,234 @@
+__all__ = [
+    'DeviceResult',
+    'ZKAccessPool'
+]
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+from .data import User
+from .device import ZK400, ZKDevice, ZKModel
+from .event import Event
+from .pyzkaccess import ZKAccess
+from .sdk import ZKSDKInterface
+
+
+class DeviceResult(namedtuple('DeviceResult', ('connstr', 'result', 'error'))):
+    """Result of operation on one device of a pool. Either `result`
+    contains a value returned by operation or `error` contains an
+    exception raised by it
+    """
+    __slots__ = ()
+
+    @property
+    def ok(self) -> bool:
+        """True if operation was successful"""
+        return self.error is None
+
+
+class ZKAccessPool:
+    """Pool of connections to many devices. Operations are performed
+    on all devices in parallel by a bounded thread pool, results and
+    errors are returned for every device separately. Error on one
+    device does not affect others.
+
+    Devices are identified by connection strings. Ex:
+    ```
+    with ZKAccessPool(connstrs) as pool:
+        pool.connect()
+        for res in pool.read_parameters('serial_number').values():
+            print(res.connstr, res.result if res.ok else res.error)
+    ```
+    """
+    def __init__(self,
+                 devices: Iterable[Union[str, ZKDevice]],
+                 device_model: type(ZKModel) = ZK400,
+                 dllpath: str = "plcommpro.dll",
+                 log_capacity: Optional[int] = None,
+                 sdk_factory: Optional[Callable[[str], ZKSDKInterface]] = None,
+                 max_workers: int = 32):
+        """
+        Connections are not made in constructor, use `connect()`.
+        :param devices: connection strings or `ZKDevice` objects
+        :param device_model: Device model for connection strings.
+         Model of `ZKDevice` is taken from the object itself.
+         Default is C3-400
+        :param dllpath: Full path to plcommpro.dll
+        :param log_capacity: Mixumum capacity of events log of every
+         device. By default size is not limited
+        :param sdk_factory: function which accepts connection string
+         and returns SDK implementation object for a device. By
+         default `ZKSDK` with `dllpath` is used
+        :param max_workers: maximum count of parallel operations
+        """
+        self.dllpath = dllpath
+        self.log_capacity = log_capacity
+        self.sdk_factory = sdk_factory
+        self.members = {}  # type: Dict[str, ZKAccess]
+        self._models = {}  # type: Dict[str, type(ZKModel)]
+        for device in devices:
+            if isinstance(device, ZKDevice):
+                self._models[ZKAccess._device_connstr(device)] = device.model
+            else:
+                self._models[device] = device_model
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+
+    @property
+    def connstrs(self) -> List[str]:
+        """Connection strings of all devices in pool"""
+        return list(self._models.keys())
+
+    @property
+    def connected(self) -> List[str]:
+        """Connection strings of connected devices"""
+        # Members are added by connecting threads
+        with self._lock:
+            members = list(self.members.items())
+        return [k for k, v in members if v.sdk.is_connected]
+
+    def connect(self, timeout: Optional[float] = None) -> Dict[str, DeviceResult]:
+        """
+        Connect to all devices which are not connected yet
+        :param timeout: maximum time in seconds to wait for operation
+        :return: dict with connection strings as keys and connection
+         results as values
+        """
+        connected = set(self.connected)
+        connstrs = [k for k in self.connstrs if k not in connected]
+        return self._run(self._connect, connstrs, timeout)
+
+    def disconnect(self, timeout: Optional[float] = None) -> Dict[str, DeviceResult]:
+        """
+        Disconnect from all connected devices
+        :param timeout: maximum time in seconds to wait for operation
+        :return: dict with connection strings as keys and results as
+         values
+        """
+        return self.map(lambda zk: zk.disconnect(), timeout=timeout)
+
+    def map(self,
+            func: Callable[[ZKAccess], Any],
+            connstrs: Optional[Sequence[str]] = None,
+            timeout: Optional[float] = None) -> Dict[str, DeviceResult]:
+        """
+        Call given function for every connected device in parallel.
+        Ex: `pool.map(lambda zk: zk.relays.switch_on(5))`
+        :param func: function which accepts `ZKAccess` object
+        :param connstrs: connection strings of devices to call function
+         for. By default all connected devices are used
+        :param timeout: maximum time in seconds to wait for operation.
+         Devices which have not finished in time get `TimeoutError`
+        :return: dict with connection strings as keys and results as
+         values
+        """
+        if connstrs is None:
+            connstrs = self.connected
+
+        def call(connstr):
+            zk = self.members.get(connstr)
+            if zk is None or not zk.sdk.is_connected:
+                raise RuntimeError('Device is not connected')
+            return func(zk)
+
+        return self._run(call, connstrs, timeout)
+
+    def read_parameters(self, *names: str, timeout: Optional[float] = None) -> Dict[str, DeviceResult]:
+        """
+        Read given device parameters from all devices
+        :param names: parameter names, the same as `DeviceParameters`
+         attribute names
+        :param timeout: maximum time in seconds to wait for operation
+        :return: dict with connection strings as keys and dicts with
+         parameters as results
+        """
+        def func(zk):
+            params = zk.parameters
+            return {name: getattr(params, name) for name in names}
+
+        return self.map(func, timeout=timeout)
+
+    def pull_events(self, timeout: Optional[float] = None) -> Dict[str, DeviceResult]:
+        """
+        Refresh event logs of all devices
+        :param timeout: maximum time in seconds to wait for operation
+        :return: dict with connection strings as keys and lists of new
+         events as results
+        """
+        return self.map(self._pull_events, timeout=timeout)
+
+    def add_users(self,
+                  users: List[User],
+                  replace_existing=False,
+                  timeout: Optional[float] = None) -> Dict[str, DeviceResult]:
+        """
+        Add users to all devices, see `ZKAccess.add_users`
+        :param users: users to be added
+        :param replace_existing: if False then raise error if a user
+         already exists
+        :param timeout: maximum time in seconds to wait for operation
+        :return: dict with connection strings as keys and results as
+         values
+        """
+        return self.map(lambda zk: zk.add_users(users, replace_existing), timeout=timeout)
+
+    def restart(self, timeout: Optional[float] = None) -> Dict[str, DeviceResult]:
+        """
+        Restart all devices
+        :param timeout: maximum time in seconds to wait for operation
+        :return: dict with connection strings as keys and results as
+         values
+        """
+        return self.map(lambda zk: zk.restart(), timeout=timeout)
+
+    def close(self) -> None:
+        """Disconnect from all devices and stop worker threads"""
+        self.disconnect()
+        self._executor.shutdown(wait=True)
+
+    def _connect(self, connstr: str) -> None:
+        with self._lock:
+            zk = self.members.get(connstr)
+        if zk is None:
+            sdk = self.sdk_factory(connstr) if self.sdk_factory is not None else None
+            zk = ZKAccess(device_model=self._models[connstr], dllpath=self.dllpath,
+                          log_capacity=self.log_capacity, sdk=sdk)
+            with self._lock:
+                self.members[connstr] = zk
+
+        zk.connect(connstr)
+
+    @staticmethod
+    def _pull_events(zk: ZKAccess) -> List[Event]:
+        return zk.events.refresh()
+
+    def _run(self,
+             func: Callable[[str], Any],
+             connstrs: Sequence[str],
+             timeout: Optional[float]) -> Dict[str, DeviceResult]:
+        futures = {connstr: self._executor.submit(func, connstr) for connstr in connstrs}
+        wait(futures.values(), timeout=timeout)
+
+        results = {}
+        for connstr, future in futures.items():
+            if not future.done():
+                future.cancel()
+                error = TimeoutError('Operation has not finished in {} seconds'.format(timeout))
+                results[connstr] = DeviceResult(connstr, None, error)
+            elif future.exception() is not None:
+                results[connstr] = DeviceResult(connstr, None, future.exception())
+            else:
+                results[connstr] = DeviceResult(connstr, future.result(), None)
+
+        return results
+
+    def __len__(self):
+        return len(self._models)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
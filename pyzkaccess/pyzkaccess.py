@@ -2,16 +2,18 @@ __all__ = ["ZKAccess"]
 from pyzkaccess.common import DeviceDataFilter
 from pyzkaccess.data import TableName, User
 import pyzkaccess.ctypes as ctypes
-from typing import Any, Iterable, List, Mapping, Optional, Sequence
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
 
 from .aux_input import AuxInput, AuxInputList
 from .device import ZKModel, ZK400, ZKDevice
 from .door import Door, DoorList
 from .enum import ControlOperation
-from .event import EventLog
+from .event import DedupWindow, Event, EventLog, RetentionPolicy
+from .journal import EventJournal
 from .param import DeviceParameters, DoorParameters
 from .reader import Reader, ReaderList
 from .relay import Relay, RelayList
+from .sdk import BulkProgress, ZKSDKInterface
 import pyzkaccess.sdk
 
 
@@ -29,6 +31,13 @@ class ZKAccess:
         device_model: type(ZKModel) = ZK400,
         dllpath: str = "plcommpro.dll",
         log_capacity: Optional[int] = None,
+        sdk: Optional[ZKSDKInterface] = None,
+        event_class: type(Event) = Event,
+        columnar_log: bool = False,
+        log_index_fields: Sequence[str] = (),
+        log_retention: Optional[RetentionPolicy] = None,
+        log_journal: Optional[EventJournal] = None,
+        log_dedup: Optional[DedupWindow] = None,
     ):
         """
         :param connstr: Connection string. If given then
@@ -40,17 +49,35 @@ class ZKAccess:
         :param dllpath: Full path to plcommpro.dll
         :param log_capacity: Mixumum capacity of events log. By default
          size is not limited
+        :param sdk: SDK implementation object, e.g. `EmulatedZKSDK()`.
+         By default `ZKSDK` with `dllpath` is used
+        :param event_class: class of events objects in log, `Event` or
+         `LazyEvent`. Default is `Event`
+        :param columnar_log: keep events log in compact
+         `ColumnarEventStorage` instead of deque of `Event` objects
+        :param log_index_fields: fields of events to keep hash indexes
+         for, which speed up filtering of events log, e.g. by doors.
+         Any of 'door', 'event_type', 'pin', 'card'
+        :param log_retention: `RetentionPolicy` which limits events log
+         by events age, memory size or count
+        :param log_journal: `EventJournal` to write events log to
+         disk and to answer time queries of events log
+        :param log_dedup: `DedupWindow` which skips events repeated by
+         a device, e.g. after reconnect
         :raises ZKSDKError: On connection error
         """
         self.connstr = connstr
         self.device_model = device_model
-        self.sdk = pyzkaccess.sdk.ZKSDK(dllpath)
+        self.sdk = sdk if sdk is not None else pyzkaccess.sdk.ZKSDK(dllpath)
         self._device = device
-        self._event_log = EventLog(self.sdk, self.buffer_size, maxlen=log_capacity)
+        self._event_log = EventLog(self.sdk, self.buffer_size, maxlen=log_capacity,
+                                   event_class=event_class, columnar=columnar_log,
+                                   index_fields=log_index_fields, retention=log_retention,
+                                   journal=log_journal, dedup=log_dedup)
 
         if device:
             if not connstr:
-                self.connstr = "protocol=TCP,ipaddress={},port=4370,timeout=4000,passwd=".format(device.ip)
+                self.connstr = self._device_connstr(device)
             if not device_model:
                 self.device_model = device.model
 
@@ -165,8 +192,15 @@ class ZKAccess:
         """
         return self.sdk.handle
 
+    @staticmethod
+    def _device_connstr(device: ZKDevice) -> str:
+        return "protocol=TCP,ipaddress={},port=4370,timeout=4000,passwd=".format(device.ip)
+
     @classmethod
-    def search_devices(cls, broadcast_address: str = "255.255.255.255", dllpath: str = "plcommpro.dll") -> Sequence[ZKDevice]:
+    def search_devices(cls,
+                       broadcast_address: str = "255.255.255.255",
+                       dllpath: str = "plcommpro.dll",
+                       sdk: Optional[ZKSDKInterface] = None) -> Sequence[ZKDevice]:
         """
         Classmethod which scans an Ethernet network with given
         broadcast address and returns all found ZK devices.
@@ -185,9 +219,12 @@ class ZKAccess:
         :param broadcast_address: your local segment broadcast address
          as string. Default is '255.255.255.255'
         :param dllpath: path to a PULL SDK DLL. Default: 'plcommpro.dll'
+        :param sdk: SDK implementation object. By default `ZKSDK` with
+         `dllpath` is used
         :return: iterable of found ZKDevice
         """
-        sdk = pyzkaccess.sdk.ZKSDK(dllpath)
+        if sdk is None:
+            sdk = pyzkaccess.sdk.ZKSDK(dllpath)
         devices = sdk.search_device(broadcast_address, cls.buffer_size)
         return tuple(ZKDevice(line) for line in devices)
 
@@ -214,24 +251,83 @@ class ZKAccess:
         """Restart a device"""
         self.sdk.control_device(ControlOperation.restart.value, 0, 0, 0, 0)
 
-    def get_data(self, tablename: TableName):
-        return self.sdk.get_device_data(tablename, buffer_size=1024 * 1024 * 4)
+    def get_data(self,
+                 tablename: TableName,
+                 fields: Optional[Sequence[str]] = None,
+                 options: str = '') -> List[Dict[str, Any]]:
+        """
+        Return table rows
+        :param tablename: the name of the table
+        :param fields: field names to be fetched. By default all
+         fields are fetched
+        :param options: options string, see SDK docs
+        :return: list of dicts, one dict per row
+        """
+        return self.sdk.get_device_data(tablename, fields=fields, options=options)
 
-    def set_data(self, tablename: TableName, data: List[Mapping[str, Any]]) -> None:
-        return self.sdk.set_device_data(tablename, data)
+    def iter_data(self,
+                  tablename: TableName,
+                  data_filter: DeviceDataFilter = DeviceDataFilter(),
+                  fields: Optional[Sequence[str]] = None,
+                  options: str = '') -> Iterator[tuple]:
+        """
+        Return iterator over table rows. Rows are parsed lazily, this
+        is suitable for big tables such as transaction
+        :param tablename: the name of the table
+        :param data_filter: filter of rows to be fetched
+        :param fields: field names to be fetched. By default all
+         fields are fetched
+        :param options: options string, see SDK docs
+        :return: iterator over rows, each row is a namedtuple with
+         requested fields
+        """
+        return self.sdk.iter_device_data(tablename, data_filter=data_filter,
+                                         fields=fields, options=options)
+
+    def set_data(self,
+                 tablename: TableName,
+                 data: List[Mapping[str, Any]],
+                 progress: Optional[Callable[[BulkProgress], Any]] = None,
+                 start_batch: int = 0) -> None:
+        """
+        Insert or update table rows. Rows are sent by batches, see
+        `ZKSDKInterface.set_device_data_bulk`
+        :param tablename: the name of the table
+        :param data: rows, each row is a dict with field names as keys
+        :param progress: callback which is called with `BulkProgress`
+         after every written batch
+        :param start_batch: index of the first batch to be written,
+         is used to resume failed operation
+        :raises ZKSDKBatchError: if a batch was failed
+        :return: None
+        """
+        self.sdk.set_device_data_bulk(tablename, data, progress=progress, start_batch=start_batch)
 
-    def get_all_users(self) -> List[User]:
+    def get_all_users(self, fields: Optional[Sequence[str]] = None) -> List[User]:
+        """
+        Return all users
+        :param fields: user fields to be fetched, other fields will be
+         None. By default all fields are fetched
+        :return: list of users
+        """
         all_users = []
 
-        data = self.sdk.get_device_data(TableName.user, 4 * 1024 * 1024)
+        data = self.sdk.get_device_data(TableName.user, fields=fields)
         for d in data:
             all_users.append(User(**d))
         return all_users
 
-    def get_user_by_pin(self, pin: int) -> User:
+    def get_user_by_pin(self, pin: int, fields: Optional[Sequence[str]] = None) -> User:
+        """
+        Return a user with given pin
+        :param pin: user pin
+        :param fields: user fields to be fetched, other fields will be
+         None. By default all fields are fetched
+        :return: user
+        """
         data_filter = DeviceDataFilter()
         data_filter.add_condition("Pin", str(pin))
-        users = self.sdk.get_device_data(TableName.user, 1024 * 1024 * 4, data_filter)
+        users = self.sdk.get_device_data(TableName.user, data_filter=data_filter, fields=fields)
         if (len(users)) > 1:
             print(users)
             raise Exception("More than one users matched the query.WTF")  # FIXME: make custom exception
@@ -246,21 +342,78 @@ class ZKAccess:
         data_filter.add_condition("Pin", str(pin))
         self.sdk.delete_device_data(TableName.user, [data_filter])
 
+    def delete_rows(self,
+                    tablename: TableName,
+                    data_filter: Iterable[DeviceDataFilter],
+                    progress: Optional[Callable[[BulkProgress], Any]] = None,
+                    start_batch: int = 0) -> None:
+        """
+        Delete table rows matched by given filters. Many filters are
+        sent in one request, see `ZKSDKInterface.delete_device_data_bulk`
+        :param tablename: the name of the table
+        :param data_filter: filters, each one matches a set of rows
+        :param progress: callback which is called with `BulkProgress`
+         after every processed batch
+        :param start_batch: index of the first batch to be processed,
+         is used to resume failed operation
+        :raises ZKSDKBatchError: if a batch was failed
+        :return: None
+        """
+        self.sdk.delete_device_data_bulk(tablename, data_filter,
+                                         progress=progress, start_batch=start_batch)
+
+    def delete_users(self, pins: Iterable[int]) -> None:
+        """
+        Delete users with given pins and their door authorizations
+        (`userauthorize` table rows). Many pins are sent in one request
+        :param pins: pins of users to delete
+        :raises ZKSDKBatchError: if a batch was failed
+        :return: None
+        """
+        filters = []
+        for pin in pins:
+            data_filter = DeviceDataFilter()
+            data_filter.add_condition("Pin", str(pin))
+            filters.append(data_filter)
+
+        # Authorizations are deleted first, so a failure never leaves
+        #  orphaned authorizations of deleted users
+        self.sdk.delete_device_data_bulk(TableName.userauthorize, filters)
+        self.sdk.delete_device_data_bulk(TableName.user, filters)
+
     def update_user_by_pin(self, pin: int, updated_user: User) -> None:
         existing_user = self.get_user_by_pin(pin)
-        new_user = existing_user.copy(update=updated_user.dict())
+        new_user = existing_user.copy(update=updated_user.dict(exclude_none=True))
         self.add_users([new_user], replace_existing=True)
 
-    def add_users(self, users: List[User], replace_existing=False) -> None:
+    def add_users(self,
+                  users: List[User],
+                  replace_existing=False,
+                  progress: Optional[Callable[[BulkProgress], Any]] = None,
+                  start_batch: int = 0) -> None:
+        """
+        Add users. Users are sent by batches, see
+        `ZKSDKInterface.set_device_data_bulk`
+        :param users: users to be added
+        :param replace_existing: if False then raise error if a user
+         already exists
+        :param progress: callback which is called with `BulkProgress`
+         after every written batch
+        :param start_batch: index of the first batch to be written,
+         is used to resume failed operation
+        :raises ZKSDKBatchError: if a batch was failed
+        :return: None
+        """
         # raise Error if user already exists and replace_existing=False, FIXME: make this bit less uglier
         if not replace_existing:
-            for existing_user_i in self.get_all_users():
+            for existing_user_i in self.get_all_users(fields=['Pin']):
                 for new_user in users:
                     if new_user.Pin is existing_user_i.Pin:
                         raise Exception("User already exists")  # FIXME: make custom exception
 
-        users_dicts = list(map(lambda u: u.dict(), users))
-        self.sdk.set_device_data(TableName.user, users_dicts)
+        users_dicts = list(map(lambda u: u.dict(exclude_none=True), users))
+        self.sdk.set_device_data_bulk(TableName.user, users_dicts,
+                                      progress=progress, start_batch=start_batch)
 
     def __enter__(self):
         return self
@@ -7,7 +7,7 @@ from typing import Iterable, Union
 
 from .common import UserTuple
 from .event import EventLog
-from .sdk import ZKSDK
+from .sdk import ZKSDKInterface
 
 
 class ReaderInterface(metaclass=ABCMeta):
@@ -28,7 +28,7 @@ class ReaderInterface(metaclass=ABCMeta):
 
 class Reader(ReaderInterface):
     """Concrete reader"""
-    def __init__(self, sdk: ZKSDK, event_log: EventLog, number: int):
+    def __init__(self, sdk: ZKSDKInterface, event_log: EventLog, number: int):
         self.number = number
         self._sdk = sdk
         self._event_log = event_log
@@ -55,7 +55,7 @@ class ReaderList(ReaderInterface, UserTuple):
     """Collection of reader objects which is used to perform group
     operations over multiple readers
     """
-    def __init__(self, sdk: ZKSDK, event_log: EventLog, readers: Iterable[Reader] = ()):
+    def __init__(self, sdk: ZKSDKInterface, event_log: EventLog, readers: Iterable[Reader] = ()):
         super().__init__(readers)
         self._sdk = sdk
         self._event_log = event_log
@@ -8,7 +8,7 @@ from typing import Iterable, Union
 
 from .common import UserTuple
 from .enum import RelayGroup, ControlOperation
-from .sdk import ZKSDK
+from .sdk import ZKSDKInterface
 
 
 class RelayInterface(metaclass=ABCMeta):
@@ -25,7 +25,7 @@ class RelayInterface(metaclass=ABCMeta):
 
 class Relay(RelayInterface):
     """Concrete relay"""
-    def __init__(self, sdk: ZKSDK, group: RelayGroup, number: int):
+    def __init__(self, sdk: ZKSDKInterface, group: RelayGroup, number: int):
         self.group = group
         self.number = number
         self._sdk = sdk
@@ -70,7 +70,7 @@ class RelayList(RelayInterface, UserTuple):
     """Collection of relay objects which is used to perform group
     operations over multiple relays
     """
-    def __init__(self, sdk: ZKSDK, relays: Iterable[Relay] = ()):
+    def __init__(self, sdk: ZKSDKInterface, relays: Iterable[Relay] = ()):
         super().__init__(relays)
         self._sdk = sdk
 
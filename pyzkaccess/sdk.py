@@ -1,31 +1,550 @@
 __all__ = [
-    'ZKSDK'
+    'BufferPool',
+    'BulkProgress',
+    'CallPriority',
+    'PriorityLock',
+    'ZKSDK',
+    'ZKSDKInterface'
 ]
 from pyzkaccess.common import DeviceDataFilter
 from pyzkaccess.data import TableName
+import heapq
+import itertools
 import pyzkaccess.ctypes as ctypes
-from typing import Dict, Iterable, List, Sequence, Mapping, Any
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from collections import namedtuple
+from contextlib import contextmanager
+from enum import IntEnum
+from functools import lru_cache, wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Mapping, Tuple
 
-from .exceptions import ZKSDKError
+from .exceptions import ZKSDKError, ZKSDKBatchError
 
 
-class ZKSDK:
+def _split_lines(raw: str) -> List[str]:
+    """
+    Split a text returned by SDK function to lines. Every line
+    including the last one is terminated by CRLF
+    :param raw: text returned by SDK
+    :return: list of lines without line terminators
+    """
+    if raw == '\r\n':
+        return []
+
+    *lines, _ = raw.split('\r\n')
+    return lines
+
+
+def _parse_table(raw: str) -> List[Dict[str, Any]]:
+    """
+    Parse a table text returned by GetDeviceData function. The first
+    line is a header with field names, the rest are rows with values.
+    All items are separated by comma
+    :param raw: text returned by SDK
+    :return: list of dicts, one dict per row
+    """
+    lines = _split_lines(raw)
+    if not lines:
+        return []
+
+    fieldnames = lines[0].split(',')
+    return [dict(zip(fieldnames, line.split(','))) for line in lines[1:]]
+
+
+@lru_cache(maxsize=64)
+def _row_class(fieldnames: Tuple[str, ...]) -> type:
+    """Return namedtuple class for table rows with given fields"""
+    return namedtuple('DeviceDataRow', fieldnames, rename=True)
+
+
+def _iter_table(chunks: Iterable[bytes]) -> Iterator[tuple]:
+    """
+    Parse a table text returned by GetDeviceData function lazily.
+    The text may be split into several chunks at any position
+    :param chunks: consecutive parts of the text returned by SDK
+    :return: iterator over namedtuples, one namedtuple per row
+    """
+    row_class = None
+    fields_count = 0
+    tail = b''
+
+    def make_row(line: bytes) -> tuple:
+        values = line.decode('utf-8').split(',')
+        if len(values) != fields_count:
+            values = (values + [''] * fields_count)[:fields_count]
+        return row_class._make(values)
+
+    for chunk in chunks:
+        data = tail + chunk if tail else chunk
+        pos = 0
+        while True:
+            end = data.find(b'\r\n', pos)
+            if end == -1:
+                break
+            line = data[pos:end]
+            pos = end + 2
+            if row_class is None:
+                if not line:
+                    return
+                fieldnames = tuple(line.decode('utf-8').split(','))
+                row_class, fields_count = _row_class(fieldnames), len(fieldnames)
+                continue
+            yield make_row(line)
+        tail = data[pos:]
+
+    if tail and row_class is not None:
+        yield make_row(tail)
+
+
+def _format_fields(fields: Optional[Sequence[str]]) -> str:
+    """
+    Make a field list accepted by GetDeviceData function
+    :param fields: field names, None or empty means all fields
+    :return: text where field names are separated by TAB or '*'
+    """
+    if not fields:
+        return '*'
+    return '\t'.join(fields)
+
+
+def _format_rows(data: Iterable[Mapping[str, Any]]) -> str:
+    """
+    Make a text accepted by SetDeviceData function from table rows
+    :param data: rows, each row is a dict with field names as keys
+    :return: text where rows are separated by CRLF and fields by TAB
+    """
+    return '\r\n'.join('\t'.join('{}={}'.format(k, v) for k, v in line.items()) for line in data)
+
+
+def _row_size(row: Mapping[str, Any]) -> int:
+    """Return size in bytes of a row in `_format_rows` text"""
+    # Row text and CRLF separator
+    return len('\t'.join('{}={}'.format(k, v) for k, v in row.items()).encode()) + 2
+
+
+def _filter_size(data_filter: DeviceDataFilter) -> int:
+    """Return size in bytes of a filter in `_format_filters` text"""
+    return len(str(data_filter).encode()) + 2
+
+
+def _split_batches(data: Iterable[Any],
+                   max_items: int,
+                   max_bytes: int,
+                   item_size: Callable[[Any], int] = _row_size) -> List[List[Any]]:
+    """
+    Split items (rows or filters) to batches limited by items count
+    and by size of text sent to a device. An item which is bigger
+    than `max_bytes` takes a separate batch
+    :param data: items to split
+    :param max_items: maximum items in one batch
+    :param max_bytes: maximum text size in bytes of one batch
+    :param item_size: function which returns text size of an item
+    :return: list of batches, each batch is a list of items
+    """
+    batches = []
+    batch, batch_bytes = [], 0
+    for item in data:
+        size = item_size(item)
+        if batch and (len(batch) >= max_items or batch_bytes + size > max_bytes):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(item)
+        batch_bytes += size
+
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _format_filters(data_filter: Iterable[DeviceDataFilter]) -> str:
+    """
+    Make a text accepted by DeleteDeviceData function from filters
+    :param data_filter: filters, each one matches a set of rows
+    :return: text where filters are separated by CRLF
+    """
+    return '\r\n'.join(str(f) for f in data_filter)
+
+
+def _fit_buffer_size(size: int, min_size: int, max_size: int) -> int:
+    """Round up buffer size to the power of two within given limits"""
+    res = min_size
+    while res < size and res < max_size:
+        res *= 2
+    return min(res, max_size)
+
+
+class CallPriority(IntEnum):
+    """Priority of SDK call waiting for a connection. A call with
+    lower value goes first
+    """
+    control = 0
+    default = 1
+    poll = 2
+
+
+class PriorityLock:
+    """Reentrant lock which is given to waiting threads in order of
+    their priority and then in order of arrival. It serializes SDK
+    calls on one connection, so that a control command waits only
+    for a call which is currently in progress, but not for queued
+    polling calls.
+    """
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._owner = None  # type: Optional[int]
+        self._depth = 0
+        self._waiters = []  # type: List[Tuple[int, int]]
+        self._counter = itertools.count()
+
+    @property
+    def waiting(self) -> int:
+        """Count of threads waiting for the lock"""
+        return len(self._waiters)
+
+    def acquire(self, priority: CallPriority = CallPriority.default) -> None:
+        """
+        Acquire the lock, block until it is available
+        :param priority: priority of the caller
+        :return:
+        """
+        me = threading.get_ident()
+        with self._cond:
+            if self._owner == me:
+                self._depth += 1
+                return
+
+            entry = (int(priority), next(self._counter))
+            heapq.heappush(self._waiters, entry)
+            while self._owner is not None or self._waiters[0] != entry:
+                self._cond.wait()
+
+            heapq.heappop(self._waiters)
+            self._owner, self._depth = me, 1
+
+    def release(self) -> None:
+        """Release the lock"""
+        with self._cond:
+            if self._owner != threading.get_ident():
+                raise RuntimeError('Cannot release un-acquired lock')
+
+            self._depth -= 1
+            if self._depth == 0:
+                self._owner = None
+                self._cond.notify_all()
+
+    @contextmanager
+    def __call__(self, priority: CallPriority = CallPriority.default):
+        """Context manager which holds the lock with given priority"""
+        self.acquire(priority)
+        try:
+            yield self
+        finally:
+            self.release()
+
+
+def synchronized(priority: CallPriority = CallPriority.default):
+    """Decorator for SDK implementation methods which holds `lock` of
+    SDK object with given priority during the call
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.lock(priority):
+                return func(self, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+BulkProgress = namedtuple(
+    'BulkProgress', ('batch', 'batches', 'rows_done', 'rows', 'elapsed', 'rows_per_second')
+)
+BulkProgress.__doc__ = """Progress of bulk operation, passed to progress callback
+after every written batch"""
+BulkProgress.batch.__doc__ = 'Index of just written batch starting from 0'
+BulkProgress.batches.__doc__ = 'Total count of batches'
+BulkProgress.rows_done.__doc__ = 'Count of rows (or filters) processed including skipped batches'
+BulkProgress.rows.__doc__ = 'Total count of rows (or filters)'
+BulkProgress.elapsed.__doc__ = 'Seconds elapsed since operation start'
+BulkProgress.rows_per_second.__doc__ = 'Throughput of current operation'
+
+
+class ZKSDKInterface(metaclass=ABCMeta):
+    """Interface of PULL SDK functions implementation. Objects of
+    `ZKAccess` and related classes depend on this interface, so SDK
+    backend can be replaced, e.g. by `EmulatedZKSDK`.
+
+    Function semantics, arguments and results are the same as in
+    PULL SDK. On SDK error an implementation raises `ZKSDKError`.
+
+    Implementations are thread-safe, calls are serialized by `lock`
+    according to their priority: `control_device` goes before
+    queued calls, `get_rt_log` goes after them.
+    """
+    #: DLL object if an implementation uses it, None otherwise
+    dll = None
+
+    #: Lock which serializes calls on a connection
+    lock = None  # type: PriorityLock
+
+    #: Connection handle. None if there is no active connection
+    handle = None
+
+    @property
+    def is_connected(self) -> bool:
+        """Return True if connection is active"""
+        return bool(self.handle is not None)
+
+    @abstractmethod
+    def connect(self, connstr: str) -> None:
+        """SDK: Connect()"""
+
+    @abstractmethod
+    def disconnect(self) -> None:
+        """SDK: Disconnect()"""
+
+    @abstractmethod
+    def control_device(self, operation, p1, p2, p3, p4, options_str='') -> int:
+        """SDK: ControlDevice()"""
+
+    @abstractmethod
+    def get_rt_log(self, buffer_size: int) -> Sequence[str]:
+        """SDK: GetRTLog()"""
+
+    @abstractmethod
+    def search_device(self, broadcast_address: str, buffer_size: int) -> Sequence[str]:
+        """SDK: SearchDevice()"""
+
+    @abstractmethod
+    def get_device_param(self, parameters: Sequence[str], buffer_size: int) -> Mapping[str, str]:
+        """SDK: GetDeviceParam()"""
+
+    @abstractmethod
+    def set_device_param(self, parameters: Mapping[str, Any]) -> None:
+        """SDK: SetDeviceParam()"""
+
+    @abstractmethod
+    def get_device_data(self,
+                        tablename: TableName,
+                        buffer_size: Optional[int] = None,
+                        data_filter: DeviceDataFilter = DeviceDataFilter(),
+                        fields: Optional[Sequence[str]] = None,
+                        options: str = '') -> List[Dict[str, Any]]:
+        """SDK: GetDeviceData()"""
+
+    def get_device_data_count(self,
+                              tablename: TableName,
+                              data_filter: DeviceDataFilter = DeviceDataFilter(),
+                              options: str = '') -> int:
+        """SDK: GetDeviceDataCount()
+
+        Default implementation counts rows returned by
+        `get_device_data`
+        """
+        return len(self.get_device_data(tablename, None, data_filter, options=options))
+
+    def iter_device_data(self,
+                         tablename: TableName,
+                         buffer_size: Optional[int] = None,
+                         data_filter: DeviceDataFilter = DeviceDataFilter(),
+                         fields: Optional[Sequence[str]] = None,
+                         options: str = '') -> Iterator[tuple]:
+        """SDK: GetDeviceData()
+
+        Same as `get_device_data`, but returns iterator over rows,
+        each row is a namedtuple with table fields. Default
+        implementation converts rows returned by `get_device_data`
+        """
+        rows = self.get_device_data(tablename, buffer_size, data_filter, fields, options)
+        if not rows:
+            return iter(())
+
+        row_class = _row_class(tuple(rows[0].keys()))
+        return (row_class._make(row.values()) for row in rows)
+
+    @abstractmethod
+    def set_device_data(self, tablename: TableName, data: List[Dict[str, Any]]) -> None:
+        """SDK: SetDeviceData()"""
+
+    @abstractmethod
+    def delete_device_data(self, tablename: TableName, data_filter: List[DeviceDataFilter]) -> None:
+        """SDK: DeleteDeviceData()"""
+
+    def set_device_data_bulk(self,
+                             tablename: TableName,
+                             data: Iterable[Mapping[str, Any]],
+                             batch_rows: int = 500,
+                             batch_bytes: int = 32 * 1024,
+                             progress: Optional[Callable[[BulkProgress], Any]] = None,
+                             start_batch: int = 0) -> None:
+        """
+        Write table rows by batches using `set_device_data`. Batches
+        are sent one by one, a batch is limited by rows count and
+        by the size of text sent to a device.
+
+        Batches are made the same way for the same data, so an
+        operation failed with `ZKSDKBatchError` may be resumed by
+        passing the same data and `start_batch=err.batch`.
+        :param tablename: the name of the table to set data to
+        :param data: rows to be written, each row is a dict with field
+         names as keys
+        :param batch_rows: maximum rows count in one batch
+        :param batch_bytes: maximum size in bytes of one batch text
+        :param progress: callback which is called with `BulkProgress`
+         after every written batch
+        :param start_batch: index of the first batch to be written,
+         previous batches are skipped
+        :raises ZKSDKBatchError: if a batch was failed
+        :return: None
+        """
+        batches = _split_batches(data, batch_rows, batch_bytes)
+        self._run_batches('SetDeviceData', self.set_device_data, tablename, batches,
+                          progress, start_batch)
+
+    def delete_device_data_bulk(self,
+                                tablename: TableName,
+                                data_filter: Iterable[DeviceDataFilter],
+                                batch_filters: int = 500,
+                                batch_bytes: int = 32 * 1024,
+                                progress: Optional[Callable[[BulkProgress], Any]] = None,
+                                start_batch: int = 0) -> None:
+        """
+        Delete table rows matched by many filters using
+        `delete_device_data`. Several filters are packed to one call,
+        the amount is limited by filters count and by the size of text
+        sent to a device. Resuming works as in `set_device_data_bulk`.
+        :param tablename: the name of the table to delete data from
+        :param data_filter: filters, each one matches a set of rows
+        :param batch_filters: maximum filters count in one batch
+        :param batch_bytes: maximum size in bytes of one batch text
+        :param progress: callback which is called with `BulkProgress`
+         after every processed batch
+        :param start_batch: index of the first batch to be processed,
+         previous batches are skipped
+        :raises ZKSDKBatchError: if a batch was failed
+        :return: None
+        """
+        batches = _split_batches(data_filter, batch_filters, batch_bytes, _filter_size)
+        self._run_batches('DeleteDeviceData', self.delete_device_data, tablename, batches,
+                          progress, start_batch)
+
+    @staticmethod
+    def _run_batches(func_name: str,
+                     func: Callable[[TableName, List[Any]], None],
+                     tablename: TableName,
+                     batches: List[List[Any]],
+                     progress: Optional[Callable[[BulkProgress], Any]],
+                     start_batch: int) -> None:
+        rows = sum(len(b) for b in batches)
+        rows_done = sum(len(b) for b in batches[:start_batch])
+        rows_started = rows_done
+        start = time.monotonic()
+
+        for i in range(start_batch, len(batches)):
+            try:
+                func(tablename, batches[i])
+            except ZKSDKError as e:
+                raise ZKSDKBatchError(
+                    '{} failed on batch {} of {}'.format(func_name, i, len(batches)),
+                    e.err, i, rows_done
+                ) from e
+            rows_done += len(batches[i])
+
+            if progress is not None:
+                elapsed = time.monotonic() - start
+                speed = (rows_done - rows_started) / elapsed if elapsed > 0 else 0.0
+                progress(BulkProgress(i, len(batches), rows_done, rows, elapsed, speed))
+
+
+class BufferPool:
+    """Pool of reusable c-string buffers which are passed to SDK
+    functions to be filled with results. Pool keeps one buffer per
+    kind of call, so every call reuses the buffer left by previous
+    call of the same kind instead of allocating and zeroing a new one.
+    A buffer is grown if a call requests bigger size.
+
+    A kept buffer which is `shrink_ratio` times bigger than requested
+    size is reallocated, so memory follows the real need.
+
+    Buffers are not protected from concurrent use, so a pool must be
+    used by one thread at a time.
+    """
+    shrink_ratio = 4
+
+    def __init__(self, max_size: Optional[int] = None):
+        """
+        :param max_size: Maximum total size in bytes of buffers kept
+         in pool. Buffers which don't fit in are allocated for one
+         call only. By default size is not limited
+        """
+        self.max_size = max_size
+        self._buffers = {}  # type: Dict[str, ctypes.Array]
+
+    @property
+    def size(self) -> int:
+        """Total size in bytes of buffers kept in pool"""
+        return sum(len(x) for x in self._buffers.values())
+
+    def acquire(self, kind: str, buffer_size: int) -> ctypes.Array:
+        """
+        Return a buffer for given kind of call which is at least
+        `buffer_size` long. Buffer contains an empty c-string
+        :param kind: kind of call, e.g. SDK function name
+        :param buffer_size: minimum buffer size in bytes
+        :return: ctypes char array
+        """
+        buf = self._buffers.get(kind)
+        if buf is not None and buffer_size <= len(buf) <= buffer_size * self.shrink_ratio:
+            buf[0] = b'\0'
+            return buf
+
+        buf = ctypes.create_string_buffer(buffer_size)
+        self._buffers.pop(kind, None)
+        if self.max_size is None or self.size + buffer_size <= self.max_size:
+            self._buffers[kind] = buf
+
+        return buf
+
+    def clear(self) -> None:
+        """Release all buffers"""
+        self._buffers.clear()
+
+
+class ZKSDK(ZKSDKInterface):
     """This is machinery class which directly calls SDK functions.
     This is a wrapper around DLL functions of SDK, it incapsulates
     working with ctypes, handles errors and holds connection info.
+
+    Buffers which accept results are taken from `buffer_pool` and
+    reused between calls. If a result does not fit in a buffer, the
+    call is repeated with a bigger buffer. Suitable buffer sizes are
+    remembered for every table of the connected device.
     """
-    def __init__(self, dllpath: str):
+    #: Minimum buffer size in bytes for table data
+    min_buffer_size = 4096
+
+    #: Maximum buffer size in bytes a buffer can grow to
+    max_buffer_size = 64 * 1024 * 1024
+
+    #: Estimated size in bytes of one table row. It is used to
+    #: calculate an initial buffer size from rows count
+    row_size_estimate = 128
+
+    def __init__(self, dllpath: str, buffer_pool_size: Optional[int] = None):
         """
         :param dllpath: path to a DLL file. Typically "plcommpro.dll"
+        :param buffer_pool_size: maximum total size in bytes of reusable
+         buffers. By default size is not limited
         """
+        self.lock = PriorityLock()
         self.dll = ctypes.WinDLL(dllpath)
         self.handle = None
+        self.buffer_pool = BufferPool(buffer_pool_size)
+        self._rt_log_buffer_size = 0
+        self._table_buffer_sizes = {}  # type: Dict[str, int]
 
-    @property
-    def is_connected(self) -> bool:
-        """Return True if connection is active"""
-        return bool(self.handle is not None)
-
+    @synchronized(CallPriority.default)
     def connect(self, connstr: str) -> None:
         """
         Connect to a device.
@@ -36,12 +555,17 @@ class ZKSDK:
         :return:
         """
         connstr = connstr.encode()
+        # Remembered buffer sizes may be wrong for another device
+        self._rt_log_buffer_size = 0
+        self._table_buffer_sizes.clear()
+
         self.handle = self.dll.Connect(connstr)
         if self.handle == 0:
             self.handle = None
             err = self.dll.PullLastError()
             raise ZKSDKError("Unable to connect a device using connstr {}".format(connstr), err)
 
+    @synchronized(CallPriority.default)
     def disconnect(self) -> None:
         """
         Disconnect from a device
@@ -55,6 +579,7 @@ class ZKSDK:
         self.dll.Disconnect(self.handle)
         self.handle = None
 
+    @synchronized(CallPriority.control)
     def control_device(self, operation, p1, p2, p3, p4, options_str='') -> int:
         """
         Perform an action on a device such as relay switching or reboot.
@@ -84,6 +609,7 @@ class ZKSDK:
 
         return err
 
+    @synchronized(CallPriority.poll)
     def get_rt_log(self, buffer_size: int) -> Sequence[str]:
         """
         Retrieve unread realtime events from a device
@@ -94,19 +620,28 @@ class ZKSDK:
         :raises ZKSDKError:
         :return: event string lines
         """
-        buf = ctypes.create_string_buffer(buffer_size)
+        # Events are removed from a device after reading, so the call
+        #  can be repeated only if SDK reported insufficient buffer
+        buffer_size = max(buffer_size, self._rt_log_buffer_size)
+        while True:
+            buf = self.buffer_pool.acquire('GetRTLog', buffer_size)
+            err = self.dll.GetRTLog(self.handle, buf, buffer_size)
+            if err != -3 or buffer_size >= self.max_buffer_size:
+                break
+            buffer_size = min(buffer_size * 2, self.max_buffer_size)
 
-        err = self.dll.GetRTLog(self.handle, buf, buffer_size)
         if err < 0:
             raise ZKSDKError('GetRTLog failed', err)
 
-        raw = buf.value.decode('utf-8')
-        if raw == '\r\n':
-            return []
+        value = buf.value
+        # Grow buffer for the next call if events filled its half
+        if len(value) * 2 > buffer_size:
+            buffer_size = min(buffer_size * 2, self.max_buffer_size)
+        self._rt_log_buffer_size = buffer_size
 
-        *lines, _ = raw.split('\r\n')
-        return lines
+        return _split_lines(value.decode('utf-8'))
 
+    @synchronized(CallPriority.default)
     def search_device(self, broadcast_address: str, buffer_size: int) -> Sequence[str]:
         """
         Perform network scan in order to collect available ZK devices
@@ -118,7 +653,7 @@ class ZKSDK:
         :raises ZKSDKError:
         :return: device string lines
         """
-        buf = ctypes.create_string_buffer(buffer_size)
+        buf = self.buffer_pool.acquire('SearchDevice', buffer_size)
         broadcast_address = broadcast_address.encode()
         protocol = b'UDP'  # Only UDP works, see SDK docs
 
@@ -126,12 +661,9 @@ class ZKSDK:
         if err < 0:
             raise ZKSDKError('SearchDevice failed', err)
 
-        raw = buf.value.decode('utf-8')
-        if raw == '\r\n':
-            return []
-        *lines, _ = raw.split("\r\n")
-        return lines
+        return _split_lines(buf.value.decode('utf-8'))
 
+    @synchronized(CallPriority.default)
     def get_device_param(self, parameters: Sequence[str], buffer_size: int) -> Mapping[str, str]:
         """
         Fetch given device parameters
@@ -144,7 +676,7 @@ class ZKSDK:
         :return: dict with requested parameters value. Each value is
          string
         """
-        buf = ctypes.create_string_buffer(buffer_size)
+        buf = self.buffer_pool.acquire('GetDeviceParam', buffer_size)
         results = {}
 
         # Device can return maximum 30 parameters for one call. See SDK
@@ -169,55 +701,139 @@ class ZKSDK:
             )
         return results
 
-    def get_device_data(self, tablename: TableName, buffer_size: int, data_filter: DeviceDataFilter = DeviceDataFilter()) -> List[Dict[str, Any]]:
+    @synchronized(CallPriority.default)
+    def get_device_data(self,
+                        tablename: TableName,
+                        buffer_size: Optional[int] = None,
+                        data_filter: DeviceDataFilter = DeviceDataFilter(),
+                        fields: Optional[Sequence[str]] = None,
+                        options: str = '') -> List[Dict[str, Any]]:
         """
         Fetch given device data
 
-        SDK: GetDevicecData()
+        If the data does not fit in a buffer, the call is repeated
+        with the buffer grown twice until `max_buffer_size`.
+
+        SDK: GetDeviceData()
         :param tablename: the name of the table to get data for ( string )
-        :param buffer_size: size in bytes of buffer which is filled
-         with contents
+        :param buffer_size: initial size in bytes of buffer which is
+         filled with contents. By default it is the size remembered
+         for the table on previous calls or it is calculated from
+         rows count
+        :param data_filter: filter of rows to be fetched
+        :param fields: field names to be fetched. By default all
+         fields are fetched
+        :param options: options string, see SDK docs
         :raises ZKSDKError:
         :return: list of dicts with requested table data. TODO: make
          this description better
         """
-        buf = ctypes.create_string_buffer(buffer_size)
-
-        query_table = ctypes.create_string_buffer(tablename.encode())
-
-        query_fieldname = ctypes.create_string_buffer(b"*")  # FIXME: add parameter for fieldname
-        data_filter_string = ctypes.create_string_buffer(data_filter.__str__().encode())
-        query_options = ctypes.create_string_buffer(b"")  # FIXME: add parameter for options
-
-        err = self.dll.GetDeviceData(
-            self.handle, buf, buffer_size,
-            query_table, query_fieldname, data_filter_string, query_options,
-        )
+        raw = self._get_device_data_raw(tablename, buffer_size, data_filter, fields, options)
+        return _parse_table(raw.decode('utf-8'))
+
+    @synchronized(CallPriority.default)
+    def iter_device_data(self,
+                         tablename: TableName,
+                         buffer_size: Optional[int] = None,
+                         data_filter: DeviceDataFilter = DeviceDataFilter(),
+                         fields: Optional[Sequence[str]] = None,
+                         options: str = '') -> Iterator[tuple]:
+        """
+        Fetch given device data and return iterator over its rows.
+        Rows are parsed lazily from a copy of SDK result, so memory
+        consumption does not depend on rows count except the result
+        itself.
+
+        SDK: GetDeviceData()
+        :param tablename: the name of the table to get data for
+        :param buffer_size: initial size in bytes of buffer which is
+         filled with contents. See `get_device_data`
+        :param data_filter: filter of rows to be fetched
+        :param fields: field names to be fetched. By default all
+         fields are fetched
+        :param options: options string, see SDK docs
+        :raises ZKSDKError:
+        :return: iterator over rows, each row is a namedtuple with
+         requested fields
+        """
+        raw = self._get_device_data_raw(tablename, buffer_size, data_filter, fields, options)
+        return _iter_table((raw,))
+
+    def _get_device_data_raw(self,
+                             tablename: TableName,
+                             buffer_size: Optional[int],
+                             data_filter: DeviceDataFilter,
+                             fields: Optional[Sequence[str]],
+                             options: str) -> bytes:
+        # Input strings are passed as bytes, ctypes passes a pointer
+        #  to their contents without copying
+        query_table = tablename.encode()
+        query_fieldname = _format_fields(fields).encode()
+        data_filter_string = str(data_filter).encode()
+        query_options = options.encode()
+
+        table_buffer_size = self._table_buffer_sizes.get(tablename)
+        if buffer_size is None:
+            buffer_size = table_buffer_size
+        if buffer_size is None:
+            count = self.get_device_data_count(tablename, data_filter, options)
+            buffer_size = _fit_buffer_size((count + 1) * self.row_size_estimate,
+                                           self.min_buffer_size,
+                                           self.max_buffer_size)
+
+        kind = 'GetDeviceData.{}'.format(tablename)
+        while True:
+            buf = self.buffer_pool.acquire(kind, buffer_size)
+            err = self.dll.GetDeviceData(
+                self.handle, buf, buffer_size,
+                query_table, query_fieldname, data_filter_string, query_options,
+            )
+            # Result which takes the whole buffer is probably truncated
+            truncated = err == -3 or (err >= 0 and len(buf.value) >= buffer_size - 1)
+            if not truncated:
+                break
+            if buffer_size >= self.max_buffer_size:
+                raise ZKSDKError(
+                    'GetDeviceData failed, data is bigger than {} bytes'.format(buffer_size), -3
+                )
+            buffer_size = min(buffer_size * 2, self.max_buffer_size)
 
         if err < 0:
             raise ZKSDKError('GetDeviceData failed', err)
 
-        results: List[Dict[str, Any]] = []
-
-        raw: str = buf.value.decode('utf-8')
-
-        if raw == '\r\n':
-            return []
+        value = buf.value
+        # Filtered or projected result is smaller than the whole
+        #  table, so the size can only grow in this case
+        fit_size = _fit_buffer_size(len(value) * 5 // 4, self.min_buffer_size, self.max_buffer_size)
+        if not (data_filter.data or fields or options) or fit_size > (table_buffer_size or 0):
+            self._table_buffer_sizes[tablename] = fit_size
 
-        lines = raw.split('\r\n')[:-1]
+        return value
 
-        fieldnames = lines[0].split(',')
-
-        for values_line in lines[1:]:
-            values = values_line.split(',')
+    @synchronized(CallPriority.default)
+    def get_device_data_count(self,
+                              tablename: TableName,
+                              data_filter: DeviceDataFilter = DeviceDataFilter(),
+                              options: str = '') -> int:
+        """
+        Return rows count in given device table
 
-            r = {}
-            for f, v in zip(fieldnames, values):
-                r[f] = v
-            results.append(r)
+        SDK: GetDeviceDataCount()
+        :param tablename: the name of the table
+        :param data_filter: filter of rows to be counted
+        :param options: options string, see SDK docs
+        :raises ZKSDKError:
+        :return: rows count
+        """
+        err = self.dll.GetDeviceDataCount(
+            self.handle, tablename.encode(), str(data_filter).encode(), options.encode()
+        )
+        if err < 0:
+            raise ZKSDKError('GetDeviceDataCount failed', err)
 
-        return results
+        return err
 
+    @synchronized(CallPriority.default)
     def set_device_data(self, tablename: TableName, data: List[Dict[str, Any]]) -> None:
         """
         Set given device data
@@ -229,19 +845,16 @@ class ZKSDK:
         :return: None
         """
 
-        p_tablename = ctypes.create_string_buffer(tablename.encode())
-
-        # TODO: make this less ugly
-        newdata = "\r\n".join(["\t".join([f"{k}={v}" for k, v in line.items()]) for line in data])
-
-        p_data = ctypes.create_string_buffer(newdata.encode())
-        p_options = ctypes.create_string_buffer(b"")  # FIXME: add parameter for options
+        p_tablename = tablename.encode()
+        p_data = _format_rows(data).encode()
+        p_options = b""  # FIXME: add parameter for options
 
         err = self.dll.SetDeviceData(self.handle, p_tablename, p_data, p_options)
 
         if err < 0:
             raise ZKSDKError('SetDeviceData failed', err)
 
+    @synchronized(CallPriority.default)
     def delete_device_data(self, tablename: TableName, data_filter: List[DeviceDataFilter]) -> None:
         """
         Delete given device data
@@ -253,19 +866,16 @@ class ZKSDK:
         :return: None
         """
 
-        p_tablename = ctypes.create_string_buffer(tablename.encode())
-
-        # TODO: make this less ugly
-        data_filter_string = "\r\n".join([f.__str__() for f in data_filter])
-
-        p_data_filter = ctypes.create_string_buffer(data_filter_string.encode())
-        p_options = ctypes.create_string_buffer(b"")  # FIXME: add parameter for options
+        p_tablename = tablename.encode()
+        p_data_filter = _format_filters(data_filter).encode()
+        p_options = b""  # FIXME: add parameter for options
 
         err = self.dll.DeleteDeviceData(self.handle, p_tablename, p_data_filter, p_options)
 
         if err < 0:
             raise ZKSDKError('DeleteDeviceData failed', err)
 
+    @synchronized(CallPriority.default)
     def set_device_param(self, parameters: Mapping[str, Any]) -> None:
         """
         Set given device parameters
@@ -0,0 +1,140 @@
+import asyncio
+import threading
+
+import pytest
+
+from pyzkaccess.aio import AsyncEventLog, AsyncParameters, AsyncProxy, AsyncZKAccess
+from pyzkaccess.data import User
+from pyzkaccess.device import ZK200
+from pyzkaccess.emulator import EmulatedDevice, EmulatedZKSDK
+from pyzkaccess.event import Event
+
+
+def _run(coro):
+    return asyncio.new_event_loop().run_until_complete(coro)
+
+
+class TestAsyncZKAccess:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.device = EmulatedDevice(device_model=ZK200, serial_number='test serial')
+        self.sdk = EmulatedZKSDK(self.device)
+        self.t = AsyncZKAccess(connstr='passwd=', sdk=self.sdk, device_model=ZK200)
+
+    def test_init__should_not_connect(self):
+        assert self.sdk.is_connected is False
+
+    def test_aenter__should_connect_and_disconnect_on_exit(self):
+        async def go():
+            async with self.t:
+                assert self.sdk.is_connected is True
+
+        _run(go())
+
+        assert self.sdk.is_connected is False
+
+    def test_connect__if_connstr_is_not_set__should_raise_error(self):
+        obj = AsyncZKAccess(sdk=self.sdk)
+
+        with pytest.raises(ValueError):
+            _run(obj.connect())
+
+    def test_blocking_methods__should_run_in_executor_thread(self):
+        threads = []
+        self.sdk.control_device = lambda *a: threads.append(threading.get_ident()) or 0
+
+        async def go():
+            async with self.t as zk:
+                await zk.doors[0].relays.switch_on(5)
+                await zk.restart()
+
+        _run(go())
+
+        assert len(threads) == 3  # two relays of door 1 and restart
+        assert threading.get_ident() not in threads
+
+    def test_properties__should_be_wrapped(self):
+        assert isinstance(self.t.events, AsyncEventLog)
+        assert isinstance(self.t.parameters, AsyncParameters)
+        assert isinstance(self.t.doors[1].parameters, AsyncParameters)
+        assert isinstance(self.t.doors[0], AsyncProxy)
+        assert len(self.t.relays) == 4
+        assert [x.number for x in self.t.readers] == [1, 2]
+
+    def test_parameters__should_be_read_and_written(self):
+        async def go():
+            async with self.t as zk:
+                await zk.parameters.write(netmask='255.0.0.0')
+                return await zk.parameters.read('serial_number', 'netmask')
+
+        res = _run(go())
+
+        assert res == {'serial_number': 'test serial', 'netmask': '255.0.0.0'}
+
+    def test_parameters__if_accessed_as_attribute__should_raise_error(self):
+        with pytest.raises(AttributeError):
+            _ = self.t.parameters.serial_number
+
+    @pytest.mark.parametrize('name', ('device', 'iter_data'))
+    def test_getattr__if_attribute_makes_sync_requests__should_raise_error(self, name):
+        with pytest.raises(AttributeError):
+            getattr(self.t, name)
+
+    def test_table_data__should_be_written_and_read(self):
+        async def go():
+            async with self.t as zk:
+                await zk.add_users([User(Pin=1, CardNo=123)])
+                return await zk.get_all_users(fields=['Pin', 'CardNo'])
+
+        res = _run(go())
+
+        assert [(x.Pin, x.CardNo) for x in res] == [(1, 123)]
+
+    def test_events_stream__should_yield_new_filtered_events(self):
+        events = ['2000-02-02 15:09:10,0,7125793,1,27,2,0',
+                  '2000-02-02 15:09:11,0,7125794,2,27,2,0',
+                  '2000-02-02 15:09:12,0,7125795,1,27,2,0']
+
+        async def go():
+            res = []
+            async with self.t as zk:
+                for event in events:
+                    self.device.add_event(event)
+                async for event in zk.doors[0].events.stream(polling_interval=.01):
+                    res.append(event)
+                    if len(res) == 2:
+                        break
+            return res
+
+        res = _run(go())
+
+        assert res == [Event(events[0]), Event(events[2])]
+
+    def test_events_only__should_return_async_log(self):
+        events = ['2000-02-02 15:09:10,0,7125793,1,27,2,0',
+                  '2000-02-02 15:09:11,0,7125794,2,27,2,0',
+                  '2000-02-02 15:09:12,0,7125795,1,27,2,0']
+
+        async def go():
+            res = []
+            async with self.t as zk:
+                log = zk.events.only(door=1)
+                self.device.add_event(events[0])
+                refreshed = await log.refresh()
+                for event in events[1:]:
+                    self.device.add_event(event)
+                async for event in log.stream(polling_interval=.01):
+                    res.append(event)
+                    break
+            return log, refreshed, res
+
+        log, refreshed, res = _run(go())
+
+        assert isinstance(log, AsyncEventLog)
+        assert refreshed == [Event(events[0])]
+        assert res == [Event(events[2])]
+
+    def test_search_devices__should_return_devices(self):
+        res = _run(AsyncZKAccess.search_devices(sdk=self.sdk))
+
+        assert [x.serial_number for x in res] == ['test serial']
@@ -0,0 +1,200 @@
+import os
+import stat
+import threading
+from unittest.mock import patch, Mock
+
+import pytest
+
+from pyzkaccess.checkpoint import Checkpoint, CheckpointedConsumer, SequencedEvent
+from pyzkaccess.event import Event, EventLog
+from pyzkaccess.journal import EventJournal
+
+
+class TestCheckpoint:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.path = str(tmp_path / 'events.offset')
+
+    def test_init__if_file_not_exists__should_start_from_zero(self):
+        obj = Checkpoint(self.path)
+
+        assert obj.offset == 0
+        assert not os.path.exists(self.path)
+
+    def test_commit__should_write_offset_to_file(self):
+        Checkpoint(self.path).commit(15)
+
+        assert Checkpoint(self.path).offset == 15
+        assert os.listdir(os.path.dirname(self.path)) == ['events.offset']
+
+    def test_commit__should_sync_directory_after_rename(self):
+        obj = Checkpoint(self.path)
+        synced = []
+
+        def fsync(fd):
+            synced.append(os.path.exists(self.path) and stat.S_ISDIR(os.fstat(fd).st_mode))
+
+        with patch('pyzkaccess.checkpoint.os.fsync', side_effect=fsync):
+            obj.commit(5)
+
+        assert synced == [False, True]
+
+    def test_commit__if_writing_failed__should_keep_previous_offset(self):
+        obj = Checkpoint(self.path)
+        obj.commit(5)
+
+        with patch('pyzkaccess.checkpoint.os.fsync', side_effect=OSError('disk error')):
+            with pytest.raises(OSError):
+                obj.commit(10)
+
+        assert obj.offset == 5
+        assert Checkpoint(self.path).offset == 5
+
+
+class TestCheckpointedConsumer:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.sdk = Mock()
+        self.journal_path = str(tmp_path / 'events.journal')
+        self.checkpoint_path = str(tmp_path / 'events.offset')
+        self.lines = [
+            '2000-02-02 15:09:{:02},0,{},{},27,2,0'.format(i, 7125793 + i, i % 2 + 1)
+            for i in range(10)
+        ]
+        self.events = [Event(x) for x in self.lines]
+        self.journal = EventJournal(self.journal_path)
+        self.log = EventLog(self.sdk, 4096, journal=self.journal)
+        self.delivered = []
+        yield
+        self.journal.close()
+
+    def sink(self, items):
+        self.delivered.extend(items)
+
+    def pull(self, lines):
+        self.sdk.get_rt_log.side_effect = (lines, [])
+
+    def test_init__if_log_has_no_journal__should_raise_error(self):
+        with pytest.raises(ValueError):
+            CheckpointedConsumer(EventLog(self.sdk, 4096), self.checkpoint_path)
+
+    def test_poll__should_deliver_events_with_sequence_numbers(self):
+        obj = CheckpointedConsumer(self.log, self.checkpoint_path)
+        self.pull(self.lines[:4])
+
+        res = obj.poll(self.sink)
+
+        assert res == 4
+        assert self.delivered == [SequencedEvent(i, self.events[i]) for i in range(4)]
+        assert obj.offset == 4
+        assert Checkpoint(self.checkpoint_path).offset == 4
+
+    def test_poll__should_deliver_by_batches(self):
+        obj = CheckpointedConsumer(self.log, self.checkpoint_path)
+        self.pull(self.lines)
+        sink = Mock(return_value=None)
+
+        obj.poll(sink, batch_size=4)
+
+        assert [len(x[0][0]) for x in sink.call_args_list] == [4, 4, 2]
+        assert obj.offset == 10
+
+    def test_poll__if_log_is_filtered__should_deliver_matched_events_and_move_offset(self):
+        obj = CheckpointedConsumer(self.log.only(door=1), self.checkpoint_path)
+        self.pull(self.lines)
+
+        obj.poll(self.sink)
+
+        assert [x.seq for x in self.delivered] == [0, 2, 4, 6, 8]
+        assert obj.offset == 10
+
+    def test_poll__if_sink_acknowledged_part_of_events__should_commit_acknowledged_offset(self):
+        obj = CheckpointedConsumer(self.log, self.checkpoint_path)
+        self.pull(self.lines[:5])
+
+        obj.poll(Mock(return_value=3))
+
+        assert obj.offset == 3
+        self.pull([])
+        obj.poll(self.sink)
+        assert [x.seq for x in self.delivered] == [3, 4]
+
+    def test_poll__if_sink_raised_error__should_not_move_offset(self):
+        obj = CheckpointedConsumer(self.log, self.checkpoint_path)
+        self.pull(self.lines[:3])
+
+        with pytest.raises(RuntimeError):
+            obj.poll(Mock(side_effect=RuntimeError('backend is down')))
+
+        assert obj.offset == 0
+        self.pull([])
+        obj.poll(self.sink)
+        assert [x.seq for x in self.delivered] == [0, 1, 2]
+
+    def test_deliver__if_acknowledged_offset_is_wrong__should_raise_error(self):
+        obj = CheckpointedConsumer(self.log, self.checkpoint_path)
+        self.pull(self.lines[:3])
+        self.log.refresh()
+
+        with pytest.raises(ValueError):
+            obj.deliver(Mock(return_value=4))
+
+    def test_poll__if_events_repeated__should_skip_duplicates(self):
+        obj = CheckpointedConsumer(self.log, self.checkpoint_path)
+        self.pull(self.lines[:4])
+        obj.poll(self.sink)
+        self.pull(self.lines[2:6] + self.lines[5:6])
+
+        obj.poll(self.sink)
+
+        assert [x.event for x in self.delivered] == self.events[:6]
+        assert obj.offset == 9
+
+    def test_init__if_restarted__should_resume_from_committed_offset_and_skip_duplicates(self):
+        obj = CheckpointedConsumer(self.log, self.checkpoint_path)
+        self.pull(self.lines[:4])
+        obj.poll(self.sink)
+        self.pull(self.lines[4:6])
+        self.log.refresh()
+        self.journal.close()
+
+        journal = EventJournal(self.journal_path)
+        log = EventLog(self.sdk, 4096, journal=journal)
+        obj = CheckpointedConsumer(log, self.checkpoint_path)
+        self.pull(self.lines[3:8])
+        obj.poll(self.sink)
+        journal.close()
+
+        assert [x.event for x in self.delivered] == self.events[:8]
+        assert [x.seq for x in self.delivered][4:] == [4, 5, 9, 10]
+
+    def test_commit__should_sync_journal_before_checkpoint(self):
+        journal = EventJournal(self.journal_path + '2', sync_interval=None)
+        obj = CheckpointedConsumer(EventLog(self.sdk, 4096, journal=journal), self.checkpoint_path)
+        self.pull(self.lines[:2])
+
+        obj.poll(self.sink)
+
+        assert journal.synced == 2
+        journal.close()
+
+    def test_init__if_checkpoint_is_beyond_journal__should_move_it_to_journal_end(self):
+        Checkpoint(self.checkpoint_path).commit(100)
+
+        obj = CheckpointedConsumer(self.log, self.checkpoint_path)
+
+        assert obj.offset == 0
+
+    def test_run__should_poll_until_stopped(self):
+        obj = CheckpointedConsumer(self.log, self.checkpoint_path)
+        stop = threading.Event()
+        self.sdk.get_rt_log.side_effect = [self.lines[:2], [], self.lines[2:3], []] + [[]] * 100
+
+        def sink(items):
+            self.sink(items)
+            if len(self.delivered) == 3:
+                stop.set()
+
+        obj.run(sink, polling_interval=0.01, stop=stop)
+
+        assert [x.event for x in self.delivered] == self.events[:3]
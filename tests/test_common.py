@@ -2,7 +2,7 @@ from copy import copy, deepcopy
 
 import pytest
 
-from pyzkaccess.common import DocValue, DocDict
+from pyzkaccess.common import DocValue, DocDict, parse_connstr
 
 
 class TestDocValue:
@@ -64,3 +64,13 @@ class TestDocDict:
         assert obj['2'].__doc__ == 'second value'
         assert type(obj['2']) == DocValue
         assert obj.keys() == {1, '2'}
+
+
+class TestParseConnstr:
+    def test_parse_connstr__should_return_dict(self):
+        res = parse_connstr('protocol=TCP,ipaddress=192.168.1.201,port=4370,timeout=4000,passwd=')
+
+        assert res == {
+            'protocol': 'TCP', 'ipaddress': '192.168.1.201', 'port': '4370', 'timeout': '4000',
+            'passwd': ''
+        }
@@ -0,0 +1,238 @@
+import time
+from datetime import datetime
+
+import pytest
+
+from pyzkaccess import ZKAccess
+from pyzkaccess.common import DeviceDataFilter, datetime_to_zkctime
+from pyzkaccess.data import User
+from pyzkaccess.device import ZK100, ZK400
+from pyzkaccess.emulator import EmulatedDevice, EmulatedZKSDK
+from pyzkaccess.event import Event
+from pyzkaccess.exceptions import ZKSDKError
+
+
+class TestEmulatedDevice:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.t = EmulatedDevice()
+
+    @pytest.mark.parametrize('model,doors_count', ((ZK400, '4'), (ZK100, '1')))
+    def test_init__should_initialize_parameters_for_model(self, model, doors_count):
+        obj = EmulatedDevice(device_model=model)
+
+        assert obj.parameters['LockCount'] == doors_count
+        assert all('Door{}Drivertime'.format(x) in obj.parameters for x in model.doors_def)
+
+    def test_get_parameters__should_skip_unknown_parameters(self):
+        res = self.t.get_parameters(['LockCount', 'Unknown', 'ComPwd'])
+
+        assert res == 'LockCount=4,ComPwd='
+
+    def test_set_parameters__if_datetime_passed__should_shift_device_time(self):
+        self.t.set_parameters('DateTime={}'.format(datetime_to_zkctime(datetime(2010, 1, 1))))
+
+        assert abs((self.t.now() - datetime(2010, 1, 1)).total_seconds()) < 2
+
+    def test_set_parameters__if_bad_string__should_raise_error(self):
+        with pytest.raises(ZKSDKError):
+            self.t.set_parameters('NetMask')
+
+    def test_add_event__should_append_event_and_transaction(self):
+        self.t.add_event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+
+        assert list(self.t.events) == ['2000-02-02 15:09:10,0,7125793,1,27,2,0']
+        assert self.t.tables['transaction'] == [{
+            'Cardno': '7125793', 'Pin': '0', 'Verified': '0', 'DoorID': '1', 'EventType': '27',
+            'InOutState': '2',
+            'Time_second': str(datetime_to_zkctime(datetime(2000, 2, 2, 15, 9, 10)))
+        }]
+
+    def test_pop_events__should_return_and_clear_events(self):
+        self.t.add_event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+
+        assert self.t.pop_events() == ['2000-02-02 15:09:10,0,7125793,1,27,2,0']
+        assert len(self.t.events) == 0
+
+    def test_init__if_event_queue_size_set__should_drop_oldest_events(self):
+        obj = EmulatedDevice(event_queue_size=1)
+
+        obj.add_event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+        obj.add_event('2000-02-02 15:09:11,0,7125794,1,27,2,0')
+
+        assert obj.pop_events() == ['2000-02-02 15:09:11,0,7125794,1,27,2,0']
+
+    def test_set_data__if_key_exists__should_replace_row(self):
+        self.t.set_data('user', 'Pin=1\tCardNo=123\r\nPin=2\tCardNo=456')
+
+        self.t.set_data('user', 'Pin=1\tCardNo=789')
+
+        assert self.t.tables['user'] == [{'Pin': '1', 'CardNo': '789'},
+                                         {'Pin': '2', 'CardNo': '456'}]
+
+    def test_set_data__if_unknown_field__should_raise_error(self):
+        with pytest.raises(ZKSDKError) as e:
+            self.t.set_data('user', 'Pin=1\tUnknown=2')
+
+        assert e.value.err == -101
+
+    def test_get_data__if_fields_passed__should_return_only_them(self):
+        self.t.set_data('user', 'Pin=1\tCardNo=123\r\nPin=2\tCardNo=456')
+
+        res = self.t.get_data('user', 'CardNo\tPin')
+
+        assert res == 'CardNo,Pin\r\n123,1\r\n456,2\r\n'
+
+    def test_get_data__if_table_is_empty__should_return_header(self):
+        res = self.t.get_data('holiday')
+
+        assert res == 'Holiday,HolidayType,Loop\r\n'
+
+    def test_delete_data__if_filter_is_empty__should_delete_all_rows(self):
+        self.t.set_data('user', 'Pin=1\tCardNo=123\r\nPin=2\tCardNo=456')
+
+        self.t.delete_data('user', '')
+
+        assert self.t.tables['user'] == []
+
+
+class TestEmulatedZKSDK:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.device = EmulatedDevice()
+        self.t = EmulatedZKSDK(self.device, seed=1)
+
+    def test_init__should_be_disconnected(self):
+        assert self.t.is_connected is False
+        assert self.t.dll is None
+
+    def test_connect__should_keep_connected(self):
+        self.t.connect('protocol=TCP,ipaddress=192.168.1.201,port=4370,timeout=4000,passwd=')
+
+        assert self.t.is_connected is True
+
+    def test_connect__if_password_is_wrong__should_raise_error(self):
+        with pytest.raises(ZKSDKError) as e:
+            self.t.connect('protocol=TCP,ipaddress=192.168.1.201,port=4370,passwd=123')
+
+        assert e.value.err == -14
+        assert self.t.is_connected is False
+
+    def test_call__if_not_connected__should_raise_error(self):
+        with pytest.raises(ZKSDKError) as e:
+            self.t.get_device_param(['LockCount'], 4096)
+
+        assert e.value.err == -8
+
+    def test_call__if_latency_set__should_delay_calls(self):
+        obj = EmulatedZKSDK(self.device, latency=(.1, .2))
+        obj.connect('passwd=')
+        start = time.monotonic()
+
+        obj.get_device_param(['LockCount'], 4096)
+
+        assert .1 <= time.monotonic() - start < .5
+
+    def test_get_rt_log__if_event_rate_set__should_generate_events(self):
+        obj = EmulatedZKSDK(self.device, event_rate=1000, seed=1)
+        obj.connect('passwd=')
+        time.sleep(.1)
+
+        res = obj.get_rt_log(4096)
+
+        assert 50 < len(res) < 200
+        assert all(Event(x).door in (1, 2, 3, 4) for x in res)
+
+    def test_get_rt_log__if_event_rate_is_not_set__should_return_door_status_event(self):
+        self.t.connect('passwd=')
+
+        res = self.t.get_rt_log(4096)
+
+        assert len(res) == 1 and Event(res[0]).event_type == 255
+
+    def test_device_data__should_be_written_read_and_deleted(self):
+        self.t.connect('passwd=')
+        data_filter = DeviceDataFilter()
+        data_filter.add_condition('Pin', '1')
+
+        self.t.set_device_data('user', [{'Pin': '1', 'CardNo': '123'},
+                                        {'Pin': '2', 'CardNo': '456'}])
+        res1 = self.t.get_device_data('user', 4096, data_filter)
+        self.t.delete_device_data('user', [data_filter])
+        res2 = self.t.get_device_data('user', 4096)
+
+        assert [x['CardNo'] for x in res1] == ['123']
+        assert [x['CardNo'] for x in res2] == ['456']
+
+    def test_get_device_data_count__should_return_rows_count(self):
+        self.t.connect('passwd=')
+        self.device.set_data('user', 'Pin=1\tCardNo=123\r\nPin=2\tCardNo=456')
+
+        assert self.t.get_device_data_count('user') == 2
+
+    def test_iter_device_data__should_return_namedtuples(self):
+        self.t.connect('passwd=')
+        self.device.set_data('user', 'Pin=1\tCardNo=123\r\nPin=2\tCardNo=456')
+
+        res = list(self.t.iter_device_data('user'))
+
+        assert [(x.Pin, x.CardNo) for x in res] == [('1', '123'), ('2', '456')]
+
+    def test_get_device_data__if_fields_passed__should_return_only_them(self):
+        self.t.connect('passwd=')
+        self.device.set_data('user', 'Pin=1\tCardNo=123')
+
+        res = self.t.get_device_data('user', fields=['Pin', 'CardNo'])
+
+        assert res == [{'Pin': '1', 'CardNo': '123'}]
+
+    def test_get_device_data__if_unknown_table__should_raise_error(self):
+        self.t.connect('passwd=')
+
+        with pytest.raises(ZKSDKError) as e:
+            self.t.get_device_data('!@*&$G^*OIL', 4096)
+
+        assert e.value.err == -100
+
+    def test_zkaccess__should_work_with_emulated_sdk(self):
+        with ZKAccess(connstr='passwd=', sdk=self.t, device_model=ZK400) as zk:
+            zk.parameters.netmask = '255.0.0.0'
+            zk.doors[0].relays.switch_on(5)
+            self.device.add_event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+            zk.events.refresh()
+
+            assert zk.parameters.netmask == '255.0.0.0'
+            assert zk.doors[0].events[0] == Event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+            assert ZKAccess.search_devices(sdk=self.t)[0].serial_number == 'DGD9190019050335134'
+
+    def test_zkaccess__should_add_users_by_batches(self):
+        progress = []
+        users = [User(Pin=x, CardNo=x * 10) for x in range(1, 601)]
+
+        with ZKAccess(connstr='passwd=', sdk=self.t, device_model=ZK400) as zk:
+            zk.add_users(users, progress=progress.append)
+
+        assert len(self.device.tables['user']) == 600
+        assert [p.rows_done for p in progress] == [500, 600]
+
+    def test_zkaccess__should_delete_users_with_their_authorizations(self):
+        self.device.set_data('user', 'Pin=1\r\nPin=2\r\nPin=3')
+        self.device.set_data('userauthorize', 'Pin=1\tAuthorizeDoorId=1\r\n'
+                                              'Pin=2\tAuthorizeDoorId=1\r\n'
+                                              'Pin=3\tAuthorizeDoorId=1')
+
+        with ZKAccess(connstr='passwd=', sdk=self.t, device_model=ZK400) as zk:
+            zk.delete_users([1, 3])
+
+        assert self.device.tables['user'] == [{'Pin': '2'}]
+        assert self.device.tables['userauthorize'] == [{'Pin': '2', 'AuthorizeDoorId': '1'}]
+
+    def test_zkaccess__should_read_users_with_given_fields(self):
+        self.device.set_data('user', 'Pin=1\tCardNo=123\tPassword=pw\r\nPin=2\tCardNo=456')
+
+        with ZKAccess(connstr='passwd=', sdk=self.t, device_model=ZK400) as zk:
+            res = zk.get_all_users(fields=['Pin', 'CardNo'])
+
+        assert [(x.Pin, x.CardNo, x.Password) for x in res] == [(1, 123, None), (2, 456, None)]
+
+        assert self.t.is_connected is False
@@ -1,13 +1,25 @@
+import sys
 import time
 from collections import deque
-from datetime import datetime
+from datetime import datetime, timedelta
 from unittest.mock import patch, Mock
 
 import pytest
 
 from pyzkaccess.common import DocValue
 from pyzkaccess.enum import PassageDirection, VerifyMode
-from pyzkaccess.event import Event, EventLog
+from pyzkaccess.event import (
+    AdaptiveInterval,
+    Between,
+    ColumnarEventStorage,
+    DedupWindow,
+    Event,
+    EventLog,
+    LazyEvent,
+    RetentionPolicy,
+    _LogIndex,
+    _compile_filters
+)
 
 
 class TestEvent:
@@ -48,6 +60,43 @@ class TestEvent:
         with pytest.raises(ValueError):
             Event(device_string)
 
+    @pytest.mark.parametrize('event_string', (
+        '2000-02-0x 15:09:10,0,7125793,1,27,2,0',
+        '2000-13-02 15:09:10,0,7125793,1,27,2,0',
+        '2000/02/02 15:09:10,0,7125793,1,27,2,0',
+        '2000-02-02 15:09:10,0,7125793,1,27,5,0',
+        '2000-02-02 15:09:10,0,7125793,1,27,2,5',
+    ))
+    def test_init__if_fields_are_incorrect__should_raise_error(self, event_string):
+        with pytest.raises(ValueError):
+            Event(event_string)
+
+    def test_init__if_time_is_not_zero_padded__should_parse_it(self):
+        obj = Event('2000-2-2 15:09:10,0,7125793,1,27,2,0')
+
+        assert obj.time == datetime(2000, 2, 2, 15, 9, 10)
+
+    def test_init__should_share_event_type_and_enum_objects(self):
+        obj1 = Event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+        obj2 = Event('2000-02-02 15:09:11,0,7125794,2,27,2,0')
+
+        assert obj1.event_type is obj2.event_type
+        assert obj1.entry_exit is obj2.entry_exit is PassageDirection(2)
+        assert obj1.verify_mode is obj2.verify_mode
+
+    def test_parse_batch__should_return_events_equal_to_parsed_one_by_one(self):
+        lines = ['2000-02-02 15:09:10,0,7125793,1,27,2,0\r\n',
+                 '2000-02-02 15:09:11,0,7125794,2,8,1,200']
+
+        res = Event.parse_batch(lines)
+
+        assert res == [Event(x) for x in lines]
+        assert all(type(x) == Event for x in res)
+
+    def test_parse_batch__if_line_is_incorrect__should_raise_error(self):
+        with pytest.raises(ValueError):
+            Event.parse_batch(['2000-02-02 15:09:10,0,7125793,1,27,2,0', 'wrong_string'])
+
     def test_description__should_return_name_of_class(self):
         obj = Event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
 
@@ -63,6 +112,116 @@ class TestEvent:
 
         assert repr(obj).startswith('Event(')
 
+    def test_hash__if_events_are_equal__should_be_equal(self):
+        line = '2000-02-02 15:09:10,0,7125793,1,27,2,0'
+        storage = ColumnarEventStorage()
+        storage.append(Event(line))
+        objs = [Event(line), LazyEvent(line), storage[0], Event.parse_batch([line])[0]]
+
+        assert len(set(objs)) == 1
+        assert all(x == objs[0] and hash(x) == hash(objs[0]) for x in objs)
+
+    @pytest.mark.parametrize('other', (
+        '2000-02-02 15:09:11,0,7125793,1,27,2,0',
+        '2000-02-02 15:09:10,1,7125793,1,27,2,0',
+        '2000-02-02 15:09:10,0,7125794,1,27,2,0',
+        '2000-02-02 15:09:10,0,7125793,2,27,2,0',
+        '2000-02-02 15:09:10,0,7125793,1,26,2,0',
+        '2000-02-02 15:09:10,0,7125793,1,27,1,0',
+        '2000-02-02 15:09:10,0,7125793,1,27,2,1',
+    ))
+    def test_eq__if_any_field_differs__should_return_false(self, other):
+        obj = Event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+
+        assert obj != Event(other)
+        assert obj != LazyEvent(other)
+        assert len({obj, Event(other)}) == 2
+
+    def test_eq__if_fingerprints_collide__should_compare_fields(self):
+        obj1 = Event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+        obj2 = Event('2000-02-02 15:09:11,0,7125793,1,27,2,0')
+        obj2._fingerprint = obj1.fingerprint
+
+        assert obj1 != obj2
+
+    def test_eq__if_other_is_not_event__should_return_false(self):
+        obj = Event('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+
+        assert obj != '2000-02-02 15:09:10,0,7125793,1,27,2,0'
+
+
+class TestLazyEvent:
+    def test_init__should_not_decode_fields(self):
+        with patch('pyzkaccess.event._parse_time') as parse_time_mock:
+            obj = LazyEvent('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+
+            assert obj.door == 1
+            parse_time_mock.assert_not_called()
+
+    @pytest.mark.parametrize('event_string', (
+        '2000-02-02 15:09:10,0,7125793,1,27,2,0\r\n',
+        '2000-02-02 15:09:10,0,7125793,1,27,2,0'
+    ))
+    def test_fields__should_be_decoded_on_access(self, event_string):
+        obj = LazyEvent(event_string)
+
+        assert obj.time == datetime(2000, 2, 2, 15, 9, 10)
+        assert obj.pin == '0'
+        assert obj.card == '7125793'
+        assert obj.door == 1
+        assert obj.event_type == 27 and type(obj.event_type) == DocValue
+        assert obj.entry_exit == PassageDirection(2)
+        assert obj.verify_mode == VerifyMode(0)
+
+    def test_fields__should_be_cached(self):
+        obj = LazyEvent('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+
+        assert obj.time is obj.time
+
+    def test_fields__should_be_settable(self):
+        obj = LazyEvent('2000-02-02 15:09:10,0,7125793,1,27,2,0')
+
+        obj.door = 3
+
+        assert obj.door == 3
+
+    @pytest.mark.parametrize('event_string', (
+        '2000-02-02 15:09:10,0,7125793,1,27,2',
+        'wrong_string',
+        ''
+    ))
+    def test_init__if_fields_count_is_incorrect__should_raise_error(self, event_string):
+        with pytest.raises(ValueError):
+            LazyEvent(event_string)
+
+    def test_field__if_value_is_incorrect__should_raise_error_on_access(self):
+        obj = LazyEvent('2000-02-02 15:09:10,0,7125793,1,27,2,5')
+
+        assert obj.door == 1
+        with pytest.raises(ValueError):
+            _ = obj.verify_mode
+
+    def test_eq__should_compare_with_event_by_values(self):
+        line = '2000-02-02 15:09:10,0,7125793,1,27,2,0'
+
+        assert LazyEvent(line) == Event(line)
+        assert Event(line) == LazyEvent(line)
+        assert LazyEvent(line) != Event('2000-02-02 15:09:10,0,7125793,2,27,2,0')
+
+    def test_str__should_be_equal_to_event_str(self):
+        line = '2000-02-02 15:09:10,0,7125793,1,27,2,0'
+
+        assert str(LazyEvent(line)) == str(Event(line))
+        assert LazyEvent(line).description == Event(line).description
+
+    def test_parse_batch__should_return_lazy_events(self):
+        lines = ['2000-02-02 15:09:10,0,7125793,1,27,2,0', '2000-02-02 15:09:11,0,7125794,2,8,1,200']
+
+        res = LazyEvent.parse_batch(lines)
+
+        assert all(type(x) == LazyEvent for x in res)
+        assert res == [Event(x) for x in lines]
+
 
 class TestEventLog:
     @pytest.fixture(autouse=True)
@@ -127,7 +286,7 @@ class TestEventLog:
              Event('2000-02-02 15:09:10,0,7125793,1,27,2,0'), )
         ),
     ))
-    def test_refresh__if_device_has_returned_events_and_maxlen_is_set__should_append_data_and_return_count_of_fetched_records(  # noqa
+    def test_refresh__if_device_has_returned_events_and_maxlen_is_set__should_append_data_and_return_fetched_records(  # noqa
             self, initial, events_str, expect
     ):
         self.sdk.get_rt_log.side_effect = [events_str, []]
@@ -136,7 +295,7 @@ class TestEventLog:
         res = obj.refresh()
 
         assert tuple(obj.data) == expect
-        assert res == len(events_str)
+        assert res == [Event(x) for x in events_str]
 
     @pytest.mark.parametrize('initial,events_str,expect,expect_len', (
         (
@@ -165,9 +324,10 @@ class TestEventLog:
         res = obj.refresh()
 
         assert tuple(obj.data) == expect
-        assert res == expect_len
+        assert res == list(expect[1:])
+        assert len(res) == expect_len
 
-    def test_refresh__if_device_has_returned_events__and_filters_and_maxlen_are_set__should_append_filtered_data_and_return_count_of_matched_records(self):  # noqa
+    def test_refresh__if_device_has_returned_events__and_filters_and_maxlen_are_set__should_append_filtered_data_and_return_matched_records(self):  # noqa
         events_strings = [
             '2000-02-02 15:09:10,0,7125793,1,27,2,0',
             '2000-02-02 15:09:15,0,7125794,3,27,2,0',
@@ -185,7 +345,7 @@ class TestEventLog:
         res = obj.refresh()
 
         assert tuple(obj.data) == events_inserted  # 2 records inserted due to maxlen
-        assert res == 3  # 3 records matched
+        assert res == [Event(events_strings[i]) for i in (1, 2, 4)]  # 3 records matched
 
     def test_after_time__should_return_records_after_datetime_included(self):
         data = deque((
@@ -253,7 +413,7 @@ class TestEventLog:
         ))
         obj = EventLog(self.sdk, 4096, _data=data)
 
-        with patch.object(obj, 'refresh', Mock(side_effect=(0, 0, 2))):
+        with patch.object(obj, 'refresh', Mock(side_effect=([], [], list(data)[-2:]))):
             res = obj.poll(60, polling_interval=.5)
 
             assert res == list(data)[-2:]
@@ -290,7 +450,7 @@ class TestEventLog:
         ))
         obj = EventLog(self.sdk, 4096, _data=data)
 
-        with patch.object(obj, 'refresh', Mock(side_effect=(0, 0, 2))):
+        with patch.object(obj, 'refresh', Mock(side_effect=([], [], list(data)[-2:]))):
             start = datetime.now()
             obj.poll(60, polling_interval=.5)
             seconds = (datetime.now() - start).seconds
@@ -300,7 +460,7 @@ class TestEventLog:
     def test_poll__if_refresh_does_not_returned_result__should_return_empty_result_on_timeout(self):
         def refresh_with_slow_network():
             time.sleep(.2)
-            return 0
+            return []
 
         data = deque((
             Event('2000-02-02 15:09:10,0,7125793,1,27,2,0'),
@@ -319,6 +479,57 @@ class TestEventLog:
             assert 2 <= seconds < 2.5
             assert res == []
 
+    def test_poll__if_adaptive_interval_given__should_back_off_and_return_new_events(self):
+        data = deque((
+            Event('2000-02-02 15:09:10,0,7125793,1,27,2,0'),
+            Event('2000-02-02 15:09:15,0,7125794,3,27,2,0'),
+        ))
+        obj = EventLog(self.sdk, 4096, _data=data)
+        interval = AdaptiveInterval(0.1, 0.4)
+
+        with patch.object(obj, 'refresh', Mock(side_effect=([], [], [], list(data)[-1:]))), \
+                patch('pyzkaccess.event.time.sleep') as sleep_mock:
+            res = obj.poll(60, polling_interval=interval)
+
+            assert res == list(data)[-1:]
+            assert [x[0][0] for x in sleep_mock.call_args_list] == [0.2, 0.4, 0.4]
+            assert interval.current == 0.1
+
+    def test_poll__if_new_events_discarded_by_maxlen__should_return_all_new_events(self):
+        events_strings = [
+            '2000-02-02 15:09:10,0,7125793,1,27,2,0',
+            '2000-02-02 15:09:15,0,7125794,3,27,2,0',
+            '2000-02-02 15:09:17,0,7125784,1,25,2,0',
+        ]
+        self.sdk.get_rt_log.side_effect = [events_strings, []]
+        obj = EventLog(self.sdk, 4096, 2)
+
+        res = obj.poll(60)
+
+        assert res == [Event(x) for x in events_strings]
+
+    def test_refresh__if_event_class_given__should_make_its_objects(self):
+        self.sdk.get_rt_log.side_effect = (['2000-02-02 15:09:10,0,7125793,1,27,2,0'], [])
+        obj = EventLog(self.sdk, 4096, event_class=LazyEvent)
+
+        obj.refresh()
+
+        assert type(obj.data[0]) == LazyEvent
+        assert obj.only(door=[1]).event_class is LazyEvent
+
+    def test_refresh__if_dedup_is_set__should_skip_repeated_events(self):
+        lines = ['2000-02-02 15:09:{:02},0,7125793,1,27,2,0'.format(i) for i in range(4)]
+        self.sdk.get_rt_log.side_effect = (lines[:2], lines[1:3], [], lines[:4], [])
+        obj = EventLog(self.sdk, 4096, dedup=DedupWindow(10))
+
+        res1 = obj.refresh()
+        res2 = obj.refresh()
+
+        assert res1 == [Event(x) for x in lines[:3]]
+        assert res2 == [Event(lines[3])]
+        assert list(obj.data) == [Event(x) for x in lines]
+        assert obj.only(door=[1]).dedup is obj.dedup
+
     def test_only__should_return_new_instance(self):
         obj = EventLog(self.sdk, 4096, 2)
 
@@ -529,3 +740,784 @@ class TestEventLog:
         obj = EventLog(self.sdk, 4096)
 
         assert repr(obj).startswith('EventLog[')
+
+
+class TestAdaptiveInterval:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.t = AdaptiveInterval(min_interval=0.1, max_interval=1, backoff=3)
+
+    def test_init__should_start_from_min_interval(self):
+        assert self.t.current == 0.1
+
+    @pytest.mark.parametrize('min_interval,max_interval,backoff', (
+        (-1, 1, 2), (2, 1, 2), (0.1, 1, 0.5)
+    ))
+    def test_init__if_wrong_parameters__should_raise_error(self, min_interval, max_interval, backoff):
+        with pytest.raises(ValueError):
+            AdaptiveInterval(min_interval, max_interval, backoff)
+
+    def test_update__if_no_events__should_back_off_up_to_max_interval(self):
+        res = [self.t.update(0) for _ in range(4)]
+
+        assert res == pytest.approx([0.3, 0.9, 1, 1])
+
+    def test_update__if_events__should_drop_to_min_interval(self):
+        self.t.update(0)
+        self.t.update(0)
+
+        assert self.t.update(5) == 0.1
+
+    def test_update__if_min_interval_is_zero__should_back_off(self):
+        obj = AdaptiveInterval(0, 1)
+
+        assert obj.update(0) > 0
+        assert obj.update(1) == 0
+
+    def test_copy__should_return_object_with_initial_state(self):
+        self.t.update(0)
+
+        res = self.t.copy()
+
+        assert res is not self.t
+        assert (res.min_interval, res.max_interval, res.backoff, res.current) == (0.1, 1, 3, 0.1)
+
+
+class TestColumnarEventStorage:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.events = [
+            Event('2000-02-02 15:09:10,0,7125793,1,27,2,0'),
+            Event('2000-02-02 15:09:15,0,7125794,3,27,2,0'),
+            Event('2000-02-02 15:09:17,0,7125784,1,25,2,0'),
+            Event('2000-02-02 15:09:20,0,7125793,3,27,2,0'),
+            Event('2000-02-02 15:09:21,1,7125794,2,26,1,200')
+        ]
+        self.t = ColumnarEventStorage(self.events)
+
+    def test_init__should_keep_events(self):
+        assert len(self.t) == 5
+        assert list(self.t) == self.events
+        assert all(type(x) == Event for x in self.t)
+
+    def test_iter__should_restore_field_types(self):
+        res = next(iter(self.t))
+
+        assert type(res.event_type) == DocValue and res.event_type.doc == self.events[0].event_type.doc
+        assert res.entry_exit is PassageDirection(2)
+        assert res.verify_mode is VerifyMode(0)
+        assert type(res.time) == datetime
+
+    def test_reversed__should_return_events_from_newest(self):
+        assert list(reversed(self.t)) == self.events[::-1]
+
+    @pytest.mark.parametrize('filters', (
+        {'door': {1, 3}},
+        {'door': {2}, 'event_type': {27, 8}, 'entry_exit': {PassageDirection(1)}},
+        {'door': {4}, 'card': {'7125800', '7125804'}},
+        {'verify_mode': {VerifyMode(4)}, 'door': {Between(2, 4)}},
+    ))
+    def test_select__if_entries_were_discarded__should_match_events_like_predicate(self, filters):
+        events = [
+            Event('2000-02-02 {:02}:{:02}:{:02},{},{},{},{},{},{}'.format(
+                i // 3600, i // 60 % 60, i % 60, i % 7, 7125793 + i % 13, i % 4 + 1,
+                (0, 27, 200, 8)[i % 3], i % 3, (0, 1, 4, 200)[i % 4]
+            ))
+            for i in range(0, 5000, 7)
+        ]
+        obj = ColumnarEventStorage(events)
+        obj.discard(100)
+        from_time, to_time = datetime(2000, 2, 2, 0, 15), datetime(2000, 2, 2, 1, 10)
+
+        res = list(obj.select(filters, from_time, to_time, start=10, stop=-10))
+
+        predicate = _compile_filters(filters)
+        expect = [x for x in events[110:-10] if from_time <= x.time < to_time and predicate(x)]
+        assert res == expect and len(res) > 0
+
+    @pytest.mark.parametrize('index', (0, 2, 4, -1, -5))
+    def test_getitem__should_return_event(self, index):
+        assert self.t[index] == self.events[index]
+
+    @pytest.mark.parametrize('index', (5, -6))
+    def test_getitem__if_out_of_range__should_raise_error(self, index):
+        with pytest.raises(IndexError):
+            _ = self.t[index]
+
+    def test_append__if_maxlen_exceeded__should_discard_oldest_events(self):
+        obj = ColumnarEventStorage(maxlen=3)
+
+        obj.extend(self.events)
+
+        assert obj.maxlen == 3
+        assert list(obj) == self.events[2:]
+
+    def test_append__if_many_events_discarded__should_compact_arrays(self):
+        obj = ColumnarEventStorage(maxlen=10)
+
+        obj.extend(self.events * 1000)
+
+        assert list(obj) == (self.events * 2)
+        assert len(obj._columns['time']) < 2100
+
+    def test_clear__should_remove_all_events(self):
+        self.t.clear()
+
+        assert len(self.t) == 0
+        assert list(self.t) == []
+
+    @pytest.mark.parametrize('count,expect', ((0, 5), (2, 3), (7, 0)))
+    def test_discard__should_remove_oldest_events(self, count, expect):
+        self.t.discard(count)
+
+        assert list(self.t) == self.events[5 - expect:]
+        assert self.t.appended == 5
+
+    def test_nbytes__should_return_arrays_and_strings_size(self):
+        strings = {x.pin for x in self.events} | {x.card for x in self.events}
+
+        assert self.t.nbytes == 5 * 20 + sum(sys.getsizeof(x) + 44 for x in strings)
+
+    def test_nbytes__if_events_discarded__should_not_count_unreferred_strings(self):
+        obj = ColumnarEventStorage(self.events[:1])
+
+        self.t.discard(4)
+
+        assert self.t.nbytes == obj.nbytes
+
+    def test_append__if_many_events_discarded__should_drop_unreferred_strings(self):
+        obj = ColumnarEventStorage(maxlen=10)
+        events = [Event('2000-02-02 15:09:10,{},{},1,27,2,0'.format(i, 1000000 + i))
+                  for i in range(10000)]
+
+        obj.extend(events)
+
+        assert list(obj) == events[-10:]
+        assert len(obj._strings) < 2 * len(obj._columns['time']) + 2
+        assert obj.nbytes == ColumnarEventStorage(events[-10:]).nbytes
+        assert list(obj.select({'card': {events[-1].card}})) == events[-1:]
+
+    @pytest.mark.parametrize('filters,expect', (
+        ({}, [0, 1, 2, 3, 4]),
+        ({'door': {1}}, [0, 2]),
+        ({'door': {1, 3}, 'event_type': {27}}, [0, 1, 3]),
+        ({'card': {'7125794'}}, [1, 4]),
+        ({'card': {'unknown'}}, []),
+        ({'pin': {'1'}}, [4]),
+        ({'entry_exit': {PassageDirection(1)}}, [4]),
+        ({'verify_mode': {VerifyMode(200)}}, [4]),
+        ({'time': {datetime(2000, 2, 2, 15, 9, 17)}}, [2]),
+        ({'door': {'1'}}, []),
+    ))
+    def test_select__should_return_events_matched_by_filters(self, filters, expect):
+        res = list(self.t.select(filters))
+
+        assert res == [self.events[i] for i in expect]
+        assert self.t.count(filters) == len(expect)
+
+    @pytest.mark.parametrize('from_time,to_time,expect', (
+        (datetime(2000, 2, 2, 15, 9, 15), None, [1, 2, 3, 4]),
+        (datetime(2000, 2, 2, 15, 9, 15, 1), None, [2, 3, 4]),
+        (None, datetime(2000, 2, 2, 15, 9, 20), [0, 1, 2]),
+        (None, datetime(2000, 2, 2, 15, 9, 20, 1), [0, 1, 2, 3]),
+        (datetime(2000, 2, 2, 15, 9, 15), datetime(2000, 2, 2, 15, 9, 20), [1, 2]),
+    ))
+    def test_select__should_return_events_in_time_range(self, from_time, to_time, expect):
+        res = list(self.t.select(from_time=from_time, to_time=to_time))
+
+        assert res == [self.events[i] for i in expect]
+
+    def test_select__if_unknown_field__should_raise_error(self):
+        with pytest.raises(AttributeError):
+            list(self.t.select({'unknown': {1}}))
+
+    def test_select__if_storage_mutated_during_iteration__should_raise_error(self):
+        obj = ColumnarEventStorage(self.events, maxlen=5)
+        it = obj.select()
+        next(it)
+
+        obj.append(self.events[0])
+
+        with pytest.raises(RuntimeError):
+            next(it)
+
+
+class TestEventLogTimeIndex:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sdk = Mock()
+        # The 4th event came after device clock was moved back
+        self.lines = [
+            '2000-02-02 15:09:10,0,7125793,1,27,2,0',
+            '2000-02-02 15:09:15,0,7125794,3,27,2,0',
+            '2000-02-02 15:09:17,0,7125784,1,25,2,0',
+            '2000-02-02 15:09:12,0,7125793,3,27,2,0',
+            '2000-02-02 15:09:21,0,7125794,2,26,1,0',
+            '2000-02-02 15:09:21,0,7125795,1,26,1,0',
+        ]
+        self.events = [Event(x) for x in self.lines]
+        self.sdk.get_rt_log.side_effect = (self.lines, [])
+
+    def _expect(self, events, from_time=None, to_time=None):
+        return [x for x in events
+                if (from_time is None or x.time >= from_time) and (to_time is None or x.time < to_time)]
+
+    @pytest.mark.parametrize('columnar', (False, True))
+    @pytest.mark.parametrize('from_time,to_time', (
+        (datetime(2000, 2, 2, 15, 9, 11), None),
+        (datetime(2000, 2, 2, 15, 9, 16), None),
+        (None, datetime(2000, 2, 2, 15, 9, 15)),
+        (None, datetime(2000, 2, 2, 15, 9, 11)),
+        (datetime(2000, 2, 2, 15, 9, 12), datetime(2000, 2, 2, 15, 9, 21)),
+        (datetime(2000, 2, 2, 15, 9, 21), datetime(2000, 2, 2, 15, 9, 22)),
+        (datetime(2000, 2, 2, 15, 9, 30), None),
+        (None, datetime(2000, 2, 2, 15, 9, 0)),
+    ))
+    def test_time_methods__if_events_out_of_order__should_return_events_in_log_order(
+            self, columnar, from_time, to_time
+    ):
+        obj = EventLog(self.sdk, 4096, columnar=columnar)
+        obj.refresh()
+
+        res = list(obj.between_time(from_time or datetime.min, to_time or datetime.max))
+
+        assert res == self._expect(self.events, from_time, to_time)
+        if from_time is not None:
+            assert list(obj.after_time(from_time)) == self._expect(self.events, from_time)
+        if to_time is not None:
+            assert list(obj.before_time(to_time)) == self._expect(self.events, None, to_time)
+
+    def test_refresh__should_update_index_incrementally(self):
+        obj = EventLog(self.sdk, 4096)
+
+        obj.refresh()
+
+        assert obj._index.appended == 6
+        assert obj._index.is_actual(obj.data)
+        assert len(obj._index._unordered) == 1
+
+    @pytest.mark.parametrize('columnar', (False, True))
+    def test_time_methods__if_events_discarded_by_maxlen__should_return_actual_events(
+            self, columnar
+    ):
+        obj = EventLog(self.sdk, 4096, maxlen=3, columnar=columnar)
+        obj.refresh()
+
+        res = list(obj.after_time(datetime(2000, 2, 2)))
+
+        assert res == self.events[3:]
+
+    def test_refresh__if_many_events_discarded__should_compact_index(self):
+        lines = ['2000-02-02 10:{:02}:{:02},0,1,1,27,2,0'.format(i // 60, i % 60)
+                 for i in range(3000)]
+        self.sdk.get_rt_log.side_effect = [lines[i:i + 10] for i in range(0, 3000, 10)] + [[]]
+        obj = EventLog(self.sdk, 4096, maxlen=10)
+
+        obj.refresh()
+
+        assert len(obj._index._times) < 2100
+        assert list(obj.after_time(datetime(2000, 2, 2))) == [Event(x) for x in lines[-10:]]
+
+    def test_time_methods__should_use_index_shared_with_views(self):
+        obj = EventLog(self.sdk, 4096)
+        view = obj.only(door=[1])
+        view.refresh()
+
+        res = list(view.after_time(datetime(2000, 2, 2, 15, 9, 12)))
+
+        assert view._index is obj._index
+        assert res == [self.events[2], self.events[5]]
+
+    def test_time_methods__if_data_changed_bypassing_log__should_rebuild_index(self):
+        obj = EventLog(self.sdk, 4096)
+        obj.refresh()
+        extra = Event('2000-02-02 15:09:11,0,7125799,1,27,2,0')
+
+        obj.data.append(extra)
+        res = list(obj.after_time(datetime(2000, 2, 2, 15, 9, 11)))
+
+        assert res == self._expect(self.events + [extra], datetime(2000, 2, 2, 15, 9, 11))
+        assert obj._index.appended == 7
+
+    def test_time_methods__if_data_passed__should_build_index(self):
+        obj = EventLog(self.sdk, 4096, _data=deque(self.events))
+
+        res = list(obj.after_time(datetime(2000, 2, 2, 15, 9, 17)))
+
+        assert res == self.events[2:3] + self.events[4:]
+
+    def test_clear__should_clear_index(self):
+        obj = EventLog(self.sdk, 4096)
+        obj.refresh()
+
+        obj.clear()
+
+        assert list(obj.after_time(datetime(2000, 1, 1))) == []
+        assert obj._index.appended == 0
+
+
+class TestEventLogHashIndex:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sdk = Mock()
+        self.lines = [
+            '2000-02-02 15:09:10,0,7125793,1,27,2,0',
+            '2000-02-02 15:09:15,0,7125794,3,27,2,0',
+            '2000-02-02 15:09:17,0,7125784,1,25,2,0',
+            '2000-02-02 15:09:20,5,7125793,3,27,2,0',
+            '2000-02-02 15:09:21,0,7125794,2,26,1,0',
+        ]
+        self.events = [Event(x) for x in self.lines]
+        self.sdk.get_rt_log.side_effect = (self.lines, [])
+        self.t = EventLog(self.sdk, 4096, index_fields=('door', 'event_type', 'pin', 'card'))
+        self.t.refresh()
+
+    def test_init__if_field_cannot_be_indexed__should_raise_error(self):
+        with pytest.raises(ValueError):
+            EventLog(self.sdk, 4096, index_fields=('time', ))
+
+    def test_init__if_columnar__should_not_keep_hash_indexes(self):
+        obj = EventLog(self.sdk, 4096, columnar=True, index_fields=('door', ))
+
+        assert obj._index.fields == ()
+
+    @pytest.mark.parametrize('filters', (
+        {'door': 1},
+        {'door': [1, 3]},
+        {'door': [1, 3], 'event_type': 27},
+        {'card': ['7125793', '7125794'], 'door': 3},
+        {'pin': '5'},
+        {'door': 4},
+        {'door': 1, 'entry_exit': PassageDirection(2)},
+    ))
+    def test_iter__should_return_the_same_as_log_without_index(self, filters):
+        expect = EventLog(self.sdk, 4096, _data=deque(self.events)).only(**filters)
+
+        res = self.t.only(**filters)
+
+        assert list(res) == list(expect)
+        assert len(res) == len(expect)
+
+    def test_iter__if_no_field_is_indexed__should_scan_log(self):
+        obj = EventLog(self.sdk, 4096, _data=deque(self.events), index_fields=('pin', ))
+
+        assert list(obj.only(door=1)) == [self.events[0], self.events[2]]
+
+    def test_iter__should_not_scan_log(self):
+        last_event = self.t.data[-1]
+        with patch.object(self.t, 'data', Mock(wraps=self.t.data)) as data_mock:
+            data_mock.__len__ = Mock(return_value=5)
+            data_mock.__getitem__ = Mock(return_value=last_event)
+            data_mock.__iter__ = Mock(side_effect=AssertionError('Log scanned'))
+            obj = self.t.only(door=1)
+
+            assert list(obj) == [self.events[0], self.events[2]]
+
+    def test_iter__if_events_discarded_by_maxlen__should_not_return_them(self):
+        obj = EventLog(self.sdk, 4096, maxlen=3, index_fields=('door', ))
+        self.sdk.get_rt_log.side_effect = (self.lines, [])
+        obj.refresh()
+
+        assert list(obj.only(door=[1, 3])) == [self.events[2], self.events[3]]
+
+    def test_refresh__if_many_events_discarded__should_remove_empty_postings(self):
+        lines = ['2000-02-02 10:{:02}:{:02},{},1,1,27,2,0'.format(i // 60, i % 60, i)
+                 for i in range(3000)]
+        self.sdk.get_rt_log.side_effect = [lines[i:i + 10] for i in range(0, 3000, 10)] + [[]]
+        obj = EventLog(self.sdk, 4096, maxlen=10, index_fields=('pin', ))
+
+        obj.refresh()
+
+        assert len(obj._index._postings['pin']) < 1100
+        assert list(obj.only(pin=['2999'])) == [Event(lines[-1])]
+
+    def test_iter__if_data_changed_bypassing_log__should_rebuild_index(self):
+        extra = Event('2000-02-02 15:09:30,0,7125799,1,27,2,0')
+
+        self.t.data.append(extra)
+
+        assert list(self.t.only(door=1)) == [self.events[0], self.events[2], extra]
+
+
+class TestEventLogViews:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sdk = Mock()
+        self.lines = [
+            '2000-02-02 15:09:{:02},0,{},{},27,2,0'.format(i, 7125793 + i % 2, i % 3 + 1)
+            for i in range(12)
+        ]
+        self.events = [Event(x) for x in self.lines]
+
+    def make_log(self, lines, **kwargs):
+        obj = EventLog(self.sdk, 4096, **kwargs)
+        self.sdk.get_rt_log.side_effect = (lines, [])
+        obj.refresh()
+        return obj
+
+    @pytest.mark.parametrize('columnar', (False, True))
+    def test_getitem__if_negative_index_passed__should_return_item_from_end(self, columnar):
+        obj = self.make_log(self.lines, columnar=columnar).only(door=1)
+
+        assert obj[-1] == self.events[9]
+        assert obj[-4] == self.events[0]
+        with pytest.raises(IndexError):
+            _ = obj[-5]
+
+    @pytest.mark.parametrize('columnar', (False, True))
+    @pytest.mark.parametrize('idx', (slice(-2, None), slice(None, None, -1), slice(1, -1, 2)))
+    def test_getitem__if_slice_passed__should_return_filtered_items(self, columnar, idx):
+        obj = self.make_log(self.lines, columnar=columnar).only(door=1)
+
+        assert list(obj[idx]) == [self.events[i] for i in (0, 3, 6, 9)][idx]
+
+    @pytest.mark.parametrize('columnar', (False, True))
+    def test_refresh__should_update_materialized_view(self, columnar):
+        log = self.make_log(self.lines[:6], maxlen=8, columnar=columnar)
+        obj = log.only(door=1)
+        assert len(obj) == 2
+        view = obj._view()
+
+        self.sdk.get_rt_log.side_effect = (self.lines[6:], [])
+        log.refresh()
+
+        assert obj._view() is view
+        assert len(obj) == 2
+        assert list(obj) == [self.events[6], self.events[9]]
+        assert obj[0] == self.events[6]
+
+    def test_len__should_not_scan_log_again(self):
+        obj = self.make_log(self.lines).only(card='7125793')
+        assert len(obj) == 6
+
+        with patch.object(obj, '_predicate', side_effect=AssertionError('Log scanned')):
+            assert len(obj) == 6
+            assert obj[-1] == self.events[10]
+
+    def test_len__if_data_changed_bypassing_log__should_rebuild_view(self):
+        log = self.make_log(self.lines)
+        obj = log.only(door=1)
+        assert len(obj) == 4
+
+        log.data.append(self.events[0])
+
+        assert len(obj) == 5
+        assert obj[-1] is self.events[0]
+
+    def test_only__if_many_filters_used__should_keep_limited_count_of_views(self):
+        log = self.make_log(self.lines)
+
+        for i in range(_LogIndex.max_views + 10):
+            assert len(log.only(pin=str(i))) == (12 if i == 0 else 0)
+
+        assert len(log._index._views) == _LogIndex.max_views
+
+    def test_str__should_contain_first_and_last_items(self):
+        obj = self.make_log(self.lines)
+
+        res = str(obj)
+
+        assert res.startswith('EventLog[12]({}, '.format(self.events[0]))
+        assert ', ..., {}, '.format(self.events[9]) in res
+        assert res.endswith(', {})'.format(self.events[11]))
+
+
+class TestDedupWindow:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.events = [
+            Event('2000-02-02 15:09:{:02},0,7125793,1,27,2,0'.format(i)) for i in range(10)
+        ]
+
+    def test_init__if_size_is_not_positive__should_raise_error(self):
+        with pytest.raises(ValueError):
+            DedupWindow(0)
+
+    def test_add__should_return_whether_event_is_new(self):
+        obj = DedupWindow(5)
+
+        assert obj.add(self.events[0]) is True
+        assert obj.add(Event('2000-02-02 15:09:00,0,7125793,1,27,2,0')) is False
+        assert self.events[0] in obj
+        assert len(obj) == 1
+
+    def test_filter__should_return_events_which_were_not_seen(self):
+        obj = DedupWindow(5)
+        obj.filter(self.events[:3])
+
+        res = obj.filter(self.events[2:5] + self.events[4:5])
+
+        assert res == self.events[3:5]
+        assert len(obj) == 5
+
+    def test_filter__if_window_is_full__should_forget_oldest_events(self):
+        obj = DedupWindow(3)
+
+        obj.filter(self.events[:5])
+
+        assert len(obj) == 3
+        assert [x in obj for x in self.events[:5]] == [False, False, True, True, True]
+        assert obj.filter(self.events[:1]) == self.events[:1]
+
+    def test_clear__should_forget_all_events(self):
+        obj = DedupWindow(5)
+        obj.filter(self.events)
+
+        obj.clear()
+
+        assert len(obj) == 0
+        assert obj.filter(self.events[:1]) == self.events[:1]
+
+
+class TestRetentionPolicy:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.events = [
+            Event('2000-02-02 15:{:02}:00,0,7125793,1,27,2,0'.format(i)) for i in range(10)
+        ]
+
+    @pytest.mark.parametrize('kwargs', (
+        {'max_age': -1}, {'max_bytes': -1}, {'max_count': -1}
+    ))
+    def test_init__if_negative_limit_passed__should_raise_error(self, kwargs):
+        with pytest.raises(ValueError):
+            RetentionPolicy(**kwargs)
+
+    def test_init__if_max_age_is_number__should_convert_it_to_timedelta(self):
+        obj = RetentionPolicy(max_age=90)
+
+        assert obj.max_age == timedelta(seconds=90)
+
+    @pytest.mark.parametrize('kwargs,expect', (
+        ({}, 0),
+        ({'max_count': 7}, 3),
+        ({'max_count': 20}, 0),
+        ({'max_bytes': 500}, 5),
+        ({'max_bytes': 0}, 10),
+        ({'max_age': timedelta(minutes=3)}, 6),
+        ({'max_age': 180, 'max_count': 2}, 8),
+        ({'max_age': 180, 'max_count': 5}, 6),
+    ))
+    def test_excess__should_return_count_of_events_to_evict(self, kwargs, expect):
+        obj = RetentionPolicy(**kwargs)
+
+        res = obj.excess(iter(self.events), 10, 1000, self.events[-1].time)
+
+        assert res == expect
+
+    def test_excess__if_old_event_is_out_of_order__should_keep_events_after_it(self):
+        events = [self.events[0], self.events[9], self.events[1]]
+        obj = RetentionPolicy(max_age=60)
+
+        assert obj.excess(iter(events), 3, 1000, self.events[9].time) == 1
+
+
+class TestEventLogRetention:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sdk = Mock()
+        self.lines = [
+            '2000-02-02 15:{:02}:00,0,{},{},27,2,0'.format(i, 7125793 + i % 2, i % 2 + 1)
+            for i in range(10)
+        ]
+        self.events = [Event(x) for x in self.lines]
+
+    def make_log(self, retention, **kwargs):
+        return EventLog(self.sdk, 4096, retention=retention, **kwargs)
+
+    @pytest.mark.parametrize('columnar', (False, True))
+    def test_refresh__if_max_age_exceeded__should_evict_old_events(self, columnar):
+        obj = self.make_log(RetentionPolicy(max_age=timedelta(minutes=3)), columnar=columnar)
+        self.sdk.get_rt_log.side_effect = (self.lines[:5], self.lines[5:], [])
+
+        res = obj.refresh()
+
+        assert res == self.events
+        assert list(obj) == self.events[6:]
+
+    @pytest.mark.parametrize('columnar', (False, True))
+    def test_refresh__if_max_bytes_exceeded__should_evict_events_to_fit(self, columnar):
+        obj = self.make_log(None, columnar=columnar)
+        self.sdk.get_rt_log.side_effect = (self.lines, [])
+        obj.refresh()
+        max_bytes = obj.nbytes // 2
+        obj.retention = RetentionPolicy(max_bytes=max_bytes)
+        self.sdk.get_rt_log.side_effect = (self.lines[-1:], [])
+
+        obj.refresh()
+
+        assert obj.nbytes <= max_bytes
+        # Columnar log size includes strings shared by all events
+        assert 2 <= len(obj) <= 5
+        assert obj[-1] == self.events[-1]
+
+    def test_refresh__if_view_refreshed__should_evict_events_by_policy(self):
+        obj = self.make_log(RetentionPolicy(max_count=4))
+        self.sdk.get_rt_log.side_effect = (self.lines, [])
+
+        res = obj.only(door=1).refresh()
+
+        assert res == self.events[::2]
+        assert list(obj.data) == self.events[6:]
+
+    @pytest.mark.parametrize('columnar', (False, True))
+    def test_refresh__if_events_evicted__should_keep_indexes_consistent(self, columnar):
+        obj = self.make_log(RetentionPolicy(max_count=4), columnar=columnar,
+                            index_fields=('door', ))
+        view = obj.only(door=2)
+        assert len(view) == 0
+        self.sdk.get_rt_log.side_effect = (self.lines, [])
+
+        obj.refresh()
+
+        assert obj._index.is_actual(obj.data)
+        assert list(view) == [self.events[7], self.events[9]]
+        assert view[0] == self.events[7]
+        assert list(obj.only(door=1)) == [self.events[6], self.events[8]]
+        assert list(obj.before_time(self.events[8].time)) == self.events[6:8]
+
+    def test_nbytes__should_include_data_and_indexes(self):
+        obj = self.make_log(None)
+        indexed = self.make_log(None, index_fields=('door', 'card'))
+        self.sdk.get_rt_log.side_effect = (self.lines, [], self.lines, [])
+        obj.refresh()
+        indexed.refresh()
+
+        assert obj.nbytes > 10 * 100
+        assert indexed.nbytes > obj.nbytes
+        assert self.make_log(None).nbytes == 0
+
+
+class TestBetween:
+    @pytest.mark.parametrize('obj,value,expect', (
+        (Between(1, 3), 1, True),
+        (Between(1, 3), 2, True),
+        (Between(1, 3), 3, False),
+        (Between(1, 3), 0, False),
+        (Between(None, 3), -100, True),
+        (Between(1), 100, True),
+        (Between(), 100, True),
+    ))
+    def test_contains__should_check_half_open_range(self, obj, value, expect):
+        assert (value in obj) is expect
+
+    def test_eq_hash__should_compare_bounds(self):
+        assert Between(1, 2) == Between(1, 2)
+        assert Between(1, 2) != Between(1, 3)
+        assert Between(1, 2) != (1, 2)
+        assert len({Between(1, 2), Between(1, 2)}) == 1
+
+
+class TestEventLogFilterPredicates:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sdk = Mock()
+        self.lines = [
+            '2000-02-02 15:09:10,10,7125793,1,27,2,0',
+            '2000-02-02 15:09:15,12,7125794,3,27,2,0',
+            '2000-02-02 15:09:17,0,7125784,1,25,2,0',
+            '2000-02-02 15:09:20,125,7125793,3,27,2,0',
+            '2000-02-02 15:09:21,0,7125794,2,26,1,0',
+        ]
+        self.events = [Event(x) for x in self.lines]
+
+    def _make_log(self, storage):
+        if storage == 'deque':
+            return EventLog(self.sdk, 4096, _data=deque(self.events))
+        if storage == 'columnar':
+            return EventLog(self.sdk, 4096, _data=ColumnarEventStorage(self.events))
+        obj = EventLog(self.sdk, 4096, index_fields=('door', 'pin', 'event_type'))
+        obj.data.extend(self.events)
+        return obj
+
+    @pytest.mark.parametrize('storage', ('deque', 'columnar', 'indexed'))
+    @pytest.mark.parametrize('filters,expect', (
+        ({'time': Between(datetime(2000, 2, 2, 15, 9, 15), datetime(2000, 2, 2, 15, 9, 21))},
+         [1, 2, 3]),
+        ({'time': [Between(None, datetime(2000, 2, 2, 15, 9, 11)),
+                   datetime(2000, 2, 2, 15, 9, 21)]}, [0, 4]),
+        ({'time': lambda x: x.second % 2 == 0}, [0, 3]),
+        ({'pin': lambda x: x.startswith('12')}, [1, 3]),
+        ({'pin': [lambda x: x.startswith('12'), '10']}, [0, 1, 3]),
+        ({'door': Between(2), 'event_type': 27}, [1, 3]),
+        ({'door': [1, Between(3, 4)], 'pin': '0'}, [2]),
+        ({'event_type': lambda x: x.doc.startswith('Unregistered')}, [0, 1, 3]),
+        ({'entry_exit': lambda x: x == PassageDirection(1)}, [4]),
+        ({'door': [1, 3], 'event_type': 27, 'pin': lambda x: x.startswith('12'),
+          'entry_exit': PassageDirection(2), 'verify_mode': VerifyMode(0)}, [1, 3]),
+    ))
+    def test_only__if_ranges_and_functions_passed__should_filter_by_them(
+            self, storage, filters, expect
+    ):
+        obj = self._make_log(storage).only(**filters)
+
+        assert list(obj) == [self.events[i] for i in expect]
+        assert len(obj) == len(expect)
+
+    def test_only__should_merge_functions_and_ranges_with_values(self):
+        func = lambda x: x.startswith('12')  # noqa
+        obj = EventLog(self.sdk, 4096).only(pin=func, door=Between(1, 2))
+
+        res = obj.only(pin='0', door=(3, ))
+
+        assert res.only_filters == {'pin': {func, '0'}, 'door': {Between(1, 2), 3}}
+
+    def test_only_filters__if_assigned__should_recompile_predicate(self):
+        obj = self._make_log('deque')
+
+        obj.only_filters = {'door': {2}}
+
+        assert list(obj) == [self.events[4]]
+
+    def test_only__should_not_copy_filter_values(self):
+        value = DocValue(27, 'doc')
+        obj = EventLog(self.sdk, 4096).only(event_type=value).only(door=1)
+
+        assert next(iter(obj.only_filters['event_type'])) is value
+
+
+class TestEventLogColumnar:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sdk = Mock()
+        self.events = [
+            Event('2000-02-02 15:09:10,0,7125793,1,27,2,0'),
+            Event('2000-02-02 15:09:15,0,7125794,3,27,2,0'),
+            Event('2000-02-02 15:09:17,0,7125784,1,25,2,0'),
+            Event('2000-02-02 15:09:20,0,7125793,3,27,2,0'),
+            Event('2000-02-02 15:09:21,0,7125794,2,26,1,0')
+        ]
+        self.t = EventLog(self.sdk, 4096, columnar=True)
+        self.t.data.extend(self.events)
+        self.deque_log = EventLog(self.sdk, 4096, _data=deque(self.events))
+
+    def test_init__should_make_columnar_storage(self):
+        obj = EventLog(self.sdk, 4096, 10, columnar=True)
+
+        assert type(obj.data) == ColumnarEventStorage
+        assert obj.data.maxlen == 10
+        assert obj.only(door=1).data is obj.data
+
+    @pytest.mark.parametrize('filters', (
+        {}, {'door': 1}, {'door': [1, 3], 'event_type': 27}, {'card': '7125794'}
+    ))
+    def test_filtering__should_return_the_same_as_deque_log(self, filters):
+        obj = self.t.only(**filters)
+        expect = self.deque_log.only(**filters)
+        moment1, moment2 = datetime(2000, 2, 2, 15, 9, 15), datetime(2000, 2, 2, 15, 9, 21)
+
+        assert list(obj) == list(expect)
+        assert len(obj) == len(expect)
+        assert list(obj[1:]) == list(expect[1:])
+        assert list(obj.after_time(moment1)) == list(expect.after_time(moment1))
+        assert list(obj.before_time(moment1)) == list(expect.before_time(moment1))
+        assert list(obj.between_time(moment1, moment2)) == \
+            list(expect.between_time(moment1, moment2))
+
+    def test_refresh__should_append_events_to_storage(self):
+        self.sdk.get_rt_log.side_effect = (['2000-02-02 15:09:30,0,7125793,1,27,2,0'], [])
+
+        res = self.t.only(door=1).refresh()
+
+        assert res == [Event('2000-02-02 15:09:30,0,7125793,1,27,2,0')]
+        assert self.t.data[-1] == Event('2000-02-02 15:09:30,0,7125793,1,27,2,0')
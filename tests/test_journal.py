@@ -0,0 +1,179 @@
+import os
+from datetime import datetime
+from unittest.mock import patch, Mock
+
+import pytest
+
+from pyzkaccess.event import Between, Event, EventLog
+from pyzkaccess.journal import EventJournal
+
+
+class TestEventJournal:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.path = str(tmp_path / 'events.journal')
+        self.events = [
+            Event('2000-02-02 15:09:10,0,7125793,1,27,2,0'),
+            Event('2000-02-02 15:09:15,0,7125794,3,27,2,0'),
+            Event('2000-02-02 15:09:17,0,7125784,1,25,2,0'),
+            Event('2000-02-02 15:09:05,5,7125793,3,27,2,0'),
+            Event('2000-02-02 15:09:21,1,7125794,2,26,1,200')
+        ]
+        self.t = EventJournal(self.path)
+        yield
+        self.t.close()
+
+    def test_init__if_file_not_exists__should_create_empty_journal(self):
+        assert os.path.exists(self.path)
+        assert len(self.t) == 0
+        assert list(self.t) == []
+
+    def test_init__if_file_is_not_journal__should_raise_error(self, tmp_path):
+        path = tmp_path / 'other'
+        path.write_bytes(b'something else')
+
+        with pytest.raises(ValueError):
+            EventJournal(str(path))
+        assert not os.path.exists(str(path) + '.strings')
+
+    def test_append__should_write_events(self):
+        self.t.append(self.events[:2])
+        self.t.append(self.events[2:])
+
+        assert len(self.t) == 5
+        assert list(self.t) == self.events
+        assert all(type(x) == Event for x in self.t)
+
+    def test_append__should_keep_every_string_once(self):
+        self.t.append(self.events)
+
+        with open(self.t.strings_path) as f:
+            assert sorted(f.read().split()) == ['0', '1', '5', '7125784', '7125793', '7125794']
+
+    def test_init__if_journal_exists__should_read_events(self):
+        self.t.append(self.events)
+        self.t.close()
+
+        with EventJournal(self.path) as obj:
+            obj.append(self.events[:1])
+
+            assert list(obj) == self.events + self.events[:1]
+
+    def test_init__if_data_written_partially__should_drop_incomplete_record_and_string(self):
+        self.t.append(self.events)
+        self.t.close()
+        with open(self.path, 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        with open(self.t.strings_path, 'ab') as f:
+            f.write(b'71257')
+
+        with EventJournal(self.path) as obj:
+            obj.append([Event('2000-02-02 15:09:30,7,7125799,1,27,2,0')])
+
+            assert list(obj) == self.events + [Event('2000-02-02 15:09:30,7,7125799,1,27,2,0')]
+
+    @pytest.mark.parametrize('sync_interval,expect', ((0, True), (None, False), (3600, False)))
+    def test_append__should_sync_according_to_interval(self, sync_interval, expect):
+        obj = EventJournal(self.path, sync_interval=sync_interval)
+        obj.append(self.events)
+
+        with patch('pyzkaccess.journal.os.fsync') as fsync_mock:
+            obj.append(self.events)
+
+            assert fsync_mock.called == expect
+        obj.close()
+
+    def test_append__if_new_strings__should_sync_them_before_writing_records(self):
+        obj = EventJournal(self.path, sync_interval=None)
+        sizes = []
+
+        def fsync(fd):
+            sizes.append((os.path.getsize(obj.strings_path), os.path.getsize(self.path)))
+
+        with patch('pyzkaccess.journal.os.fsync', side_effect=fsync):
+            obj.append(self.events)
+
+        assert sizes == [(os.path.getsize(obj.strings_path), len(obj.magic))]
+        obj.close()
+
+    @pytest.mark.parametrize('kwargs,expect', (
+        ({}, [0, 1, 2, 3, 4]),
+        ({'from_time': datetime(2000, 2, 2, 15, 9, 15)}, [1, 2, 4]),
+        ({'to_time': datetime(2000, 2, 2, 15, 9, 15)}, [0, 3]),
+        ({'filters': {'door': {1, 3}, 'event_type': {27}}}, [0, 1, 3]),
+        ({'filters': {'card': {'7125794'}}, 'to_time': datetime(2000, 2, 2, 15, 9, 20)}, [1]),
+        ({'filters': {'door': {Between(2, 4)}}, 'reverse': True}, [4, 3, 1]),
+    ))
+    @pytest.mark.parametrize('block_size', (1024, 2))
+    def test_select__should_return_matched_events(self, kwargs, expect, block_size):
+        self.t.block_size = block_size
+        self.t.append(self.events)
+
+        assert list(self.t.select(**kwargs)) == [self.events[i] for i in expect]
+
+    def test_select__should_read_only_blocks_within_time_range(self):
+        self.t.block_size = 2
+        self.t.append(self.events)
+
+        with patch.object(self.t, '_make_event', wraps=self.t._make_event) as make_event_mock:
+            res = list(self.t.select(from_time=datetime(2000, 2, 2, 15, 9, 20)))
+
+            assert res == [self.events[4]]
+            assert make_event_mock.call_count == 1
+
+    def test_select__if_events_appended_after_previous_select__should_return_them(self):
+        self.t.block_size = 2
+        self.t.append(self.events[:3])
+        assert list(self.t.select(from_time=datetime(2000, 2, 2, 15, 9, 16))) == [self.events[2]]
+
+        self.t.append(self.events[3:])
+
+        assert list(self.t.select(from_time=datetime(2000, 2, 2, 15, 9, 16))) == \
+            [self.events[2], self.events[4]]
+        assert list(self.t.select(to_time=datetime(2000, 2, 2, 15, 9, 10))) == [self.events[3]]
+
+    @pytest.mark.parametrize('index', (0, 2, 4, -1, -5))
+    def test_getitem__should_return_event(self, index):
+        self.t.append(self.events)
+
+        assert self.t[index] == self.events[index]
+
+    @pytest.mark.parametrize('index', (5, -6))
+    def test_getitem__if_index_out_of_range__should_raise_error(self, index):
+        self.t.append(self.events)
+
+        with pytest.raises(IndexError):
+            _ = self.t[index]
+
+
+class TestEventLogJournal:
+    @pytest.fixture(autouse=True)
+    def setup(self, tmp_path):
+        self.sdk = Mock()
+        self.lines = [
+            '2000-02-02 15:09:10,0,7125793,1,27,2,0',
+            '2000-02-02 15:09:15,0,7125794,3,255,2,0',
+            '2000-02-02 15:09:17,0,7125784,1,25,2,0',
+            '2000-02-02 15:09:20,5,7125793,3,27,2,0',
+        ]
+        self.journal = EventJournal(str(tmp_path / 'events.journal'))
+        yield
+        self.journal.close()
+
+    def test_refresh__should_write_events_to_journal(self):
+        obj = EventLog(self.sdk, 4096, journal=self.journal)
+        self.sdk.get_rt_log.side_effect = (self.lines[:2], self.lines[2:], [])
+
+        obj.refresh()
+
+        assert list(self.journal) == [Event(self.lines[i]) for i in (0, 2, 3)]
+
+    def test_after_time__should_return_events_from_journal(self):
+        obj = EventLog(self.sdk, 4096, maxlen=1, journal=self.journal)
+        self.sdk.get_rt_log.side_effect = (self.lines, [])
+        obj.refresh()
+
+        res = obj.only(door=1).after_time(datetime(2000, 2, 2, 15, 9, 10))
+
+        assert list(res) == [Event(self.lines[0]), Event(self.lines[2])]
+        assert list(obj.data) == [Event(self.lines[3])]
@@ -0,0 +1,224 @@
+import threading
+import time
+
+import pytest
+
+from pyzkaccess import ZKAccess
+from pyzkaccess.emulator import EmulatedDevice, EmulatedZKSDK
+from pyzkaccess.event import AdaptiveInterval, Event, LazyEvent
+from pyzkaccess.poller import EventPoller, OverflowPolicy, Subscription
+
+
+def _event_line(n):
+    return '2000-02-02 15:09:{:02},0,{},1,27,2,0'.format(n % 60, 7125793 + n)
+
+
+class TestSubscription:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.sources = ['source']
+        self.t = Subscription(self.sources, maxsize=2)
+        yield
+        self.t.close()
+
+    def _put(self, obj, n):
+        obj.put(0, _event_line(n), Event(_event_line(n)), time.monotonic())
+
+    def test_get__should_return_events_in_order(self):
+        self._put(self.t, 1)
+        self._put(self.t, 2)
+
+        res = [self.t.get(), self.t.get()]
+
+        assert [x.event for x in res] == [Event(_event_line(1)), Event(_event_line(2))]
+        assert res[0].source == 'source'
+
+    def test_get__if_timeout_expired__should_return_none(self):
+        assert self.t.get(timeout=.01) is None
+
+    def test_put__if_drop_oldest_and_queue_is_full__should_drop_oldest_event(self):
+        for n in range(3):
+            self._put(self.t, n)
+
+        assert [self.t.get(0).event.card for _ in range(2)] == ['7125794', '7125795']
+        assert self.t.dropped == 1
+
+    def test_put__if_spill_and_queue_is_full__should_spill_events_and_keep_order(self, tmpdir):
+        obj = Subscription(self.sources, maxsize=2, overflow=OverflowPolicy.spill,
+                           spill_dir=str(tmpdir))
+        for n in range(5):
+            self._put(obj, n)
+
+        assert obj.qsize() == 5
+        assert obj.spilled == 3
+        self._put(obj, 5)
+        res = [obj.get(0).event for _ in range(6)]
+        obj.close()
+
+        assert res == [Event(_event_line(n)) for n in range(6)]
+
+    def test_put__if_spill__should_keep_event_class(self, tmpdir):
+        obj = Subscription(self.sources, maxsize=1, overflow=OverflowPolicy.spill,
+                           spill_dir=str(tmpdir))
+        for n in range(2):
+            obj.put(0, _event_line(n), LazyEvent(_event_line(n)), time.monotonic())
+
+        res = [obj.get(0).event for _ in range(2)]
+        obj.close()
+
+        assert [type(x) for x in res] == [LazyEvent, LazyEvent]
+
+    def test_put__if_block_and_queue_is_full__should_wait_for_consumer(self):
+        obj = Subscription(self.sources, maxsize=1, overflow=OverflowPolicy.block)
+        self._put(obj, 1)
+        thread = threading.Thread(target=self._put, args=(obj, 2))
+        thread.start()
+        thread.join(.05)
+
+        assert thread.is_alive()
+        obj.get(0)
+        thread.join(1)
+        assert not thread.is_alive()
+        assert obj.qsize() == 1
+        obj.close()
+
+    def test_lag__should_return_age_of_oldest_event(self):
+        self.t.put(0, _event_line(1), Event(_event_line(1)), time.monotonic() - 5)
+
+        assert 5 <= self.t.lag < 6
+        self.t.get(0)
+        assert self.t.lag == 0
+        assert self.t.max_lag >= 5
+
+    def test_close__should_wake_up_consumers(self):
+        res = []
+        thread = threading.Thread(target=lambda: res.extend(self.t))
+        thread.start()
+
+        self.t.close()
+        thread.join(1)
+
+        assert not thread.is_alive()
+
+    def test_callback__should_be_called_in_separate_thread(self):
+        calls = []
+        done = threading.Event()
+        obj = Subscription(self.sources, callback=lambda x: (calls.append(x), done.set()))
+
+        self._put(obj, 1)
+        done.wait(1)
+        obj.close()
+
+        assert [x.event for x in calls] == [Event(_event_line(1))]
+
+
+class TestEventPoller:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.devices = [EmulatedDevice(), EmulatedDevice()]
+        self.zks = [ZKAccess(connstr='passwd=', sdk=EmulatedZKSDK(d)) for d in self.devices]
+        self.t = EventPoller(self.zks, polling_interval=.01)
+        yield
+        self.t.stop()
+
+    def test_subscribe__should_deliver_events_from_all_devices(self):
+        subscription = self.t.subscribe()
+        self.t.start()
+
+        self.devices[0].add_event(_event_line(1))
+        self.devices[1].add_event(_event_line(2))
+        res = [subscription.get(1), subscription.get(1)]
+
+        assert {(x.source, x.event.card) for x in res} == {
+            (self.zks[0], '7125794'), (self.zks[1], '7125795')
+        }
+
+    def test_subscribe__should_deliver_events_to_every_subscriber(self):
+        subscriptions = [self.t.subscribe(), self.t.subscribe()]
+        self.t.start()
+
+        self.devices[0].add_event(_event_line(1))
+
+        assert all(s.get(1).event == Event(_event_line(1)) for s in subscriptions)
+
+    def test_stats__should_count_polls_and_events(self):
+        self.devices[0].add_event(_event_line(1))
+        self.t.subscribe()
+
+        self.t.start()
+        time.sleep(.1)
+
+        stats = self.t.stats
+        assert stats[self.zks[0]].events == 1
+        assert stats[self.zks[0]].polls > 1
+        assert stats[self.zks[1]].events == 0
+
+    def test_poll__on_sdk_error__should_count_it_and_continue(self):
+        self.zks[0].sdk.disconnect()
+
+        self.t.start()
+        time.sleep(.1)
+
+        assert self.t.stats[self.zks[0]].errors > 1
+        assert self.t.stats[self.zks[1]].errors == 0
+
+    def test_poll__if_event_line_is_malformed__should_count_error_and_skip_it(self):
+        subscription = self.t.subscribe()
+        self.devices[0].add_event('2000-02-02 15:09:00,0,7125793,1,999,2,0')
+        self.devices[0].add_event(_event_line(1))
+        self.t.start()
+
+        res = subscription.get(1)
+        self.devices[0].add_event(_event_line(2))
+
+        assert res.event == Event(_event_line(1))
+        assert subscription.get(1).event == Event(_event_line(2))
+        time.sleep(.05)  # Stats are updated after delivery
+        stats = self.t.stats[self.zks[0]]
+        assert stats.errors == 1
+        assert isinstance(stats.last_error, KeyError)
+        assert stats.events == 2
+
+    def test_stop__should_stop_threads_and_close_subscriptions(self):
+        subscription = self.t.subscribe(maxsize=1, overflow=OverflowPolicy.block)
+        self.devices[0].add_event(_event_line(1))
+        self.devices[0].add_event(_event_line(2))
+        self.t.start()
+        time.sleep(.05)
+
+        self.t.stop()
+
+        assert self.t.running is False
+        assert subscription.closed is True
+
+    def test_poll__if_adaptive_interval__should_make_less_requests_to_idle_device(self):
+        obj = EventPoller(self.zks, polling_interval={
+            self.zks[0]: AdaptiveInterval(0.001, 0.001),
+            self.zks[1]: AdaptiveInterval(0.001, 0.5),
+        })
+
+        obj.start()
+        time.sleep(.2)
+        obj.stop()
+
+        stats = obj.stats
+        assert stats[self.zks[1]].polls < 10 < stats[self.zks[0]].polls
+
+    def test_init__if_adaptive_interval__should_copy_it_for_every_device(self):
+        interval = AdaptiveInterval()
+
+        obj = EventPoller(self.zks, polling_interval=interval)
+
+        assert len({id(x) for x in obj._intervals} | {id(interval)}) == 3
+
+    def test_subscribe__if_event_class_given__should_deliver_its_objects(self):
+        obj = EventPoller(self.zks[0], polling_interval=.01, event_class=LazyEvent)
+        subscription = obj.subscribe()
+        obj.start()
+
+        self.devices[0].add_event(_event_line(1))
+        res = subscription.get(1)
+        obj.stop()
+
+        assert type(res.event) == LazyEvent
+        assert res.event == Event(_event_line(1))
@@ -0,0 +1,124 @@
+import threading
+import time
+
+import pytest
+
+from pyzkaccess.data import User
+from pyzkaccess.device import ZK100, ZKDevice
+from pyzkaccess.emulator import EmulatedDevice, EmulatedZKSDK
+from pyzkaccess.event import Event
+from pyzkaccess.exceptions import ZKSDKError
+from pyzkaccess.pool import DeviceResult, ZKAccessPool
+
+
+class TestZKAccessPool:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.connstrs = ['passwd=,ipaddress=10.0.0.{}'.format(x) for x in range(1, 4)]
+        self.devices = {
+            c: EmulatedDevice(serial_number='sn{}'.format(i)) for i, c in enumerate(self.connstrs)
+        }
+        self.sdks = {}
+
+        def sdk_factory(connstr):
+            self.sdks[connstr] = EmulatedZKSDK(self.devices[connstr], latency=.1)
+            return self.sdks[connstr]
+
+        self.t = ZKAccessPool(self.connstrs, sdk_factory=sdk_factory)
+        yield
+        self.t.close()
+
+    def test_init__should_not_connect(self):
+        assert self.t.connstrs == self.connstrs
+        assert self.t.connected == []
+        assert len(self.t) == 3
+
+    def test_init__if_device_objects_passed__should_make_connstrs_and_take_model(self):
+        device = ZKDevice(mac='00:17:61:C8:EC:17', ip='192.168.1.201', serial_number='sn',
+                          model=ZK100, version='AC Ver 4.3.4 Apr 28 2017')
+
+        obj = ZKAccessPool([device])
+
+        assert obj.connstrs == [
+            'protocol=TCP,ipaddress=192.168.1.201,port=4370,timeout=4000,passwd='
+        ]
+        assert obj._models[obj.connstrs[0]] is ZK100
+
+    def test_connect__should_connect_devices_in_parallel(self):
+        start = time.monotonic()
+
+        res = self.t.connect()
+
+        assert time.monotonic() - start < .25
+        assert all(x.ok for x in res.values())
+        assert self.t.connected == self.connstrs
+
+    def test_connected__should_wait_for_members_being_added(self):
+        self.t.connect()
+        res = []
+
+        with self.t._lock:
+            thread = threading.Thread(target=lambda: res.append(self.t.connected))
+            thread.start()
+            thread.join(.05)
+            assert res == []
+        thread.join()
+
+        assert res == [self.connstrs]
+
+    def test_connect__if_device_failed__should_return_error_for_it_only(self):
+        self.devices[self.connstrs[1]].parameters['ComPwd'] = '123'
+
+        res = self.t.connect()
+
+        assert isinstance(res[self.connstrs[1]].error, ZKSDKError)
+        assert res[self.connstrs[0]].ok and res[self.connstrs[2]].ok
+        assert self.t.connected == [self.connstrs[0], self.connstrs[2]]
+
+    def test_map__if_device_is_not_connected__should_return_error(self):
+        res = self.t.map(lambda zk: 1, connstrs=self.connstrs[:1])
+
+        assert isinstance(res[self.connstrs[0]].error, RuntimeError)
+
+    def test_map__if_timeout_expired__should_return_timeout_error(self):
+        self.t.connect()
+
+        res = self.t.map(lambda zk: time.sleep(.3), timeout=.05)
+
+        assert all(isinstance(x.error, TimeoutError) for x in res.values())
+
+    def test_read_parameters__should_return_parameters_of_every_device(self):
+        self.t.connect()
+
+        res = self.t.read_parameters('serial_number')
+
+        assert res == {
+            c: DeviceResult(c, {'serial_number': 'sn{}'.format(i)}, None)
+            for i, c in enumerate(self.connstrs)
+        }
+
+    def test_pull_events__should_return_new_events_of_every_device(self):
+        self.t.connect()
+        event = '2000-02-02 15:09:10,0,7125793,1,27,2,0'
+        self.devices[self.connstrs[0]].add_event(event)
+
+        res = self.t.pull_events()
+
+        assert res[self.connstrs[0]].result == [Event(event)]
+        assert res[self.connstrs[1]].result == []
+
+    def test_add_users__should_add_users_to_every_device(self):
+        self.t.connect()
+
+        res = self.t.add_users([User(Pin=1, CardNo=123)])
+
+        assert all(x.ok for x in res.values())
+        assert all(d.tables['user'] == [{'Pin': '1', 'CardNo': '123'}]
+                   for d in self.devices.values())
+
+    def test_close__should_disconnect_all_devices(self):
+        self.t.connect()
+
+        self.t.close()
+
+        assert not any(x.is_connected for x in self.sdks.values())
@@ -1,4 +1,4 @@
-from unittest.mock import patch
+from unittest.mock import patch, Mock, ANY
 
 import pytest
 
@@ -45,6 +45,15 @@ class TestZKAccess:
 
         self.sdk_cls.assert_called_once_with('testdll')
 
+    def test_init__if_sdk_is_passed__should_use_it(self):
+        sdk = Mock()
+
+        obj = ZKAccess(sdk=sdk)
+
+        assert obj.sdk is sdk
+        assert obj._event_log._sdk is sdk
+        self.sdk_cls.assert_not_called()
+
     def test_init__if_device_model_is_passed__should_set_device_model_prop(self):
         obj = ZKAccess(device_model=ZK200)
 
@@ -206,6 +215,47 @@ class TestZKAccess:
 
         assert res is self.sdk.handle
 
+    def test_get_data__should_pass_fields_and_options_to_sdk(self):
+        obj = ZKAccess(connstr=self.connstr)
+
+        res = obj.get_data('transaction', fields=['Cardno', 'Pin'], options='NewRecord')
+
+        assert res is self.sdk.get_device_data.return_value
+        self.sdk.get_device_data.assert_called_once_with(
+            'transaction', fields=['Cardno', 'Pin'], options='NewRecord'
+        )
+
+    def test_set_data__should_write_data_by_batches(self):
+        obj = ZKAccess(connstr=self.connstr)
+        progress = Mock()
+
+        obj.set_data('user', [{'Pin': '1'}], progress=progress, start_batch=2)
+
+        self.sdk.set_device_data_bulk.assert_called_once_with(
+            'user', [{'Pin': '1'}], progress=progress, start_batch=2
+        )
+
+    def test_delete_users__should_delete_users_and_authorizations_by_one_bulk_call(self):
+        obj = ZKAccess(connstr=self.connstr)
+
+        obj.delete_users([1, 2])
+
+        assert [(c[0][0], [str(f) for f in c[0][1]])
+                for c in self.sdk.delete_device_data_bulk.call_args_list] == [
+            ('userauthorize', ['Pin=1', 'Pin=2']),
+            ('user', ['Pin=1', 'Pin=2']),
+        ]
+
+    def test_iter_data__should_return_sdk_iterator(self):
+        obj = ZKAccess(connstr=self.connstr)
+
+        res = obj.iter_data('transaction')
+
+        assert res is self.sdk.iter_device_data.return_value
+        self.sdk.iter_device_data.assert_called_once_with(
+            'transaction', data_filter=ANY, fields=None, options=''
+        )
+
     def test_search_devices__should_call_sdk_function(self):
         self.sdk.search_device.return_value = []
 
@@ -213,6 +263,15 @@ class TestZKAccess:
 
         self.sdk.search_device.assert_called_once_with('192.168.1.255', 4096)
 
+    def test_search_devices__if_sdk_is_passed__should_use_it(self):
+        sdk = Mock()
+        sdk.search_device.return_value = []
+
+        _ = ZKAccess.search_devices('192.168.1.255', sdk=sdk)
+
+        sdk.search_device.assert_called_once_with('192.168.1.255', 4096)
+        self.sdk_cls.assert_not_called()
+
     def test_search_devices__should_return_list_of_found_device_objects(self):
         self.sdk.search_device.return_value = [
             'MAC=00:17:61:C8:EC:17,IP=192.168.1.201,SN=DGD9190019050335134,'
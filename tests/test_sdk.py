@@ -1,9 +1,20 @@
+import threading
+import time
 from unittest.mock import patch, call, ANY
 
 import pytest
 
+from pyzkaccess.common import DeviceDataFilter
 from pyzkaccess.enum import ControlOperation
-from pyzkaccess.exceptions import ZKSDKError
+from pyzkaccess.sdk import (
+    BufferPool,
+    BulkProgress,
+    CallPriority,
+    PriorityLock,
+    _iter_table,
+    _split_batches
+)
+from pyzkaccess.exceptions import ZKSDKError, ZKSDKBatchError
 
 
 def _alpha_sorted_keys(length, range_from, range_to):
@@ -164,6 +175,22 @@ class TestZKSDK:
 
         assert res == expect
 
+    def test_get_rt_log__on_repeatable_calls__should_reuse_buffer(self):
+        buffers = []
+
+        def se(*a, **kw):
+            buffers.append(a[1])
+            a[1].value = b'2000-01-01 00:52:14,0,7125793,1,27,0,0\r\n'
+            return 0
+
+        self.t.handle = 12345
+        self.dll_mock.GetRTLog.side_effect = se
+
+        self.t.get_rt_log(1024)
+        self.t.get_rt_log(1024)
+
+        assert buffers[0] is buffers[1]
+
     def test_get_rt_log__on_failure__raise_error(self):
         errno = -2
         buf_size = 1024
@@ -176,6 +203,39 @@ class TestZKSDK:
         assert e.value.err == errno
         assert self.t.handle is not None
 
+    def test_get_rt_log__if_buffer_is_not_enough__should_retry_with_bigger_buffer(self):
+        sizes = []
+
+        def se(*a, **kw):
+            sizes.append(a[2])
+            if a[2] < 2048:
+                return -3
+            a[1].value = b'2000-01-01 00:52:14,0,7125793,1,27,0,0\r\n'
+            return 1
+
+        self.t.handle = 12345
+        self.dll_mock.GetRTLog.side_effect = se
+
+        res = self.t.get_rt_log(1024)
+
+        assert sizes == [1024, 2048]
+        assert res == ['2000-01-01 00:52:14,0,7125793,1,27,0,0']
+
+    def test_get_rt_log__if_buffer_was_filled_more_than_half__should_grow_it_for_next_call(self):
+        def se(*a, **kw):
+            a[1].value = b'2000-01-01 00:52:14,0,7125793,1,27,0,0\r\n' * 2
+            return 2
+
+        self.t.handle = handle = 12345
+        self.dll_mock.GetRTLog.side_effect = se
+
+        self.t.get_rt_log(128)
+        self.t.get_rt_log(128)
+
+        assert self.dll_mock.GetRTLog.call_args_list == [
+            call(handle, ANY, 128), call(handle, ANY, 256)
+        ]
+
     def test_search_device__should_call_sdk(self):
         def se(*a, **kw):
             a[2].value = b'\r\n'
@@ -376,6 +436,251 @@ class TestZKSDK:
         assert e.value.err == errno
         assert self.t.handle is not None
 
+    def test_get_device_data__should_return_rows(self):
+        def se(*a, **kw):
+            a[1].value = b'Pin,CardNo\r\n1,123\r\n2,456\r\n'
+            return 2
+
+        self.t.handle = 12345
+        self.dll_mock.GetDeviceData.side_effect = se
+
+        res = self.t.get_device_data('user', 4096)
+
+        assert res == [{'Pin': '1', 'CardNo': '123'}, {'Pin': '2', 'CardNo': '456'}]
+
+    def test_get_device_data__if_buffer_size_not_passed__should_calculate_it_from_rows_count(
+            self
+    ):
+        self.t.handle = handle = 12345
+        self.dll_mock.GetDeviceDataCount.return_value = 100
+        self.dll_mock.GetDeviceData.return_value = 0
+
+        self.t.get_device_data('user')
+
+        self.dll_mock.GetDeviceDataCount.assert_called_once_with(handle, b'user', b'', b'')
+        self.dll_mock.GetDeviceData.assert_called_once_with(
+            handle, ANY, 16384, b'user', b'*', b'', b''
+        )
+
+    @pytest.mark.parametrize('errno', (-3, 5))
+    def test_get_device_data__if_data_does_not_fit_in_buffer__should_retry_with_bigger_buffer(
+            self, errno
+    ):
+        data = b'Pin,CardNo\r\n' + b''.join(b'%d,123\r\n' % x for x in range(1000))
+
+        def se(*a, **kw):
+            if a[2] <= len(data):
+                if errno == -3:
+                    return errno
+                a[1].value = data[:a[2] - 1]
+                return errno
+            a[1].value = data
+            return 1000
+
+        self.t.handle = 12345
+        self.dll_mock.GetDeviceData.side_effect = se
+
+        res = self.t.get_device_data('user', 4096)
+
+        assert [x[0][2] for x in self.dll_mock.GetDeviceData.call_args_list] == [4096, 8192, 16384]
+        assert len(res) == 1000
+
+    def test_get_device_data__should_remember_buffer_size_for_table(self):
+        data = b'Pin,CardNo\r\n' + b''.join(b'%d,123\r\n' % x for x in range(1000))
+
+        def se(*a, **kw):
+            a[1].value = data[:a[2] - 1]
+            return 1000
+
+        self.t.handle = 12345
+        self.dll_mock.GetDeviceData.side_effect = se
+        self.t.get_device_data('user', 4096)
+        self.dll_mock.GetDeviceData.reset_mock()
+
+        self.t.get_device_data('user')
+
+        self.dll_mock.GetDeviceDataCount.assert_not_called()
+        assert [x[0][2] for x in self.dll_mock.GetDeviceData.call_args_list] == [16384]
+
+    def test_get_device_data__if_buffer_reached_max_size__should_raise_error(self):
+        self.t.handle = 12345
+        self.t.max_buffer_size = 8192
+        self.dll_mock.GetDeviceData.return_value = -3
+
+        with pytest.raises(ZKSDKError) as e:
+            self.t.get_device_data('user', 4096)
+
+        assert e.value.err == -3
+
+    def test_get_device_data__on_failure__should_raise_error(self):
+        self.t.handle = 12345
+        self.dll_mock.GetDeviceData.return_value = -2
+
+        with pytest.raises(ZKSDKError) as e:
+            self.t.get_device_data('user', 4096)
+
+        assert e.value.err == -2
+
+    def test_get_device_data__if_fields_and_options_passed__should_pass_them_to_sdk(self):
+        self.t.handle = handle = 12345
+        self.dll_mock.GetDeviceData.return_value = 0
+
+        self.t.get_device_data('transaction', 4096, fields=['Cardno', 'Pin'], options='NewRecord')
+
+        self.dll_mock.GetDeviceData.assert_called_once_with(
+            handle, ANY, 4096, b'transaction', b'Cardno\tPin', b'', b'NewRecord'
+        )
+
+    def test_iter_device_data__should_return_iterator_over_rows(self):
+        def se(*a, **kw):
+            a[1].value = b'Pin,CardNo\r\n1,123\r\n2,456\r\n'
+            return 2
+
+        self.t.handle = 12345
+        self.dll_mock.GetDeviceData.side_effect = se
+
+        res = self.t.iter_device_data('user', 4096)
+
+        rows = list(res)
+        assert [(x.Pin, x.CardNo) for x in rows] == [('1', '123'), ('2', '456')]
+        assert rows[0]._fields == ('Pin', 'CardNo')
+
+    def test_iter_device_data__on_failure__should_raise_error_immediately(self):
+        self.t.handle = 12345
+        self.dll_mock.GetDeviceData.return_value = -2
+
+        with pytest.raises(ZKSDKError) as e:
+            self.t.iter_device_data('user', 4096)
+
+        assert e.value.err == -2
+
+    def test_get_device_data_count__should_return_count(self):
+        self.t.handle = 12345
+        self.dll_mock.GetDeviceDataCount.return_value = 5
+
+        assert self.t.get_device_data_count('user') == 5
+
+    def test_get_device_data_count__on_failure__should_raise_error(self):
+        self.t.handle = 12345
+        self.dll_mock.GetDeviceDataCount.return_value = -2
+
+        with pytest.raises(ZKSDKError) as e:
+            self.t.get_device_data_count('user')
+
+        assert e.value.err == -2
+
+    def test_set_device_data_bulk__should_send_rows_by_batches(self):
+        self.t.handle = handle = 12345
+        self.dll_mock.SetDeviceData.return_value = 0
+        rows = [{'Pin': str(x)} for x in range(5)]
+
+        self.t.set_device_data_bulk('user', rows, batch_rows=2)
+
+        assert self.dll_mock.SetDeviceData.call_args_list == [
+            call(handle, b'user', b'Pin=0\r\nPin=1', b''),
+            call(handle, b'user', b'Pin=2\r\nPin=3', b''),
+            call(handle, b'user', b'Pin=4', b''),
+        ]
+
+    def test_set_device_data_bulk__should_report_progress(self):
+        self.t.handle = 12345
+        self.dll_mock.SetDeviceData.return_value = 0
+        rows = [{'Pin': str(x)} for x in range(5)]
+        progress = []
+
+        self.t.set_device_data_bulk('user', rows, batch_rows=2, progress=progress.append)
+
+        assert [(p.batch, p.batches, p.rows_done, p.rows) for p in progress] == [
+            (0, 3, 2, 5), (1, 3, 4, 5), (2, 3, 5, 5)
+        ]
+        assert all(isinstance(p, BulkProgress) and p.rows_per_second >= 0 for p in progress)
+
+    def test_set_device_data_bulk__if_batch_failed__should_raise_error_with_batch_index(self):
+        self.t.handle = 12345
+        self.dll_mock.SetDeviceData.side_effect = (0, -2, 0)
+        rows = [{'Pin': str(x)} for x in range(5)]
+
+        with pytest.raises(ZKSDKBatchError) as e:
+            self.t.set_device_data_bulk('user', rows, batch_rows=2)
+
+        assert e.value.err == -2
+        assert e.value.batch == 1
+        assert e.value.rows_done == 2
+        assert self.dll_mock.SetDeviceData.call_count == 2
+
+    def test_set_device_data_bulk__if_start_batch_passed__should_skip_previous_batches(self):
+        self.t.handle = handle = 12345
+        self.dll_mock.SetDeviceData.return_value = 0
+        rows = [{'Pin': str(x)} for x in range(5)]
+        progress = []
+
+        self.t.set_device_data_bulk('user', rows, batch_rows=2, progress=progress.append,
+                                    start_batch=1)
+
+        assert self.dll_mock.SetDeviceData.call_args_list == [
+            call(handle, b'user', b'Pin=2\r\nPin=3', b''),
+            call(handle, b'user', b'Pin=4', b''),
+        ]
+        assert [p.rows_done for p in progress] == [4, 5]
+
+    def test_delete_device_data_bulk__should_send_filters_by_batches(self):
+        self.t.handle = handle = 12345
+        self.dll_mock.DeleteDeviceData.return_value = 0
+        filters = []
+        for pin in range(3):
+            data_filter = DeviceDataFilter()
+            data_filter.add_condition('Pin', str(pin))
+            filters.append(data_filter)
+
+        self.t.delete_device_data_bulk('user', filters, batch_filters=2)
+
+        assert self.dll_mock.DeleteDeviceData.call_args_list == [
+            call(handle, b'user', b'Pin=0\r\nPin=1', b''),
+            call(handle, b'user', b'Pin=2', b''),
+        ]
+
+    def test_delete_device_data_bulk__if_batch_failed__should_raise_error_with_batch_index(self):
+        self.t.handle = 12345
+        self.dll_mock.DeleteDeviceData.side_effect = (0, -2)
+        filters = []
+        for pin in range(3):
+            data_filter = DeviceDataFilter()
+            data_filter.add_condition('Pin', str(pin))
+            filters.append(data_filter)
+
+        with pytest.raises(ZKSDKBatchError) as e:
+            self.t.delete_device_data_bulk('user', filters, batch_filters=2)
+
+        assert (e.value.err, e.value.batch, e.value.rows_done) == (-2, 1, 2)
+
+    def test_control_device__if_poll_is_in_progress__should_wait_for_it(self):
+        started, finish = threading.Event(), threading.Event()
+        calls = []
+
+        def rt_log_se(*a, **kw):
+            started.set()
+            finish.wait(1)
+            calls.append('GetRTLog')
+            return 0
+
+        self.t.handle = 12345
+        self.dll_mock.GetRTLog.side_effect = rt_log_se
+        self.dll_mock.ControlDevice.side_effect = lambda *a: calls.append('ControlDevice') or 0
+        thread = threading.Thread(target=self.t.get_rt_log, args=(1024, ))
+        thread.start()
+        started.wait(1)
+
+        control_thread = threading.Thread(target=self.t.control_device, args=(1, 1, 1, 1, 0))
+        control_thread.start()
+        deadline = time.monotonic() + 1
+        while self.t.lock.waiting == 0 and time.monotonic() < deadline:
+            time.sleep(.001)
+        finish.set()
+        thread.join(1)
+        control_thread.join(1)
+
+        assert calls == ['GetRTLog', 'ControlDevice']
+
     def test_object_deletion_by_gc__should_disconnect(self):
         handle = 12345
         self.dll_mock.Disconnect.return_value = None
@@ -384,3 +689,160 @@ class TestZKSDK:
         self.t.__del__()
 
         self.dll_mock.Disconnect.assert_called_once_with(handle)
+
+
+class TestBufferPool:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.t = BufferPool()
+
+    def test_acquire__should_return_buffer_of_requested_size(self):
+        res = self.t.acquire('GetRTLog', 1024)
+
+        assert len(res) == 1024
+        assert self.t.size == 1024
+
+    def test_acquire__if_buffer_is_big_enough__should_return_it_with_empty_string(self):
+        buf = self.t.acquire('GetRTLog', 1024)
+        buf.value = b'test'
+
+        res = self.t.acquire('GetRTLog', 512)
+
+        assert res is buf
+        assert res.value == b''
+
+    def test_acquire__if_bigger_buffer_requested__should_replace_buffer(self):
+        buf = self.t.acquire('GetRTLog', 512)
+
+        res = self.t.acquire('GetRTLog', 1024)
+
+        assert res is not buf
+        assert len(res) == 1024
+        assert self.t.size == 1024
+
+    def test_acquire__should_keep_separate_buffers_for_kinds(self):
+        buf1 = self.t.acquire('GetRTLog', 1024)
+        buf2 = self.t.acquire('GetDeviceParam', 1024)
+
+        assert buf1 is not buf2
+        assert self.t.size == 2048
+
+    def test_acquire__if_max_size_exceeded__should_not_keep_buffer(self):
+        obj = BufferPool(max_size=1536)
+        obj.acquire('GetRTLog', 1024)
+
+        buf = obj.acquire('GetDeviceData', 1024)
+        res = obj.acquire('GetDeviceData', 1024)
+
+        assert res is not buf
+        assert obj.size == 1024
+
+    def test_acquire__if_buffer_is_much_bigger__should_replace_buffer(self):
+        buf = self.t.acquire('GetDeviceData.user', 1024 * 1024)
+
+        res = self.t.acquire('GetDeviceData.user', 1024)
+
+        assert res is not buf
+        assert self.t.size == 1024
+
+    def test_clear__should_release_buffers(self):
+        self.t.acquire('GetRTLog', 1024)
+
+        self.t.clear()
+
+        assert self.t.size == 0
+
+
+class TestPriorityLock:
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        self.t = PriorityLock()
+
+    def _wait_for_waiters(self, count):
+        deadline = time.monotonic() + 1
+        while self.t.waiting < count and time.monotonic() < deadline:
+            time.sleep(.001)
+
+    def test_acquire__should_be_reentrant(self):
+        with self.t(CallPriority.default):
+            with self.t(CallPriority.control):
+                pass
+
+            assert self.t._owner == threading.get_ident()
+
+        assert self.t._owner is None
+
+    def test_release__if_not_acquired__should_raise_error(self):
+        with pytest.raises(RuntimeError):
+            self.t.release()
+
+    def test_acquire__should_give_lock_to_waiters_in_priority_order(self):
+        order = []
+
+        def worker(priority):
+            with self.t(priority):
+                order.append(priority)
+
+        self.t.acquire()
+        threads = []
+        for priority in (CallPriority.poll, CallPriority.default, CallPriority.poll,
+                         CallPriority.control):
+            thread = threading.Thread(target=worker, args=(priority, ))
+            thread.start()
+            threads.append(thread)
+            self._wait_for_waiters(len(threads))
+
+        self.t.release()
+        for thread in threads:
+            thread.join(1)
+
+        assert order == [CallPriority.control, CallPriority.default,
+                         CallPriority.poll, CallPriority.poll]
+
+
+class TestSplitBatches:
+    def test_split_batches__should_limit_rows_count(self):
+        rows = [{'Pin': str(x)} for x in range(5)]
+
+        res = _split_batches(rows, 2, 1024)
+
+        assert res == [rows[:2], rows[2:4], rows[4:]]
+
+    def test_split_batches__should_limit_text_size(self):
+        rows = [{'Pin': '1'}, {'Pin': '2'}, {'Pin': '3'}]  # 5 bytes + CRLF each
+
+        res = _split_batches(rows, 100, 14)
+
+        assert res == [rows[:2], rows[2:]]
+
+    def test_split_batches__if_row_is_bigger_than_limit__should_put_it_to_separate_batch(self):
+        rows = [{'Pin': '1'}, {'Pin': '2' * 100}, {'Pin': '3'}]
+
+        res = _split_batches(rows, 100, 16)
+
+        assert res == [[rows[0]], [rows[1]], [rows[2]]]
+
+    def test_split_batches__if_no_rows__should_return_empty_list(self):
+        assert _split_batches([], 100, 1024) == []
+
+
+class TestIterTable:
+    @pytest.mark.parametrize('chunks', (
+        (b'Pin,CardNo\r\n1,123\r\n2,456\r\n',),
+        (b'Pin,CardNo\r\n1,123\r\n2,456',),
+        (b'Pin,Card', b'No\r\n1,1', b'23\r', b'\n2,456\r\n'),
+        (b'Pin,CardNo\r\n', b'', b'1,123\r\n', b'2,456\r\n'),
+    ))
+    def test_iter_table__should_parse_rows_from_chunks(self, chunks):
+        res = list(_iter_table(chunks))
+
+        assert [tuple(x) for x in res] == [('1', '123'), ('2', '456')]
+
+    @pytest.mark.parametrize('chunks', ((b'\r\n',), (b'',), ()))
+    def test_iter_table__if_no_data__should_return_nothing(self, chunks):
+        assert list(_iter_table(chunks)) == []
+
+    def test_iter_table__if_row_fields_count_differs__should_fit_it_to_header(self):
+        res = list(_iter_table((b'Pin,CardNo,Password\r\n1,123\r\n2,456,1,2\r\n',)))
+
+        assert [tuple(x) for x in res] == [('1', '123', ''), ('2', '456', '1')]